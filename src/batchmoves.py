@@ -0,0 +1,334 @@
+#!usr/bin/env python3
+"""Attack maps and pseudo-legal move masks for many SpartanChess positions
+at once, for jobs that go through millions of positions.
+
+Positions are given as an (N, 8, 8) int8 array of piece ids (see Piece),
+indexed [position, rank, file], with Piece.EMPTY on empty squares. Each
+piece type's squares are packed into one uint64 bitboard per position
+(squares numbered rank * 8 + file, as in position.py), and every piece
+type's attacks are found for all N positions together with array shifts;
+sliders extend their rays one step at a time through empty squares. Results
+are (N, 8, 8) bool arrays laid out like the input.
+
+These follow the same rules as moverules.findMoveBits: castling is left out,
+as is whether a move leaves the mover's king in check."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import numpy as np
+
+# INTERNAL IMPORTS
+from piece import Piece
+from position import Position
+import movetables as mt
+
+
+def _squaresWhere(condition) -> np.uint64:
+    """
+    Build a bitboard of the squares meeting a condition.
+
+    Parameters
+    ---
+    condition: function of (rank, file) returning bool
+
+    Returns
+    ---
+    np.uint64
+    """
+    return np.uint64(sum(1 << (rank * 8 + file) for rank in range(8)
+                         for file in range(8) if condition(rank, file)))
+
+
+# squares a piece can land on after moving the given number of files; the
+# others would have wrapped around from the other side of the board
+_FILE_MASKS: dict[int, np.uint64] = {
+    fileStep: _squaresWhere(lambda rank, file: 0 <= file - fileStep < 8)
+    for fileStep in range(-2, 3)}
+RANK_3: np.uint64 = _squaresWhere(lambda rank, file: rank == 2)
+"""where pawns land after their first single step"""
+RANK_7: np.uint64 = _squaresWhere(lambda rank, file: rank == 6)
+"""where hoplites start"""
+
+KNIGHT_STEPS: tuple[tuple[int, int]] = tuple(zip(mt.KNIGHT_R_OFFSETS,
+                                                 mt.KNIGHT_F_OFFSETS))
+KING_STEPS: tuple[tuple[int, int]] = tuple(zip(mt.KING_R_OFFSETS,
+                                               mt.KING_F_OFFSETS))
+LIEUTENANT_STEPS: tuple[tuple[int, int]] = tuple(zip(mt.LIEUTENANT_R_OFFSETS,
+                                                     mt.LIEUTENANT_F_OFFSETS))
+CAPTAIN_STEPS: tuple[tuple[int, int]] = tuple(zip(mt.CAPTAIN_R_OFFSETS,
+                                                  mt.CAPTAIN_F_OFFSETS))
+ROOK_STEPS: tuple[tuple[int, int]] = tuple(zip(mt.ROOK_R_OFFSETS,
+                                               mt.ROOK_F_OFFSETS))
+BISHOP_STEPS: tuple[tuple[int, int]] = tuple(zip(mt.BISHOP_R_OFFSETS,
+                                                 mt.BISHOP_F_OFFSETS))
+
+PIECE_IDS: tuple[int] = Position.WHITE_IDS + Position.BLACK_IDS
+
+
+def boardsFromPositions(positions: list[Position]) -> np.ndarray:
+    """
+    Stack positions into the array taken by the functions below.
+
+    Parameters
+    ---
+    positions: list[Position]
+
+    Returns
+    ---
+    np.ndarray: (N, 8, 8) int8 piece ids
+    """
+    return np.array([position.squares for position in positions],
+                    dtype=np.int8).reshape(len(positions), 8, 8)
+
+
+def findBitboards(boards: np.ndarray) -> np.ndarray:
+    """
+    Pack every piece type's squares into bitboards.
+
+    Parameters
+    ---
+    boards: np.ndarray (N, 8, 8) int8 piece ids
+
+    Returns
+    ---
+    np.ndarray: (16, N) uint64, the bitboards of each piece id; rows of
+    unused ids are 0
+    """
+    flat = boards.reshape(len(boards), 64)
+    bitboards = np.zeros((16, len(boards)), dtype=np.uint64)
+    for id in PIECE_IDS:
+        bitboards[id] = np.packbits(flat == id, axis=1, bitorder="little")\
+            .view("<u8")[:, 0]
+    return bitboards
+
+
+def bitsToMasks(bits: np.ndarray) -> np.ndarray:
+    """
+    Unpack bitboards into square masks.
+
+    Parameters
+    ---
+    bits: np.ndarray (N,) uint64
+
+    Returns
+    ---
+    np.ndarray: (N, 8, 8) bool indexed [position, rank, file]
+    """
+    packed = bits.astype("<u8").view(np.uint8).reshape(len(bits), 8)
+    return np.unpackbits(packed, axis=1, bitorder="little")\
+        .reshape(len(bits), 8, 8).astype(bool)
+
+
+def shiftBits(bits: np.ndarray, rankStep: int, fileStep: int) -> np.ndarray:
+    """
+    Move every square of the bitboards by the given step, dropping squares
+    that leave the board.
+
+    Parameters
+    ---
+    bits: np.ndarray (N,) uint64
+    rankStep: int
+    fileStep: int between -2 and 2
+
+    Returns
+    ---
+    np.ndarray: (N,) uint64
+    """
+    amount = rankStep * 8 + fileStep
+    if amount >= 0:
+        shifted = bits << np.uint64(amount)
+    else:
+        shifted = bits >> np.uint64(-amount)
+    return shifted & _FILE_MASKS[fileStep]
+
+
+def leaperBits(pieces: np.ndarray,
+               steps: tuple[tuple[int, int]]) -> np.ndarray:
+    """
+    Find the squares reached from the given squares by any of the steps.
+
+    Parameters
+    ---
+    pieces: np.ndarray (N,) uint64
+    steps: tuple[tuple[int, int]] (rank step, file step) of each jump
+
+    Returns
+    ---
+    np.ndarray: (N,) uint64
+    """
+    reached = np.zeros_like(pieces)
+    for (rankStep, fileStep) in steps:
+        reached |= shiftBits(pieces, rankStep, fileStep)
+    return reached
+
+
+def sliderBits(pieces: np.ndarray, empty: np.ndarray,
+               steps: tuple[tuple[int, int]]) -> np.ndarray:
+    """
+    Find the squares attacked along rays from the given squares, up to and
+    including the first occupied square of each ray.
+
+    Parameters
+    ---
+    pieces: np.ndarray (N,) uint64
+    empty: np.ndarray (N,) uint64 empty squares
+    steps: tuple[tuple[int, int]] (rank step, file step) of each ray
+
+    Returns
+    ---
+    np.ndarray: (N,) uint64
+    """
+    attacks = np.zeros_like(pieces)
+    for (rankStep, fileStep) in steps:
+        ray = shiftBits(pieces, rankStep, fileStep)
+        # rays only go on through empty squares
+        for _ in range(6):
+            attacks |= ray
+            ray = shiftBits(ray & empty, rankStep, fileStep)
+            if not ray.any():
+                break
+        attacks |= ray
+    return attacks
+
+
+def pieceAttackBits(pieceId: int, pieces: np.ndarray,
+                    empty: np.ndarray) -> np.ndarray:
+    """
+    Find the squares attacked by the pieces of one type.
+
+    Parameters
+    ---
+    pieceId: int piece type id number
+    pieces: np.ndarray (N,) uint64 squares of the pieces
+    empty: np.ndarray (N,) uint64 empty squares
+
+    Returns
+    ---
+    np.ndarray: (N,) uint64
+    """
+    match pieceId:
+        case Piece.PAWN:
+            return leaperBits(pieces, ((+1, -1), (+1, +1)))
+        case Piece.KNIGHT:
+            return leaperBits(pieces, KNIGHT_STEPS)
+        case Piece.BISHOP:
+            return sliderBits(pieces, empty, BISHOP_STEPS)
+        case Piece.ROOK:
+            return sliderBits(pieces, empty, ROOK_STEPS)
+        case Piece.QUEEN:
+            return sliderBits(pieces, empty, ROOK_STEPS + BISHOP_STEPS)
+        case Piece.PKING | Piece.SKING:
+            return leaperBits(pieces, KING_STEPS)
+        case Piece.HOPLITE:
+            return shiftBits(pieces, -1, 0)
+        case Piece.LIEUTENANT:
+            return leaperBits(pieces, LIEUTENANT_STEPS)
+        case Piece.CAPTAIN:
+            return leaperBits(pieces, CAPTAIN_STEPS)
+        case Piece.GENERAL:
+            return sliderBits(pieces, empty, ROOK_STEPS)\
+                | leaperBits(pieces, KING_STEPS)
+        case Piece.WARLORD:
+            return sliderBits(pieces, empty, BISHOP_STEPS)\
+                | leaperBits(pieces, KNIGHT_STEPS)
+    return np.zeros_like(pieces)
+
+
+def pieceMoveBits(pieceId: int, pieces: np.ndarray, empty: np.ndarray,
+                  enemy: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find the pseudo-legal destinations of the pieces of one type.
+
+    Parameters
+    ---
+    pieceId: int piece type id number
+    pieces: np.ndarray (N,) uint64 squares of the pieces
+    empty: np.ndarray (N,) uint64 empty squares
+    enemy: np.ndarray (N,) uint64 squares of the opponent's pieces
+
+    Returns
+    ---
+    tuple[np.ndarray, np.ndarray]: (N,) uint64 bitboards of non-capturing
+    moves and of captures
+    """
+    match pieceId:
+        case Piece.PAWN:
+            single = shiftBits(pieces, +1, 0) & empty
+            # starting double-step move
+            double = shiftBits(single & RANK_3, +1, 0) & empty
+            return single | double,\
+                leaperBits(pieces, ((+1, -1), (+1, +1))) & enemy
+        case Piece.HOPLITE:
+            moves = leaperBits(pieces, ((-1, -1), (-1, +1)))
+            # starting double-step jump
+            moves |= leaperBits(pieces & RANK_7, ((-2, -2), (-2, +2)))
+            return moves & empty, shiftBits(pieces, -1, 0) & enemy
+        case Piece.LIEUTENANT:
+            attacks = leaperBits(pieces, LIEUTENANT_STEPS)
+            # it can also step sideways, but not capture that way
+            return (attacks | leaperBits(pieces, ((0, -1), (0, +1)))) & empty,\
+                attacks & enemy
+    attacks = pieceAttackBits(pieceId, pieces, empty)
+    return attacks & empty, attacks & enemy
+
+
+def findAttackMaps(boards: np.ndarray, white) -> np.ndarray:
+    """
+    Find all squares attacked by one side in every position.
+
+    Parameters
+    ---
+    boards: np.ndarray (N, 8, 8) int8 piece ids
+    white: bool or np.ndarray of N bools, whether to find White's attacks
+    (for each position)
+
+    Returns
+    ---
+    np.ndarray: (N, 8, 8) bool
+    """
+    bitboards = findBitboards(boards)
+    empty = ~np.bitwise_or.reduce(bitboards, axis=0)
+    sides = np.broadcast_to(np.asarray(white, dtype=bool), (len(boards),))
+    attacked = np.zeros(len(boards), dtype=np.uint64)
+    for id in PIECE_IDS:
+        # only work out attacks of the pieces of the side asked for
+        pieces = np.where(sides == (id < 10), bitboards[id], np.uint64(0))
+        if pieces.any():
+            attacked |= pieceAttackBits(id, pieces, empty)
+    return bitsToMasks(attacked)
+
+
+def findMoveMasks(boards: np.ndarray,
+                  whiteToMove) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    """
+    Find the pseudo-legal destinations of every piece type of the side to
+    move in every position.
+
+    Parameters
+    ---
+    boards: np.ndarray (N, 8, 8) int8 piece ids
+    whiteToMove: bool or np.ndarray of N bools, whether White is to move
+    (in each position)
+
+    Returns
+    ---
+    dict[int, tuple[np.ndarray, np.ndarray]]: for every piece id, (N, 8, 8)
+    bool masks of the squares any piece of that type can move to without
+    and with capturing; both are empty in positions where the piece type
+    isn't the mover's
+    """
+    bitboards = findBitboards(boards)
+    white = np.bitwise_or.reduce(bitboards[list(Position.WHITE_IDS)], axis=0)
+    black = np.bitwise_or.reduce(bitboards[list(Position.BLACK_IDS)], axis=0)
+    empty = ~(white | black)
+    sides = np.broadcast_to(np.asarray(whiteToMove, dtype=bool), (len(boards),))
+
+    masks = {}
+    for id in PIECE_IDS:
+        pieces = np.where(sides == (id < 10), bitboards[id], np.uint64(0))
+        moves, captures = pieceMoveBits(id, pieces, empty,
+                                        black if id < 10 else white)
+        masks[id] = (bitsToMasks(moves), bitsToMasks(captures))
+    return masks
@@ -11,7 +11,10 @@ import pygame
 from pygame import gfxdraw
 
 # INTERNAL IMPORTS
+from book import OpeningBook
 from piece import Piece
+from piecesprite import PieceSprite
+from game import Game
 from ui import UI
 import moverules as mr
 
@@ -19,7 +22,7 @@ import moverules as mr
 _ATTACK_DEBUG: bool = False
 
 
-class Board:
+class Board(Game):
     #############
     # CONSTANTS #
     #############
@@ -33,10 +36,7 @@ class Board:
     LAST_MOVE_COLOR: tuple[int, int, int] = (128, 40, 136)
     HIGHLIGHT_COLOR: tuple[int, int, int] = (95, 7, 95)
     DEBUG_COLOR: tuple[int, int, int] = (255, 255, 0)
-
-    ONGOING: int = 0
-    CHECKMATE: int = 1
-    STALEMATE: int = 2
+    BOOK_HINT_COLOR: tuple[int, int, int] = (0, 128, 128)
 
     MOVED_EVENT: int = pygame.USEREVENT + 10
     CAPTURE_EVENT: int = pygame.USEREVENT + 11
@@ -50,20 +50,35 @@ class Board:
     grid: list[list[Piece]]
     draggedR: int
     draggedF: int
-    whiteToMove: bool
-    castleShortRight: bool
-    castleLongRight: bool
+    draggedMoves: list[list[int]]
+    """move code matrix of the dragged piece, found when it is picked up"""
 
     promoting: int  # either Piece.WHITE, Piece.BLACK, or Piece.EMPTY
     promotionFile: int
     promotionOriginalPosition: tuple[int, int]
-    blackKingCount: int
+    undoStack: list[tuple]  # see makeMove
+    book: OpeningBook
+    """book whose moves are shown as hints; None to show none"""
 
     lastStartR: int
     lastStartF: int
     lastDestR: int
     lastDestF: int
 
+    boardLayer: pygame.Surface
+    """empty checkerboard, drawn once"""
+    staticLayer: pygame.Surface
+    """boardLayer with the last move highlighted and the static pieces on top"""
+    staticLayerKey: tuple
+    """state the static layer was last built from, see updateStaticLayer"""
+
+    dirtyRects: list[pygame.Rect]
+    """areas of the window changed since they were last taken, see takeDirtyRects"""
+    drawnDrag: tuple
+    """(dragged square, target square, dragged icon area) as last taken"""
+    drawnPromotion: tuple[int, int]
+    """(promoting, promotionFile) as last taken"""
+
     moveSound: pygame.mixer.Sound
     captureSound: pygame.mixer.Sound
     lowTimeSound: pygame.mixer.Sound
@@ -84,41 +99,33 @@ class Board:
         ---
         None
         """
-        self.grid = []
-        # note that this is in the opposite order of how it's
+        super().__init__()
+        # note that ranks are in the opposite order of how they're
         # displayed on the screen
-        self.grid.append([Piece(Piece.ROOK, 0, 0),
-                          Piece(Piece.KNIGHT, 0, 1),
-                          Piece(Piece.BISHOP, 0, 2),
-                          Piece(Piece.QUEEN, 0, 3),
-                          Piece(Piece.PKING, 0, 4),
-                          Piece(Piece.BISHOP, 0, 5),
-                          Piece(Piece.KNIGHT, 0, 6),
-                          Piece(Piece.ROOK, 0, 7)])
-        self.grid.append([Piece(Piece.PAWN, 1, i) for i in range(8)])
-        for i in range(4):
-            self.grid.append([Piece(Piece.EMPTY, i, j) for j in range(8)])
-        self.grid.append([Piece(Piece.HOPLITE, 6, i) for i in range(8)])
-        self.grid.append([Piece(Piece.LIEUTENANT, 7, 0),
-                          Piece(Piece.GENERAL, 7, 1),
-                          Piece(Piece.SKING, 7, 2),
-                          Piece(Piece.CAPTAIN, 7, 3),
-                          Piece(Piece.CAPTAIN, 7, 4),
-                          Piece(Piece.SKING, 7, 5),
-                          Piece(Piece.WARLORD, 7, 6),
-                          Piece(Piece.LIEUTENANT, 7, 7)])
-
-        self.whiteToMove = True
-        self.castleShortRight = self.castleLongRight = True
+        self.grid = [[PieceSprite(self.position.pieceAt(rank, file))
+                      for file in range(8)] for rank in range(8)]
+
         self.draggedF = self.draggedR = -1
+        self.draggedMoves = None
         self.promoting = Piece.EMPTY
         self.promotionFile = -1
         self.promotionOriginalPosition = (-1, -1)
-        self.blackKingCount = 2
         self.lastStartR = None
         self.lastStartF = None
         self.lastDestR = None
         self.lastDestF = None
+        self.undoStack = []
+        self.book = None
+
+        self.boardLayer = Board.renderEmptyBoard()
+        self.staticLayer = pygame.Surface((Board.SIZE, Board.SIZE))
+        self.staticLayerKey = None
+
+        # everything has to be drawn the first time
+        self.dirtyRects = [pygame.Rect(Board.X_OFFSET, Board.Y_OFFSET,
+                                       Board.SIZE, Board.SIZE)]
+        self.drawnDrag = ((-1, -1), (-1, -1), None)
+        self.drawnPromotion = (self.promoting, self.promotionFile)
 
         Board.moveSound = pygame.mixer.Sound("../sound/move.wav")
         Board.captureSound = pygame.mixer.Sound("../sound/capture.wav")
@@ -149,29 +156,27 @@ class Board:
         # draw promotion menu
         if self.promoting == Piece.WHITE:
             # draw menu column
-            rect = pygame.Rect(Board.X_OFFSET + self.promotionFile * Piece.SIZE,
+            rect = pygame.Rect(Board.X_OFFSET + self.promotionFile * PieceSprite.SIZE,
                                Board.Y_OFFSET,
-                               Piece.SIZE,
-                               Piece.SIZE * 4.5)
+                               PieceSprite.SIZE,
+                               PieceSprite.SIZE * 4.5)
             pygame.draw.rect(surface,
                              Board.HIGHLIGHT_COLOR,
                              rect)
-            # create piece icons
-            icons = [Piece(Piece.QUEEN, 7, self.promotionFile),
-                     Piece(Piece.KNIGHT, 6, self.promotionFile),
-                     Piece(Piece.ROOK, 5, self.promotionFile),
-                     Piece(Piece.BISHOP, 4, self.promotionFile)]
-            for icon in icons:
-                icon.draw(surface)
+            # draw piece icons, by rank
+            icons = [(Piece.QUEEN, 7), (Piece.KNIGHT, 6),
+                     (Piece.ROOK, 5), (Piece.BISHOP, 4)]
+            for (id, rank) in icons:
+                PieceSprite(id).drawOnSquare(surface, rank, self.promotionFile)
             # draw cancel 'x' button
-            top_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * Piece.SIZE,
-                        Board.Y_OFFSET + 4.15 * Piece.SIZE)
-            bottom_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * Piece.SIZE,
-                            Board.Y_OFFSET + 4.35 * Piece.SIZE)
-            top_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * Piece.SIZE,
-                         Board.Y_OFFSET + 4.15 * Piece.SIZE)
-            bottom_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * Piece.SIZE,
-                           Board.Y_OFFSET + 4.35 * Piece.SIZE)
+            top_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * PieceSprite.SIZE,
+                        Board.Y_OFFSET + 4.15 * PieceSprite.SIZE)
+            bottom_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * PieceSprite.SIZE,
+                            Board.Y_OFFSET + 4.35 * PieceSprite.SIZE)
+            top_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * PieceSprite.SIZE,
+                         Board.Y_OFFSET + 4.15 * PieceSprite.SIZE)
+            bottom_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * PieceSprite.SIZE,
+                           Board.Y_OFFSET + 4.35 * PieceSprite.SIZE)
             pygame.draw.line(surface, Board.LIGHT_SQUARE_COLOR,
                              top_left, bottom_right, width=3)
             pygame.draw.line(surface, Board.LIGHT_SQUARE_COLOR,
@@ -179,32 +184,30 @@ class Board:
         elif self.promoting == Piece.BLACK:
             # draw menu column
             # note that Black can promote to king if has only one
-            rect = pygame.Rect(Board.X_OFFSET + self.promotionFile * Piece.SIZE,
-                               Board.Y_OFFSET + Piece.SIZE *
+            rect = pygame.Rect(Board.X_OFFSET + self.promotionFile * PieceSprite.SIZE,
+                               Board.Y_OFFSET + PieceSprite.SIZE *
                                (3.5 if self.blackKingCount == 2 else 2.5),
-                               Piece.SIZE,
-                               Piece.SIZE * (4.5 if self.blackKingCount == 2 else 5.5))
+                               PieceSprite.SIZE,
+                               PieceSprite.SIZE * (4.5 if self.blackKingCount == 2 else 5.5))
             pygame.draw.rect(surface,
                              Board.HIGHLIGHT_COLOR,
                              rect)
-            # create piece icons
-            icons = [Piece(Piece.LIEUTENANT, 3, self.promotionFile),
-                     Piece(Piece.CAPTAIN, 2, self.promotionFile),
-                     Piece(Piece.WARLORD, 1, self.promotionFile),
-                     Piece(Piece.GENERAL, 0, self.promotionFile)]
+            # draw piece icons, by rank
+            icons = [(Piece.LIEUTENANT, 3), (Piece.CAPTAIN, 2),
+                     (Piece.WARLORD, 1), (Piece.GENERAL, 0)]
             if self.blackKingCount < 2:
-                icons.append(Piece(Piece.SKING, 4, self.promotionFile))
-            for icon in icons:
-                icon.draw(surface)
+                icons.append((Piece.SKING, 4))
+            for (id, rank) in icons:
+                PieceSprite(id).drawOnSquare(surface, rank, self.promotionFile)
             # draw cancel 'x' button
-            top_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * Piece.SIZE,
-                        Board.Y_OFFSET + Piece.SIZE * (3.65 if self.blackKingCount == 2 else 2.65))
-            bottom_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * Piece.SIZE,
-                            Board.Y_OFFSET + Piece.SIZE * (3.85 if self.blackKingCount == 2 else 2.85))
-            top_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * Piece.SIZE,
-                         Board.Y_OFFSET + Piece.SIZE * (3.65 if self.blackKingCount == 2 else 2.65))
-            bottom_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * Piece.SIZE,
-                           Board.Y_OFFSET + Piece.SIZE * (3.85 if self.blackKingCount == 2 else 2.85))
+            top_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * PieceSprite.SIZE,
+                        Board.Y_OFFSET + PieceSprite.SIZE * (3.65 if self.blackKingCount == 2 else 2.65))
+            bottom_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * PieceSprite.SIZE,
+                            Board.Y_OFFSET + PieceSprite.SIZE * (3.85 if self.blackKingCount == 2 else 2.85))
+            top_right = (Board.X_OFFSET + (self.promotionFile + 0.6) * PieceSprite.SIZE,
+                         Board.Y_OFFSET + PieceSprite.SIZE * (3.65 if self.blackKingCount == 2 else 2.65))
+            bottom_left = (Board.X_OFFSET + (self.promotionFile + 0.4) * PieceSprite.SIZE,
+                           Board.Y_OFFSET + PieceSprite.SIZE * (3.85 if self.blackKingCount == 2 else 2.85))
             pygame.draw.line(surface, Board.LIGHT_SQUARE_COLOR,
                              top_left, bottom_right, width=3)
             pygame.draw.line(surface, Board.LIGHT_SQUARE_COLOR,
@@ -212,14 +215,14 @@ class Board:
 
         # show squares attacked by opponent; for debug purposes
         if _ATTACK_DEBUG:
-            attacked = mr.findAttackedSquares(self.grid, not self.whiteToMove)
+            attacked = mr.findAttackedBits(self.position, not self.whiteToMove)
             for rank in range(8):
                 for file in range(8):
-                    if attacked[rank, file]:
-                        squareCenter = (int(Board.X_OFFSET + (file + 0.5) * Piece.SIZE),
-                                        int(Board.Y_OFFSET + (7 - rank + 0.5) * Piece.SIZE))
+                    if attacked >> (rank * 8 + file) & 1:
+                        squareCenter = (int(Board.X_OFFSET + (file + 0.5) * PieceSprite.SIZE),
+                                        int(Board.Y_OFFSET + (7 - rank + 0.5) * PieceSprite.SIZE))
                         pygame.draw.circle(surface, Board.DEBUG_COLOR,
-                                           squareCenter, Piece.SIZE / 6.5)
+                                           squareCenter, PieceSprite.SIZE / 6.5)
 
     def drawStatic(self, surface: pygame.Surface) -> None:
         """
@@ -235,43 +238,120 @@ class Board:
         ---
         None
         """
+        self.updateStaticLayer()
+        surface.blit(self.staticLayer, (Board.X_OFFSET, Board.Y_OFFSET))
+
+        # change color to highlight if targeted square
+        # and is a valid move
+        targetR, targetF = self.findTargetSquare()
+        if 0 <= targetR < 8 and 0 <= targetF < 8 and\
+                self.draggedMoves[targetR][targetF]:
+            pygame.draw.rect(surface,
+                             Board.HIGHLIGHT_COLOR,
+                             self.squareRect(targetR, targetF))
+            self.grid[targetR][targetF].drawOnSquare(surface, targetR, targetF)
+
+    def updateStaticLayer(self) -> None:
+        """
+        Rebuild the static layer if anything shown on it has changed since
+        it was last built.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        # the hash and ply count stand in for the contents of the grid
+        key = (self.hash, len(self.undoStack),
+               self.lastStartR, self.lastStartF, self.lastDestR, self.lastDestF,
+               self.draggedR, self.draggedF, self.promotionOriginalPosition,
+               self.book)
+        if key == self.staticLayerKey:
+            return
+        self.staticLayerKey = key
+
+        self.staticLayer.blit(self.boardLayer, (0, 0))
         for rank in range(8):
             for file in range(8):
-                # light vs. dark square colors
-                color = Board.LIGHT_SQUARE_COLOR if (rank+file) % 2 == 1\
-                    else Board.DARK_SQUARE_COLOR
-
+                # layer coordinates are relative to the board's corner
+                x = file * PieceSprite.SIZE
+                y = (7-rank) * PieceSprite.SIZE
                 if self.lastStartR is not None:
                     if rank == self.lastStartR and file == self.lastStartF or\
                             rank == self.lastDestR and file == self.lastDestF:
-                        color = Board.LAST_MOVE_COLOR
-
-                # change color to highlight if targeted square
-                # and is a valid move
-                if self.draggedR != -1 and self.draggedF != -1:
-                    mouseX, mouseY = pygame.mouse.get_pos()
-                    mouseX -= Board.X_OFFSET
-                    mouseY -= Board.Y_OFFSET
-                    targetR = 7 - floor(mouseY / Piece.SIZE)
-                    targetF = floor(mouseX / Piece.SIZE)
-                    valid = Board.findValidMoves(self.grid, self.draggedR, self.draggedF,
-                                                 self.castleShortRight, self.castleLongRight,
-                                                 self.blackKingCount)
-                    if rank == targetR and file == targetF and valid[rank][file]:
-                        color = Board.HIGHLIGHT_COLOR
-
-                # draw square
-                rect = pygame.Rect(Board.X_OFFSET + file * Piece.SIZE,
-                                   Board.Y_OFFSET + (7-rank) * Piece.SIZE,
-                                   Piece.SIZE,
-                                   Piece.SIZE)
-                pygame.draw.rect(surface,
-                                 color,
-                                 rect)
+                        pygame.draw.rect(self.staticLayer,
+                                         Board.LAST_MOVE_COLOR,
+                                         (x, y, PieceSprite.SIZE, PieceSprite.SIZE))
+
+                # draw piece (if not being dragged or promoted)
+                if (rank != self.draggedR or file != self.draggedF)\
+                        and (rank, file) != self.promotionOriginalPosition:
+                    self.grid[rank][file].draw(self.staticLayer,
+                                               x + PieceSprite.SIZE // 2,
+                                               y + PieceSprite.SIZE // 2)
+
+        # book hints would cover the move indicators and promotion menu
+        if self.book is not None and self.draggedR == -1\
+                and self.promotionOriginalPosition == (-1, -1):
+            self.drawBookHints(self.staticLayer)
+
+    def drawBookHints(self, surface: pygame.Surface) -> None:
+        """
+        Draw an arrow-like line for every book move of the current position,
+        thicker the more often it was played.
+
+        Parameters
+        ---
+        surface: pygame.Surface board-sized surface to draw on
+
+        Returns
+        ---
+        None
+        """
+        moves = self.book.findMoves(self.position, self.legalMoves)
+        if not moves:
+            return
+        mostGames = moves[0][1]
+        # draw the most played move last, so that it is on top
+        for (move, games, *_) in reversed(moves):
+            width = max(2, round(PieceSprite.SIZE / 9 * games / mostGames))
+            startR, startF = divmod(mr.moveStart(move), 8)
+            destR, destF = divmod(mr.moveDest(move), 8)
+            start = ((startF + 0.5) * PieceSprite.SIZE,
+                     (7 - startR + 0.5) * PieceSprite.SIZE)
+            dest = ((destF + 0.5) * PieceSprite.SIZE,
+                    (7 - destR + 0.5) * PieceSprite.SIZE)
+            pygame.draw.line(surface, Board.BOOK_HINT_COLOR, start, dest, width)
+            pygame.draw.circle(surface, Board.BOOK_HINT_COLOR, dest, width)
+
+    def renderEmptyBoard() -> pygame.Surface:
+        """
+        Returns a surface with the empty checkerboard drawn on it.
 
-                # draw piece (if not being dragged)
-                if rank != self.draggedR or file != self.draggedF:
-                    self.grid[rank][file].draw(surface)
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        pygame.Surface
+        """
+        layer = pygame.Surface((Board.SIZE, Board.SIZE))
+        for rank in range(8):
+            for file in range(8):
+                # light vs. dark square colors
+                color = Board.LIGHT_SQUARE_COLOR if (rank+file) % 2 == 1\
+                    else Board.DARK_SQUARE_COLOR
+                pygame.draw.rect(layer,
+                                 color,
+                                 (file * PieceSprite.SIZE,
+                                  (7-rank) * PieceSprite.SIZE,
+                                  PieceSprite.SIZE,
+                                  PieceSprite.SIZE))
+        return layer
 
     def drawMoving(self, surface: pygame.Surface) -> None:
         """
@@ -286,38 +366,139 @@ class Board:
         None
         """
         # draw valid move indicators
-        valid = Board.findValidMoves(self.grid, self.draggedR, self.draggedF,
-                                     self.castleShortRight, self.castleLongRight,
-                                     self.blackKingCount)
+        valid = self.draggedMoves
         for rank in range(8):
             for file in range(8):
                 # valid capture -> square outline
                 if valid is not None and (valid[rank][file] == mr.CAPTURE
                                           or valid[rank][file] == mr.PROMOTE_CAPTURE):
-                    rect = pygame.Rect(Board.X_OFFSET + file * Piece.SIZE,
+                    rect = pygame.Rect(Board.X_OFFSET + file * PieceSprite.SIZE,
                                        Board.Y_OFFSET +
-                                       (7-rank) * Piece.SIZE,
-                                       Piece.SIZE,
-                                       Piece.SIZE)
+                                       (7-rank) * PieceSprite.SIZE,
+                                       PieceSprite.SIZE,
+                                       PieceSprite.SIZE)
                     pygame.draw.rect(surface, Board.HIGHLIGHT_COLOR,
-                                     rect, width=Piece.SIZE // 12)
+                                     rect, width=PieceSprite.SIZE // 12)
                 # valid move -> dot
                 elif valid is not None and valid[rank][file] != mr.ILLEGAL:
-                    squareCenter = (int(Board.X_OFFSET + (file + 0.5) * Piece.SIZE),
-                                    int(Board.Y_OFFSET + (7 - rank + 0.5) * Piece.SIZE))
+                    squareCenter = (int(Board.X_OFFSET + (file + 0.5) * PieceSprite.SIZE),
+                                    int(Board.Y_OFFSET + (7 - rank + 0.5) * PieceSprite.SIZE))
 
                     # smooth the edge
                     for i in range(3):
                         gfxdraw.aacircle(surface, squareCenter[0], squareCenter[1],
-                                         int(Piece.SIZE / 6.5) - i, Board.HIGHLIGHT_COLOR)
+                                         int(PieceSprite.SIZE / 6.5) - i, Board.HIGHLIGHT_COLOR)
                     pygame.draw.circle(surface, Board.HIGHLIGHT_COLOR,
-                                       squareCenter, Piece.SIZE / 6.5)
+                                       squareCenter, PieceSprite.SIZE / 6.5)
 
         # draw dragged piece
         mouseX, mouseY = pygame.mouse.get_pos()
         self.grid[self.draggedR][self.draggedF].draw(surface,
                                                      mouseX, mouseY)
 
+    def squareRect(self, rank: int, file: int) -> pygame.Rect:
+        """
+        Returns the area of the window taken up by the given square.
+
+        Parameters
+        ---
+        rank: int
+        file: int
+
+        Returns
+        ---
+        pygame.Rect
+        """
+        return pygame.Rect(Board.X_OFFSET + file * PieceSprite.SIZE,
+                           Board.Y_OFFSET + (7-rank) * PieceSprite.SIZE,
+                           PieceSprite.SIZE,
+                           PieceSprite.SIZE)
+
+    def findTargetSquare(self) -> tuple[int, int]:
+        """
+        Returns the square under the mouse while a piece is being dragged.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        tuple[int, int]: (rank, file), (-1, -1) if no piece is being dragged
+        """
+        if self.draggedR == -1 or self.draggedF == -1:
+            return (-1, -1)
+        mouseX, mouseY = pygame.mouse.get_pos()
+        mouseX -= Board.X_OFFSET
+        mouseY -= Board.Y_OFFSET
+        return (7 - floor(mouseY / PieceSprite.SIZE),
+                floor(mouseX / PieceSprite.SIZE))
+
+    def markDirty(self, squares: list[tuple[int, int]]) -> None:
+        """
+        Record that the given squares have to be redrawn. Squares off the
+        board (such as an unset last move) are ignored.
+
+        Parameters
+        ---
+        squares: list[tuple[int, int]] (rank, file) of each square
+
+        Returns
+        ---
+        None
+        """
+        for (rank, file) in squares:
+            if rank is not None and 0 <= rank < 8 and 0 <= file < 8:
+                self.dirtyRects.append(self.squareRect(rank, file))
+
+    def takeDirtyRects(self) -> list[pygame.Rect]:
+        """
+        Returns the areas of the window that have changed since the last
+        call, and forgets them. Squares changed by moves are recorded as the
+        moves are made; changes to the dragged piece and the promotion menu
+        are found by comparing with their state as of the last call.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        list[pygame.Rect]
+        """
+        rects = self.dirtyRects
+        self.dirtyRects = []
+
+        dragged = (self.draggedR, self.draggedF)
+        target = self.findTargetSquare()
+        iconRect = None
+        if dragged != (-1, -1):
+            # dragged icon is centered on the mouse; pad for antialiasing
+            mouseX, mouseY = pygame.mouse.get_pos()
+            iconRect = pygame.Rect(mouseX - PieceSprite.SIZE // 2 - 1,
+                                   mouseY - PieceSprite.SIZE // 2 - 1,
+                                   PieceSprite.SIZE + 2, PieceSprite.SIZE + 2)
+        drawnDragged, drawnTarget, drawnIconRect = self.drawnDrag
+        promotion = (self.promoting, self.promotionFile)
+
+        # move indicators can be anywhere, so picking up or putting down a
+        # piece and opening or closing the promotion menu redraw the board
+        if dragged != drawnDragged or promotion != self.drawnPromotion\
+                or _ATTACK_DEBUG and rects:
+            rects.append(pygame.Rect(Board.X_OFFSET, Board.Y_OFFSET,
+                                     Board.SIZE, Board.SIZE))
+        if iconRect != drawnIconRect:
+            rects += [rect for rect in (drawnIconRect, iconRect)
+                      if rect is not None]
+        if target != drawnTarget:
+            self.markDirty([drawnTarget, target])
+            rects += self.dirtyRects
+            self.dirtyRects = []
+
+        self.drawnDrag = (dragged, target, iconRect)
+        self.drawnPromotion = promotion
+        return rects
+
     def mousePressed(self) -> None:
         """
         Handle mouse-press events. Manages movement of pieces and promotion.
@@ -334,8 +515,8 @@ class Board:
         mouseX -= Board.X_OFFSET
         mouseY -= Board.Y_OFFSET
 
-        self.draggedR = 7 - floor(mouseY / Piece.SIZE)
-        self.draggedF = floor(mouseX / Piece.SIZE)
+        self.draggedR = 7 - floor(mouseY / PieceSprite.SIZE)
+        self.draggedF = floor(mouseX / PieceSprite.SIZE)
 
         # out of bounds
         if self.draggedR < 0 or self.draggedR > 7\
@@ -348,84 +529,79 @@ class Board:
             # check for piece selection
             if self.draggedF == self.promotionFile and\
                     5 <= self.draggedR < 8:
-                # add piece at promotion square depending on menu choice
+                # promote to the piece chosen from the menu
                 match(self.draggedR):
                     case 7:
-                        self.grid[7][self.promotionFile] = Piece(
-                            Piece.QUEEN, 7, self.promotionFile)
+                        promotionId = Piece.QUEEN
                     case 6:
-                        self.grid[7][self.promotionFile] = Piece(
-                            Piece.KNIGHT, 7, self.promotionFile)
+                        promotionId = Piece.KNIGHT
                     case 5:
-                        self.grid[7][self.promotionFile] = Piece(
-                            Piece.ROOK, 7, self.promotionFile)
+                        promotionId = Piece.ROOK
                     case 4:
-                        self.grid[7][self.promotionFile] = Piece(
-                            Piece.BISHOP, 7, self.promotionFile)
+                        promotionId = Piece.BISHOP
+                r, f = self.promotionOriginalPosition
+                destF = self.promotionFile
                 self.promoting = Piece.EMPTY
                 self.promotionFile = -1
                 self.promotionOriginalPosition = (-1, -1)
                 # stop dragging; prevents minor highlight
                 # glitch when promoting to queen
                 self.draggedF = self.draggedR = -1
+                self.completeMove(r, f, 7, destF, promotionId)
                 return
             # if click on board otherwise, cancel promotion
             elif 0 <= self.draggedF < 8 and\
                     0 <= self.draggedR < 8:
-                # add back pawn
-                r, f = self.promotionOriginalPosition
-                self.grid[r][f] = Piece(Piece.PAWN, r, f)
+                # the pawn never left its square
                 self.promoting = Piece.EMPTY
                 self.promotionFile = -1
                 self.promotionOriginalPosition = (-1, -1)
                 # stop dragging; allows for normal new piece selection
                 self.draggedF = self.draggedR = -1
-                self.whiteToMove = not self.whiteToMove
         elif self.promoting == Piece.BLACK:
             # check for piece selection
             if self.draggedF == self.promotionFile and\
                     0 <= self.draggedR < (4 if self.blackKingCount == 2 else 5):
-                # add piece at promotion square depending on menu choice
+                # promote to the piece chosen from the menu
                 match(self.draggedR):
                     case 0:
-                        self.grid[0][self.promotionFile] = Piece(
-                            Piece.GENERAL, 0, self.promotionFile)
+                        promotionId = Piece.GENERAL
                     case 1:
-                        self.grid[0][self.promotionFile] = Piece(
-                            Piece.WARLORD, 0, self.promotionFile)
+                        promotionId = Piece.WARLORD
                     case 2:
-                        self.grid[0][self.promotionFile] = Piece(
-                            Piece.CAPTAIN, 0, self.promotionFile)
+                        promotionId = Piece.CAPTAIN
                     case 3:
-                        self.grid[0][self.promotionFile] = Piece(
-                            Piece.LIEUTENANT, 0, self.promotionFile)
+                        promotionId = Piece.LIEUTENANT
                     case 4:
-                        self.grid[0][self.promotionFile] = Piece(
-                            Piece.SKING, 0, self.promotionFile)
+                        promotionId = Piece.SKING
+                r, f = self.promotionOriginalPosition
+                destF = self.promotionFile
                 self.promoting = Piece.EMPTY
                 self.promotionFile = -1
                 self.promotionOriginalPosition = (-1, -1)
                 # stop dragging; prevents minor highlight
                 # glitch when promoting to queen
                 self.draggedF = self.draggedR = -1
+                self.completeMove(r, f, 0, destF, promotionId)
                 return
             # if click on board otherwise, cancel promotion
             elif 0 <= self.draggedF < 8 and\
                     0 <= self.draggedR < 8:
-                # add back pawn
-                r, f = self.promotionOriginalPosition
-                self.grid[r][f] = Piece(Piece.HOPLITE, r, f)
+                # the hoplite never left its square
                 self.promoting = Piece.EMPTY
                 self.promotionFile = -1
                 self.promotionOriginalPosition = (-1, -1)
                 # stop dragging; allows for normal new piece selection
                 self.draggedF = self.draggedR = -1
-                self.whiteToMove = not self.whiteToMove
 
         else:  # self.promoting == Piece.EMPTY (normal moves)
             if (self.grid[self.draggedR][self.draggedF].pieceColor == Piece.WHITE)\
                     != self.whiteToMove:
                 self.draggedR = self.draggedF = -1
+            else:
+                # the position can't change while the piece is held
+                self.draggedMoves = self.findLegalMoves(self.draggedR,
+                                                        self.draggedF)
 
     def mouseReleased(self) -> None:
         """
@@ -442,8 +618,8 @@ class Board:
         mouseX, mouseY = pygame.mouse.get_pos()
         mouseX -= Board.X_OFFSET
         mouseY -= Board.Y_OFFSET
-        targetR = 7 - floor(mouseY / Piece.SIZE)
-        targetF = floor(mouseX / Piece.SIZE)
+        targetR = 7 - floor(mouseY / PieceSprite.SIZE)
+        targetF = floor(mouseX / PieceSprite.SIZE)
 
         # no piece selected
         if self.draggedR == -1 or self.draggedF == -1:
@@ -484,97 +660,21 @@ class Board:
         ---
         None
         """
-        moveCode = Board.checkValidMove(self.grid, startR, startF, destR, destF,
-                                        self.whiteToMove, self.castleShortRight,
-                                        self.castleLongRight, self.blackKingCount)
+        if (startR, startF) == (self.draggedR, self.draggedF):
+            moveCode = self.draggedMoves[destR][destF]
+        else:
+            moveCode = self.findLegalMoves(startR, startF)[destR][destF]
         match moveCode:
             case mr.ILLEGAL:
                 Board.errorSound.play()
                 return
-            case mr.MOVE:
-                # update castling rights
-                if (startR, startF) == (0, 4):
-                    # king has moved
-                    self.castleLongRight = self.castleShortRight = False
-                if (startR, startF) == (0, 0) or (destR, destF) == (0, 0):
-                    # rook has moved or has been captured
-                    self.castleLongRight = False
-                if (startR, startF) == (0, 7) or (destR, destF) == (0, 7):
-                    # rook has moved or has been captured
-                    self.castleShortRight = False
-
+            case mr.MOVE | mr.CASTLE:
                 # play sound effect
                 Board.moveSound.play()
-
-                # update board
-                self.grid[destR][destF] = self.grid[startR][startF]
-                self.grid[destR][destF].pieceRank = destR
-                self.grid[destR][destF].pieceFile = destF
-                self.grid[startR][startF] = Piece(Piece.EMPTY,
-                                                  startR,
-                                                  startF)
             case mr.CAPTURE:
-                # communicate the captured piece so that the UI can update
-                pygame.event.post(pygame.event.Event(
-                    Board.CAPTURE_EVENT, pieceType=self.grid[destR][destF].pieceId))
-
-                # update castling rights
-                if (startR, startF) == (0, 4):
-                    # king has moved
-                    self.castleLongRight = self.castleShortRight = False
-                if (startR, startF) == (0, 0) or (destR, destF) == (0, 0):
-                    # rook has moved or has been captured
-                    self.castleLongRight = False
-                if (startR, startF) == (0, 7) or (destR, destF) == (0, 7):
-                    # rook has moved or has been captured
-                    self.castleShortRight = False
-
-                # update Spartan king count if one is captured
-                if self.grid[destR][destF].pieceId == Piece.SKING:
-                    self.blackKingCount -= 1
-
                 # play sound effect
                 Board.captureSound.play()
-
-                # update board
-                self.grid[destR][destF] = self.grid[startR][startF]
-                self.grid[destR][destF].pieceRank = destR
-                self.grid[destR][destF].pieceFile = destF
-                self.grid[startR][startF] = Piece(Piece.EMPTY,
-                                                  startR,
-                                                  startF)
-            case mr.CASTLE:
-                # play sound effect
-                Board.moveSound.play()
-
-                # castle short
-                if destF in (6, 7):
-                    # move king
-                    self.grid[0][6] = self.grid[0][4]
-                    self.grid[0][6].pieceFile = 6
-                    # clear old king
-                    self.grid[0][4] = Piece(Piece.EMPTY, 0, 4)
-                    # move rook
-                    self.grid[0][5] = self.grid[0][7]
-                    self.grid[0][5].pieceFile = 5
-                    # clear old rook
-                    self.grid[0][7] = Piece(Piece.EMPTY, 0, 7)
-                # castle long
-                else:
-                    # move king
-                    self.grid[0][2] = self.grid[0][4]
-                    self.grid[0][2].pieceFile = 2
-                    # clear old king
-                    self.grid[0][4] = Piece(Piece.EMPTY, 0, 4)
-                    # move rook
-                    self.grid[0][3] = self.grid[0][0]
-                    self.grid[0][3].pieceFile = 3
-                    # clear old rook
-                    self.grid[0][0] = Piece(Piece.EMPTY, 0, 0)
-                pass
-            case mr.PROMOTE:
-                # delete pawn
-                self.grid[startR][startF] = Piece(Piece.EMPTY, startR, startF)
+            case mr.PROMOTE | mr.PROMOTE_CAPTURE:
                 # promote pawn
                 if destR == 7:
                     self.promoting = Piece.WHITE
@@ -585,209 +685,177 @@ class Board:
                 self.promotionOriginalPosition = (startR, startF)
 
                 # play sound effect
-                Board.moveSound.play()
-            case mr.PROMOTE_CAPTURE:
-                # delete pawn
-                self.grid[startR][startF] = Piece(Piece.EMPTY, startR, startF)
-                # promote pawn
-                if destR == 7:
-                    self.promoting = Piece.WHITE
-                # promote hoplite
+                if moveCode == mr.PROMOTE:
+                    Board.moveSound.play()
                 else:
-                    self.promoting = Piece.BLACK
-                self.promotionFile = destF
-                self.promotionOriginalPosition = (startR, startF)
+                    Board.captureSound.play()
+                # the move is made once a piece is chosen from the menu
+                return
 
-                # play sound effect
-                Board.captureSound.play()
+        self.completeMove(startR, startF, destR, destF)
 
-        self.lastStartR = startR
-        self.lastStartF = startF
-        self.lastDestR = destR
-        self.lastDestF = destF
-
-        # switch who is to move
-        self.whiteToMove = not self.whiteToMove
-        pygame.event.post(pygame.event.Event(Board.MOVED_EVENT))
+    def playMove(self, move: int) -> None:
+        """
+        Play a legal move that didn't come from the mouse, e.g. the engine's.
 
-        # check for game end condition
-        gameOverState = self.checkGameOver()
-        match gameOverState:
-            case Board.ONGOING:
-                return
-            case Board.CHECKMATE:
-                if self.whiteToMove:
-                    pygame.event.post(pygame.event.Event(
-                        Board.WHITE_CHECKMATE_EVENT))
-                else:
-                    pygame.event.post(pygame.event.Event(
-                        Board.BLACK_CHECKMATE_EVENT))
-            case Board.STALEMATE:
-                pygame.event.post(pygame.event.Event(Board.STALEMATE_EVENT))
-        self.gameEndSound.play()
+        Parameters
+        ---
+        move: int encoded move
 
-    def checkGameOver(self) -> int:
+        Returns
+        ---
+        None
         """
-        Checks for game-ending conditions.
+        # play sound effect
+        if mr.moveCode(move) in (mr.CAPTURE, mr.PROMOTE_CAPTURE):
+            Board.captureSound.play()
+        else:
+            Board.moveSound.play()
+        startR, startF = divmod(mr.moveStart(move), 8)
+        destR, destF = divmod(mr.moveDest(move), 8)
+        self.completeMove(startR, startF, destR, destF,
+                          mr.movePromotion(move) or Piece.EMPTY)
+
+    def completeMove(self, startR: int, startF: int, destR: int, destF: int,
+                     promotionId: int = Piece.EMPTY) -> None:
+        """
+        Make a legal move, announce it, and check whether it ended the game.
 
         Parameters
         ---
-        (no parameters)
+        startR: int rank of piece to move
+        startF: int file of piece to move
+        destR: int rank of square to move to
+        destF: int file of square to move to
+        promotionId: int = Piece.EMPTY piece chosen when promoting
 
         Returns
         ---
-        int: 0 if game not over, 1 if checkmate, 2 if stalemate
-        """
-        # check all possible moves
-        for rank0 in range(8):
-            for file0 in range(8):
-                if self.grid[rank0][file0].pieceColor == Piece.WHITE and not self.whiteToMove\
-                        or self.grid[rank0][file0].pieceColor == Piece.BLACK and self.whiteToMove:
-                    continue
-                for rank1 in range(8):
-                    for file1 in range(8):
-                        if Board.checkValidMove(self.grid, rank0, file0, rank1, file1,
-                                                self.whiteToMove, self.castleShortRight,
-                                                self.castleLongRight, self.blackKingCount):
-                            return 0
-        # no valid moves, see if checkmate or stalemate
-        if self.whiteToMove:
-            attackedMatrix = mr.findAttackedSquares(self.grid, False)
-            for rank in range(8):
-                for file in range(8):
-                    if self.grid[rank][file].pieceId == Piece.PKING and\
-                            attackedMatrix[rank, file]:
-                        return 1
-        else:
-            attackedMatrix = mr.findAttackedSquares(self.grid, True)
-            numInCheck = 0
-            for rank in range(8):
-                for file in range(8):
-                    if self.grid[rank][file].pieceId == Piece.SKING and\
-                            attackedMatrix[rank, file]:
-                        numInCheck += 1
-            if numInCheck == self.blackKingCount:
-                return 1
+        None
+        """
+        captured = self.grid[destR][destF]
+        if captured.pieceColor not in (Piece.EMPTY,
+                                       self.grid[startR][startF].pieceColor):
+            # communicate the captured piece so that the UI can update
+            pygame.event.post(pygame.event.Event(
+                Board.CAPTURE_EVENT, pieceType=captured.pieceId))
+
+        self.makeMove(self.findMove(startR, startF, destR, destF, promotionId))
+        pygame.event.post(pygame.event.Event(Board.MOVED_EVENT))
 
-        # not in check and no valid moves, stalemate
-        return 2
+        # check for game end condition
+        self.announceGameOver()
 
-    def checkValidMove(grid: list[list[Piece]], startR: int, startF: int,
-                       destR: int, destF: int, whiteToMove: bool,
-                       castleShort: bool, castleLong: bool, blackKingCount: int) -> int:
+    def makeMove(self, move: int) -> None:
         """
-        Checks if a given move is legal and returns a code specifying move type.
+        Play a legal move (encoded as in moverules), keeping the grid in sync
+        with the position. Everything needed to take it back is pushed onto
+        the undo stack.
 
         Parameters
         ---
-        grid: list[list[Piece]] matrix representing the board state
-        startR: int starting rank of piece
-        startF: int starting file of piece
-        destR: int destination rank of piece
-        destF: int destination file of piece
-        whiteToMove: bool
-        castleShort: bool whether White retains short castling rights
-        castleLong: bool whether White retains long castling rights
-        blackKingCount: int number of Spartan kings left
+        move: int encoded move
 
         Returns
         ---
-        int: the corresponding move code inside the module moverules. 0: illegal,
-        1: move, 2: capture, 3: castle, 4: promotion, 5: promotion capture
-        """
-        # Make sure piece is correct color
-        if grid[startR][startF].pieceColor == Piece.WHITE and not whiteToMove or\
-                grid[startR][startF].pieceColor == Piece.BLACK and whiteToMove:
-            return mr.ILLEGAL
-        # Make sure we aren't moving into check
-        gridCopy = Board.copyGrid(grid)
-        gridCopy[destR][destF] = gridCopy[startR][startF]
-        gridCopy[destR][destF].pieceRank = destR
-        gridCopy[destR][destF].pieceFile = destF
-        gridCopy[startR][startF] = Piece(Piece.EMPTY,
-                                         startR,
-                                         startF)
-        attackedMatrix = mr.findAttackedSquares(gridCopy, not whiteToMove)
-        if whiteToMove:
-            for rank in range(8):
-                for file in range(8):
-                    if gridCopy[rank][file].pieceId == Piece.PKING and\
-                            attackedMatrix[rank, file]:
-                        return mr.ILLEGAL
+        None
+        """
+        startR, startF = divmod(mr.moveStart(move), 8)
+        destR, destF = divmod(mr.moveDest(move), 8)
+        moved = self.grid[startR][startF]
+        self.undoStack.append((move, moved, self.grid[destR][destF],
+                               (self.promoting, self.promotionFile,
+                                self.promotionOriginalPosition),
+                               (self.lastStartR, self.lastStartF,
+                                self.lastDestR, self.lastDestF)))
+
+        # update board
+        if mr.movePromotion(move):
+            self.grid[destR][destF] = PieceSprite(mr.movePromotion(move))
         else:
-            numInCheck = 0
-            for rank in range(8):
-                for file in range(8):
-                    if gridCopy[rank][file].pieceId == Piece.SKING and\
-                            attackedMatrix[rank, file]:
-                        numInCheck += 1
-            if numInCheck == blackKingCount:
-                return mr.ILLEGAL
+            self.grid[destR][destF] = moved
+        self.grid[startR][startF] = PieceSprite(Piece.EMPTY)
+        changed = [(startR, startF), (destR, destF)]
+        if mr.moveCode(move) == mr.CASTLE:
+            rookF, rookDestF = (7, 5) if destF == 6 else (0, 3)
+            self.grid[0][rookDestF] = self.grid[0][rookF]
+            self.grid[0][rookF] = PieceSprite(Piece.EMPTY)
+            changed += [(0, rookF), (0, rookDestF)]
+        self.markDirty(changed + [(self.lastStartR, self.lastStartF),
+                                  (self.lastDestR, self.lastDestF)])
+        if self.book is not None:
+            # book hints can be anywhere
+            self.dirtyRects.append(pygame.Rect(Board.X_OFFSET, Board.Y_OFFSET,
+                                               Board.SIZE, Board.SIZE))
+
+        self.lastStartR = startR
+        self.lastStartF = startF
+        self.lastDestR = destR
+        self.lastDestF = destF
 
-        # check if destination square is in the matrix of possible moves
-        return Board.findValidMoves(grid, startR, startF,
-                                    castleShort, castleLong,
-                                    blackKingCount)[destR][destF]
+        super().makeMove(move)
 
-    def copyGrid(grid: list[list[Piece]]) -> list[list[Piece]]:
+    def unmakeMove(self) -> None:
         """
-        Returns a copy of the given board state.
+        Take back the last move made with makeMove.
 
         Parameters
         ---
-        grid: list[list[Piece]]
+        (no parameters)
 
         Returns
         ---
-        list[list[Piece]]
+        None
         """
-        return [[Piece(grid[rank][file].pieceId, rank, file)
-                 for file in range(8)] for rank in range(8)]
-
-    def findValidMoves(grid: list[list[Piece]], rank: int, file: int,
-                       castleShort: bool, castleLong: bool,
-                       numSpartanKings: int) -> list[list[int]]:
+        (move, moved, captured,
+         (self.promoting, self.promotionFile, self.promotionOriginalPosition),
+         (self.lastStartR, self.lastStartF, self.lastDestR, self.lastDestF))\
+            = self.undoStack.pop()
+        # the previous move is highlighted again
+        self.markDirty([(self.lastStartR, self.lastStartF),
+                        (self.lastDestR, self.lastDestF)])
+        startR, startF = divmod(mr.moveStart(move), 8)
+        destR, destF = divmod(mr.moveDest(move), 8)
+
+        self.grid[startR][startF] = moved
+        self.grid[destR][destF] = captured
+        changed = [(startR, startF), (destR, destF)]
+        # put the castled rook back
+        if mr.moveCode(move) == mr.CASTLE:
+            rookF, rookDestF = (7, 5) if destF == 6 else (0, 3)
+            self.grid[0][rookF] = self.grid[0][rookDestF]
+            self.grid[0][rookDestF] = PieceSprite(Piece.EMPTY)
+            changed += [(0, rookF), (0, rookDestF)]
+        self.markDirty(changed)
+        if self.book is not None:
+            self.dirtyRects.append(pygame.Rect(Board.X_OFFSET, Board.Y_OFFSET,
+                                               Board.SIZE, Board.SIZE))
+
+        super().unmakeMove()
+
+    def announceGameOver(self) -> None:
         """
-        Find all legal moves for the given board and piece to move.
+        Check for game end conditions and post the matching event.
 
         Parameters
         ---
-        grid: list[list[Piece]] board state
-        rank: int
-        file: int
-        castleShort: bool whether White retains short castle rights
-        castleLong: bool whether White retains long castle rights
+        (no parameters)
 
         Returns
         ---
-        list[list[int]]: matrix of possible moves
-        """
-        match grid[rank][file].pieceId:
-            case Piece.PAWN:
-                return mr.findPawnMoves(grid, rank, file)
-            case Piece.KNIGHT:
-                return mr.findKnightMoves(grid, rank, file)
-            case Piece.BISHOP:
-                return mr.findBishopMoves(grid, rank, file)
-            case Piece.ROOK:
-                return mr.findRookMoves(grid, rank, file)
-            case Piece.QUEEN:
-                return mr.findQueenMoves(grid, rank, file)
-            case Piece.PKING:
-                return mr.findPersianKingMoves(grid, rank, file, castleShort, castleLong)
-
-            case Piece.HOPLITE:
-                return mr.findHopliteMoves(grid, rank, file)
-            case Piece.LIEUTENANT:
-                return mr.findLieutenantMoves(grid, rank, file)
-            case Piece.CAPTAIN:
-                return mr.findCaptainMoves(grid, rank, file)
-            case Piece.GENERAL:
-                return mr.findGeneralMoves(grid, rank, file)
-            case Piece.WARLORD:
-                return mr.findWarlordMoves(grid, rank, file)
-            case Piece.SKING:
-                return mr.findSpartanKingMoves(grid, rank, file, numSpartanKings)
-
-        # empty square, obviously no legal ways to move
-        return [[mr.ILLEGAL]*8 for _ in range(8)]
+        None
+        """
+        gameOverState = self.checkGameOver()
+        match gameOverState:
+            case Board.ONGOING:
+                return
+            case Board.CHECKMATE:
+                if self.whiteToMove:
+                    pygame.event.post(pygame.event.Event(
+                        Board.WHITE_CHECKMATE_EVENT))
+                else:
+                    pygame.event.post(pygame.event.Event(
+                        Board.BLACK_CHECKMATE_EVENT))
+            case Board.STALEMATE:
+                pygame.event.post(pygame.event.Event(Board.STALEMATE_EVENT))
+        self.gameEndSound.play()
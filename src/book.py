@@ -0,0 +1,352 @@
+#!usr/bin/env python3
+"""Opening books for SpartanChess: how often each move was played in each
+position of a corpus of games, and how those games ended.
+
+A book is a binary file of fixed-size entries sorted by position hash (see
+zobrist), then by move, so that the moves of a position are found with a
+binary search over the memory-mapped file without reading the rest of it.
+In little-endian byte order, the file is a header (MAGIC, the format
+version, the number of plies of each game that were counted, and the
+number of entries) followed by the entries: position hash, packed move (see
+gamefile), 2 reserved bytes, then the number of games the move was played
+in and how many of them the side that played it won, drew and lost.
+
+Usage (from the src directory):
+    python book.py book.bin --build games.scg games.txt games.pgn
+    python book.py book.bin --moves e2e4 d7c6"""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import argparse
+import mmap
+import random
+import struct
+import sys
+from typing import BinaryIO, Iterator, Sequence
+
+# INTERNAL IMPORTS
+from gamefile import GameFile
+from position import Position
+import fen
+import gamefile
+import moverules as mr
+import pgn
+import replay
+
+MAGIC: bytes = b"SCOB"
+VERSION: int = 1
+HEADER: struct.Struct = struct.Struct("<4sHHQ")
+"""magic, version, plies counted, entry count"""
+ENTRY: struct.Struct = struct.Struct("<QHHIIII")
+"""position hash, packed move, reserved, games, wins, draws, losses"""
+KEY: struct.Struct = struct.Struct("<Q")
+
+DEFAULT_PLIES: int = 20
+DEFAULT_MIN_GAMES: int = 2
+
+WHITE_WIN_RESULTS: dict[str, bool] = {"1-0": True, "0-1": False}
+"""whether White won, for decisive results"""
+
+
+class OpeningBook:
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    file: BinaryIO
+    map: mmap.mmap
+    plies: int
+    """plies of each game that were counted when the book was built"""
+    entryCount: int
+    chooser: random.Random
+    """picks among the book moves of a position"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, path: str, seed: int = None) -> None:
+        """
+        Constructor. Maps the book into memory; nothing is read until a
+        position is looked up.
+
+        Parameters
+        ---
+        path: str
+        seed: int = None seed for choosing moves, None to seed randomly
+
+        Returns
+        ---
+        None
+
+        Raises
+        ---
+        ValueError if the file is not an opening book of this version
+        """
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            self.file.close()
+            raise ValueError(f"{path} is not an opening book")
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+        magic, version, self.plies, self.entryCount = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION\
+                or HEADER.size + self.entryCount * ENTRY.size > len(self.map):
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self.chooser = random.Random(seed)
+
+    ###########
+    # METHODS #
+    ###########
+    def lookup(self, key: int) -> list[tuple[int, int, int, int, int]]:
+        """
+        Returns the book entries of a position, found by binary search.
+
+        Parameters
+        ---
+        key: int position hash
+
+        Returns
+        ---
+        list[tuple[int, int, int, int, int]]: (packed move, games, wins,
+        draws, losses) for every move in the book, in move order
+        """
+        # find the first entry whose hash is not less than the key
+        low = 0
+        high = self.entryCount
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self.map, HEADER.size + middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        offset = HEADER.size + low * ENTRY.size
+        end = HEADER.size + self.entryCount * ENTRY.size
+        while offset < end:
+            entryKey, packed, _, games, wins, draws, losses\
+                = ENTRY.unpack_from(self.map, offset)
+            if entryKey != key:
+                break
+            entries.append((packed, games, wins, draws, losses))
+            offset += ENTRY.size
+        return entries
+
+    def findMoves(self, position: Position,
+                  legalMoves: list[int] = None) -> list[tuple[int, int, int, int, int]]:
+        """
+        Returns the book moves of a position that are legal in it (which
+        also guards against hash collisions).
+
+        Parameters
+        ---
+        position: Position
+        legalMoves: list[int] = None legal moves of the position, if known
+
+        Returns
+        ---
+        list[tuple[int, int, int, int, int]]: (encoded move, games, wins,
+        draws, losses) for every book move, most played first
+        """
+        entries = self.lookup(position.hash)
+        if not entries:
+            return []
+        if legalMoves is None:
+            legalMoves = mr.generateLegalMoves(position)
+        byPacked = {gamefile.packMove(move): move for move in legalMoves}
+        moves = [(byPacked[entry[0]],) + entry[1:] for entry in entries
+                 if entry[0] in byPacked]
+        moves.sort(key=lambda entry: entry[1], reverse=True)
+        return moves
+
+    def chooseMove(self, position: Position, legalMoves: list[int] = None) -> int:
+        """
+        Pick a book move, at random in proportion to how often each was
+        played.
+
+        Parameters
+        ---
+        position: Position
+        legalMoves: list[int] = None legal moves of the position, if known
+
+        Returns
+        ---
+        int: the encoded move, None if the position is not in the book
+        """
+        moves = self.findMoves(position, legalMoves)
+        if not moves:
+            return None
+        return self.chooser.choices([entry[0] for entry in moves],
+                                    [entry[1] for entry in moves])[0]
+
+    def close(self) -> None:
+        """
+        Unmap and close the book.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        if hasattr(self, "map") and not self.map.closed:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *excInfo) -> None:
+        self.close()
+
+
+def readCorpus(path: str) -> Iterator[tuple[Sequence[int], str]]:
+    """
+    Read the games of a game file, text archive (see replay) or PGN file.
+    PGN games that don't start from the starting position, or can't be
+    played through, are skipped.
+
+    Parameters
+    ---
+    path: str
+
+    Returns
+    ---
+    Iterator[tuple[Sequence[int], str]]: (packed moves, result or None) for
+    every game
+    """
+    if GameFile.isGameFile(path):
+        with GameFile(path) as games:
+            for (result, moves) in games:
+                yield (moves, result)
+                moves.release()
+    elif path.lower().endswith(".pgn"):
+        with open(path, encoding="utf-8") as file:
+            for (tags, sanMoves, result) in pgn.readGames(file):
+                if "FEN" in tags:
+                    continue
+                try:
+                    moves = pgn.decodeMoves(tags, sanMoves)[1]
+                except ValueError:
+                    continue
+                yield ([gamefile.packMove(move) for move in moves],
+                       None if result == "*" else result)
+    else:
+        for (_, line) in replay.readGames(path):
+            texts = line.split()
+            result = None
+            if texts and texts[-1] in replay.RESULTS:
+                result = texts.pop()
+            yield ([gamefile.parseCoordinates(text) for text in texts], result)
+
+
+def buildBook(paths: list[str], outputPath: str, plies: int = DEFAULT_PLIES,
+              minGames: int = DEFAULT_MIN_GAMES) -> int:
+    """
+    Count the opening moves of a corpus of games and write them as a book.
+    Each game is counted up to its first illegal move, if any.
+
+    Parameters
+    ---
+    paths: list[str] game files, text archives or PGN files
+    outputPath: str book file to write
+    plies: int = DEFAULT_PLIES plies of each game to count
+    minGames: int = DEFAULT_MIN_GAMES moves played in fewer games are left out
+
+    Returns
+    ---
+    int: number of entries written
+    """
+    # [games, wins, draws, losses] by (position hash, packed move)
+    counts = {}
+    for path in paths:
+        for (packedMoves, result) in readCorpus(path):
+            position = Position.startingPosition()
+            for packed in packedMoves[:plies]:
+                move = None if packed is None\
+                    else gamefile.findPackedMove(position, packed)
+                if move is None:
+                    break
+                stats = counts.setdefault((position.hash, packed), [0, 0, 0, 0])
+                stats[0] += 1
+                if result == "1/2-1/2":
+                    stats[2] += 1
+                elif result in WHITE_WIN_RESULTS:
+                    won = WHITE_WIN_RESULTS[result] == position.whiteToMove
+                    stats[1 if won else 3] += 1
+                position.makeMove(move)
+
+    entries = sorted((key, packed, *stats) for ((key, packed), stats)
+                     in counts.items() if stats[0] >= minGames)
+    with open(outputPath, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, plies, len(entries)))
+        for (key, packed, games, wins, draws, losses) in entries:
+            file.write(ENTRY.pack(key, packed, 0, games, wins, draws, losses))
+    return len(entries)
+
+
+def main() -> None:
+    """
+    Command-line entry point: build a book, or show the book moves of a
+    position.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Build or look up a SpartanChess opening book.")
+    parser.add_argument("path", help="book file")
+    parser.add_argument("--build", nargs="+", metavar="GAMES",
+                        help="build the book from these game files, text "
+                        "archives or PGN files")
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES,
+                        help="plies of each game to count (default %(default)s)")
+    parser.add_argument("--min-games", type=int, default=DEFAULT_MIN_GAMES,
+                        help="leave out moves played in fewer games (default %(default)s)")
+    parser.add_argument("--moves", nargs="*", default=[], metavar="MOVE",
+                        help="moves in coordinate notation played from the "
+                        "--fen position before looking it up")
+    parser.add_argument("--fen", default=fen.STARTING_FEN,
+                        help="position to look up (default: the starting position)")
+    args = parser.parse_args()
+
+    if args.build is not None:
+        entries = buildBook(args.build, args.path, args.plies, args.min_games)
+        print(f"{entries} entries written to {args.path}")
+        return
+
+    try:
+        position = fen.positionFromFen(args.fen)
+    except ValueError as error:
+        parser.error(str(error))
+    for text in args.moves:
+        move = mr.findMove(position, text)
+        if move is None:
+            sys.exit(f"illegal move: {text}")
+        position.makeMove(move)
+
+    with OpeningBook(args.path) as book:
+        legalMoves = mr.generateLegalMoves(position)
+        moves = book.findMoves(position, legalMoves)
+        if not moves:
+            print("position not in book")
+        for (move, games, wins, draws, losses) in moves:
+            print(f"{mr.moveToSan(position, move, legalMoves):<8} {games:>7} games  "
+                  f"+{wins} ={draws} -{losses}")
+
+
+if __name__ == "__main__":
+    main()
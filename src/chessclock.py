@@ -0,0 +1,265 @@
+#!usr/bin/env python3
+"""A chess clock for SpartanChess. Time left is worked out from
+time.monotonic_ns timestamps taken when each turn starts, so the clock stays
+accurate however often (or rarely) the window is redrawn. Low time and time
+outs are announced with one-shot pygame timer events."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import time
+import pygame
+
+
+class ChessClock:
+    #############
+    # CONSTANTS #
+    #############
+    WHITE_TIME_OUT_EVENT: int = pygame.USEREVENT + 2
+    BLACK_TIME_OUT_EVENT: int = pygame.USEREVENT + 3
+    LOW_TIME_EVENT: int = pygame.USEREVENT + 4
+    """posted once per side when its time gets low; event.white says whose"""
+
+    NS_PER_SECOND: int = 1_000_000_000
+    NS_PER_TICK: int = 10_000_000
+    """ticks are hundredths of a second, as shown on the clocks"""
+    LOW_TIME: int = 30 * NS_PER_SECOND
+
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    # per-side lists are indexed by whether the side is White: [Black, White]
+    timeLeft: list[int]
+    """time left in ns as of the start of the current turn"""
+    lowTimeWarned: list[bool]
+
+    increment: int
+    """ns added to the mover's clock after every move"""
+    delay: int
+    """ns at the start of every turn that are not taken off the clock"""
+
+    running: bool
+    whiteToMove: bool
+    turnStart: int
+    """time.monotonic_ns() when the current turn started"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, minutes: float = 10, increment: float = 0,
+                 delay: float = 0) -> None:
+        """
+        Constructor. The clock starts stopped, with White to move.
+
+        Parameters
+        ---
+        minutes: float = 10 starting time for each side
+        increment: float = 0 seconds added after every move (Fischer)
+        delay: float = 0 seconds at the start of every turn before the clock
+        starts counting down (simple delay)
+
+        Returns
+        ---
+        None
+        """
+        start = round(minutes * 60 * ChessClock.NS_PER_SECOND)
+        self.timeLeft = [start, start]
+        self.lowTimeWarned = [False, False]
+        self.increment = round(increment * ChessClock.NS_PER_SECOND)
+        self.delay = round(delay * ChessClock.NS_PER_SECOND)
+        self.running = False
+        self.whiteToMove = True
+        self.turnStart = 0
+
+    ###########
+    # METHODS #
+    ###########
+    def start(self, whiteToMove: bool) -> None:
+        """
+        Start the given side's clock.
+
+        Parameters
+        ---
+        whiteToMove: bool
+
+        Returns
+        ---
+        None
+        """
+        self.whiteToMove = whiteToMove
+        self.turnStart = time.monotonic_ns()
+        self.running = True
+        self.schedule()
+
+    def press(self) -> None:
+        """
+        End the current turn: charge the mover for the time used, add the
+        increment, and start the opponent's clock. Does nothing if the clock
+        isn't running.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        if not self.running:
+            return
+        now = time.monotonic_ns()
+        left = self.findTimeLeft(self.whiteToMove, now)
+        if left == 0:
+            # the flag fell before its timer event was handled; the clock
+            # keeps running until the event is confirmed
+            pygame.event.post(pygame.event.Event(
+                ChessClock.WHITE_TIME_OUT_EVENT if self.whiteToMove
+                else ChessClock.BLACK_TIME_OUT_EVENT))
+            return
+        self.timeLeft[self.whiteToMove] = left + self.increment
+        self.whiteToMove = not self.whiteToMove
+        self.turnStart = now
+        self.schedule()
+
+    def stop(self) -> None:
+        """
+        Stop the clock, charging the mover for the time used so far.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        if self.running:
+            self.timeLeft[self.whiteToMove] = self.findTimeLeft(self.whiteToMove)
+            self.running = False
+        self.cancelTimers()
+
+    def findTimeLeft(self, white: bool, now: int = None) -> int:
+        """
+        Returns the time left on one side's clock.
+
+        Parameters
+        ---
+        white: bool whether to read White's clock
+        now: int = None time.monotonic_ns() to read the clock at, now if None
+
+        Returns
+        ---
+        int: time left in ns, never negative
+        """
+        if not self.running or white != self.whiteToMove:
+            return self.timeLeft[white]
+        if now is None:
+            now = time.monotonic_ns()
+        used = max(0, now - self.turnStart - self.delay)
+        return max(0, self.timeLeft[white] - used)
+
+    def ticksLeft(self, white: bool) -> int:
+        """
+        Returns the time left on one side's clock in hundredths of a second.
+
+        Parameters
+        ---
+        white: bool whether to read White's clock
+
+        Returns
+        ---
+        int
+        """
+        return self.findTimeLeft(white) // ChessClock.NS_PER_TICK
+
+    def schedule(self) -> None:
+        """
+        Set one-shot timers for the mover's low time warning and time out.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.cancelTimers()
+        if not self.running:
+            return
+        white = self.whiteToMove
+        # time until the flag falls, counting the delay still to come
+        now = time.monotonic_ns()
+        pending = max(0, self.turnStart + self.delay - now)
+        untilTimeOut = pending + self.findTimeLeft(white, now)
+        pygame.time.set_timer(ChessClock.WHITE_TIME_OUT_EVENT if white
+                              else ChessClock.BLACK_TIME_OUT_EVENT,
+                              ChessClock.toTimerMillis(untilTimeOut), loops=1)
+        if not self.lowTimeWarned[white]:
+            pygame.time.set_timer(
+                pygame.event.Event(ChessClock.LOW_TIME_EVENT, white=white),
+                ChessClock.toTimerMillis(untilTimeOut - ChessClock.LOW_TIME),
+                loops=1)
+
+    def cancelTimers(self) -> None:
+        """
+        Cancel any pending timer events.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        for event in (ChessClock.WHITE_TIME_OUT_EVENT,
+                      ChessClock.BLACK_TIME_OUT_EVENT,
+                      ChessClock.LOW_TIME_EVENT):
+            pygame.time.set_timer(event, 0)
+
+    def confirm(self, event: pygame.event.Event) -> bool:
+        """
+        Check a timer event against the clock itself, since timers can fire
+        a little early and events can be handled late. Time outs that are
+        confirmed stop the clock; early ones are rescheduled.
+
+        Parameters
+        ---
+        event: pygame.event.Event one of the clock's events
+
+        Returns
+        ---
+        bool: whether the event should be acted on
+        """
+        if event.type == ChessClock.LOW_TIME_EVENT:
+            if self.lowTimeWarned[event.white]\
+                    or self.findTimeLeft(event.white) > ChessClock.LOW_TIME:
+                return False
+            self.lowTimeWarned[event.white] = True
+            return True
+
+        white = event.type == ChessClock.WHITE_TIME_OUT_EVENT
+        if not self.running or white != self.whiteToMove:
+            # already handled, or the side moved in time
+            return False
+        if self.findTimeLeft(white) > 0:
+            self.schedule()
+            return False
+        self.stop()
+        return True
+
+    def toTimerMillis(ns: int) -> int:
+        """
+        Returns a timer delay that is no earlier than the given time.
+
+        Parameters
+        ---
+        ns: int
+
+        Returns
+        ---
+        int: milliseconds, at least 1 (pygame timers need a positive delay)
+        """
+        return max(1, -(-ns // 1_000_000))
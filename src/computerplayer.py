@@ -0,0 +1,142 @@
+#!usr/bin/env python3
+"""Runs the engine in a worker process so that the window keeps drawing and
+the clocks keep ticking while the computer thinks. Chosen moves come back
+as pygame events."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import multiprocessing
+import threading
+import pygame
+
+# INTERNAL IMPORTS
+from position import Position
+import engine
+
+
+class ComputerPlayer:
+    #############
+    # CONSTANTS #
+    #############
+    ENGINE_MOVE_EVENT: int = pygame.USEREVENT + 20
+    """posted with the chosen move (encoded as in moverules) as event.move"""
+
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    connection: "multiprocessing.connection.Connection"
+    stopFlag: "multiprocessing.Event"
+    worker: multiprocessing.Process
+    listener: threading.Thread
+
+    searchId: int
+    """id of the latest search started"""
+    cancelledId: int
+    """results of searches up to this id are dropped"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, tableSizeMB: float = 16, bookPath: str = None) -> None:
+        """
+        Constructor. Starts the worker process.
+
+        Parameters
+        ---
+        tableSizeMB: float = 16 size of the engine's transposition table
+        bookPath: str = None opening book for the engine to play from, if any
+
+        Returns
+        ---
+        None
+        """
+        self.connection, workerConnection = multiprocessing.Pipe()
+        self.stopFlag = multiprocessing.Event()
+        self.worker = multiprocessing.Process(
+            target=engine.runWorker,
+            args=(workerConnection, self.stopFlag, tableSizeMB, bookPath),
+            daemon=True)
+        self.worker.start()
+        self.searchId = self.cancelledId = 0
+        # waits for results so that the main loop never blocks on the pipe
+        self.listener = threading.Thread(target=self.listen, daemon=True)
+        self.listener.start()
+
+    ###########
+    # METHODS #
+    ###########
+    def startSearch(self, position: Position, ticksLeft: int) -> None:
+        """
+        Start looking for a move in the background. ENGINE_MOVE_EVENT is
+        posted once it is found, unless the search is cancelled first.
+
+        Parameters
+        ---
+        position: Position to move in; copied, so it may change afterwards
+        ticksLeft: int time left on the mover's clock, in hundredths of a second
+
+        Returns
+        ---
+        None
+        """
+        position = position.copy()
+        # the engine never takes back moves made before the search
+        position.undoStack = []
+        self.stopFlag.clear()
+        self.searchId += 1
+        self.connection.send((self.searchId, position, ticksLeft))
+
+    def cancel(self) -> None:
+        """
+        Stop the current search, if any, and drop its result.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.cancelledId = self.searchId
+        self.stopFlag.set()
+
+    def listen(self) -> None:
+        """
+        Post every search result that hasn't been cancelled. Runs on the
+        listener thread until the worker exits.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        while True:
+            try:
+                searchId, move = self.connection.recv()
+            except EOFError:
+                return
+            if searchId > self.cancelledId and move is not None:
+                pygame.event.post(pygame.event.Event(
+                    ComputerPlayer.ENGINE_MOVE_EVENT, move=move))
+
+    def close(self) -> None:
+        """
+        Cancel any search and shut down the worker process.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.cancel()
+        self.connection.send(None)
+        self.worker.join(timeout=1)
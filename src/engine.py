@@ -0,0 +1,619 @@
+#!usr/bin/env python3
+"""A SpartanChess engine: iterative-deepening alpha-beta search with a
+transposition table, move ordering and quiescence search on captures.
+
+It searches bitboard positions with the same move generator as the board,
+so it follows the same asymmetric rules: the Spartans may ignore check while
+they have two kings, lose to duple-check, and may only promote to a king
+once one has been taken.
+
+Given an opening book (see book), it plays book moves without searching.
+
+Usage (from the src directory):
+    python engine.py --time 5
+    python engine.py --time 2 --moves e2e4 d7c6
+    python engine.py --book book.bin"""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import argparse
+import sys
+from time import perf_counter
+
+# INTERNAL IMPORTS
+from book import OpeningBook
+from piece import Piece
+from position import Position
+from transposition import TranspositionTable
+import fen
+import moverules as mr
+
+#############
+# CONSTANTS #
+#############
+MATE_SCORE: int = 100000
+"""score of being checkmated right now; mates further away score less"""
+INFINITY: int = MATE_SCORE + 1
+MAX_PLY: int = 128
+
+PIECE_VALUES: list[int] = [0] * 16
+"""material value of each piece id, in centipawns"""
+PIECE_VALUES[Piece.PAWN] = 100
+PIECE_VALUES[Piece.KNIGHT] = 300
+PIECE_VALUES[Piece.BISHOP] = 325
+PIECE_VALUES[Piece.ROOK] = 500
+PIECE_VALUES[Piece.QUEEN] = 900
+PIECE_VALUES[Piece.HOPLITE] = 100
+PIECE_VALUES[Piece.LIEUTENANT] = 300
+PIECE_VALUES[Piece.CAPTAIN] = 300
+PIECE_VALUES[Piece.GENERAL] = 650
+PIECE_VALUES[Piece.WARLORD] = 650
+# a second Spartan king is what gives the Spartans their check immunity
+PIECE_VALUES[Piece.SKING] = 300
+
+# positional bonuses by square, from White's point of view
+CENTER_BONUS: list[int] = [int(6 - abs(3.5 - square % 8) - abs(3.5 - square // 8)) * 4
+                           for square in range(64)]
+PAWN_BONUS: list[int] = [(square // 8 - 1) * 8 if 8 <= square < 56 else 0
+                         for square in range(64)]
+HOPLITE_BONUS: list[int] = [(6 - square // 8) * 8 if 8 <= square < 56 else 0
+                            for square in range(64)]
+CENTRALIZED_IDS: tuple[int] = (Piece.KNIGHT, Piece.BISHOP, Piece.LIEUTENANT,
+                               Piece.CAPTAIN, Piece.WARLORD)
+
+MOVES_TO_GO: int = 30
+"""number of moves the remaining clock time is shared between"""
+MIN_THINK_TIME: float = 0.05
+
+
+class Engine:
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    table: TranspositionTable
+    nodes: int
+    deadline: float
+    stopped: bool
+    stopFlag: "multiprocessing.Event"
+    """set from another process to stop the search, None if unused"""
+    killers: list[list[int]]
+    """two quiet moves per ply that caused a cutoff"""
+    history: list[int]
+    """cutoff score of every quiet (start, dest) pair, indexed start * 64 + dest"""
+    book: OpeningBook
+    """book moves are played without searching; None if there is no book"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, tableSizeMB: float = 16, stopFlag=None,
+                 book: OpeningBook = None) -> None:
+        """
+        Constructor.
+
+        Parameters
+        ---
+        tableSizeMB: float = 16 size of the transposition table
+        stopFlag: multiprocessing.Event = None when set, a running search
+        returns as soon as possible with the best move found so far
+        book: OpeningBook = None opening book to play from, if any
+
+        Returns
+        ---
+        None
+        """
+        self.table = TranspositionTable(tableSizeMB)
+        self.nodes = 0
+        self.deadline = 0
+        self.stopped = False
+        self.stopFlag = stopFlag
+        self.book = book
+
+    ###########
+    # METHODS #
+    ###########
+    def timeForMove(ticksLeft: int) -> float:
+        """
+        Decide how long to think given the mover's clock.
+
+        Parameters
+        ---
+        ticksLeft: int time left on the mover's clock, in hundredths of a
+        second (as in ChessClock.ticksLeft)
+
+        Returns
+        ---
+        float: seconds to search for
+        """
+        secondsLeft = ticksLeft / 100
+        return min(max(MIN_THINK_TIME, secondsLeft / MOVES_TO_GO), secondsLeft / 2)
+
+    def think(self, position: Position, ticksLeft: int) -> int:
+        """
+        Pick a move within the time budget for the mover's clock: a book
+        move if there is one, the result of a search otherwise.
+
+        Parameters
+        ---
+        position: Position to move in; restored before returning
+        ticksLeft: int time left on the mover's clock, in hundredths of a second
+
+        Returns
+        ---
+        int: the encoded move, None if there are no legal moves
+        """
+        if self.book is not None:
+            move = self.book.chooseMove(position)
+            if move is not None:
+                return move
+        return self.search(position, Engine.timeForMove(ticksLeft))[0]
+
+    def stop(self) -> None:
+        """
+        Make a running search return as soon as possible with the best move
+        found so far. Safe to call from another thread.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.stopped = True
+
+    def search(self, position: Position, timeLimit: float,
+               maxDepth: int = MAX_PLY - 1, onIteration=None) -> tuple[int, int, int]:
+        """
+        Search a position with iterative deepening until the time is up.
+
+        Parameters
+        ---
+        position: Position to search; restored before returning
+        timeLimit: float seconds to search for
+        maxDepth: int = MAX_PLY - 1 deepest iteration to run
+        onIteration: function(depth, score, move, nodes) = None called after
+        each completed iteration
+
+        Returns
+        ---
+        tuple[int, int, int]: (best move, score for the mover, depth reached);
+        the move is None if there are no legal moves
+        """
+        startTime = perf_counter()
+        self.deadline = startTime + timeLimit
+        self.stopped = False
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [0] * 4096
+        self.table.resetCounters()
+
+        rootMoves = mr.generateLegalMoves(position)
+        if not rootMoves:
+            return None, -MATE_SCORE if mr.isInCheck(position) else 0, 0
+        bestMove, bestScore, depthReached = rootMoves[0], 0, 0
+        for depth in range(1, maxDepth + 1):
+            # search the best move of the last iteration first
+            rootMoves.remove(bestMove)
+            rootMoves.insert(0, bestMove)
+            move, score = self.searchRoot(position, rootMoves, depth)
+            if self.stopped and depthReached > 0:
+                break
+            bestMove, bestScore, depthReached = move, score, depth
+            if onIteration is not None:
+                onIteration(depth, score, move, self.nodes)
+            # a forced mate won't change with more depth, and a new iteration
+            # that can't finish in time is wasted
+            if abs(score) >= MATE_SCORE - MAX_PLY or len(rootMoves) == 1\
+                    or perf_counter() - startTime > timeLimit / 2:
+                break
+        return bestMove, bestScore, depthReached
+
+    def searchRoot(self, position: Position, moves: list[int],
+                   depth: int) -> tuple[int, int]:
+        """
+        Search every root move to the given depth.
+
+        Parameters
+        ---
+        position: Position
+        moves: list[int] legal moves, best first
+        depth: int
+
+        Returns
+        ---
+        tuple[int, int]: (best move, its score)
+        """
+        alpha = -INFINITY
+        bestMove = moves[0]
+        for move in moves:
+            position.makeMove(move)
+            score = -self.alphaBeta(position, depth - 1, -INFINITY, -alpha, 1)
+            position.unmakeMove()
+            if self.stopped:
+                break
+            if score > alpha:
+                alpha = score
+                bestMove = move
+        if not self.stopped:
+            self.table.store(position.hash, bestMove, alpha, depth,
+                             TranspositionTable.EXACT)
+        return bestMove, alpha
+
+    def alphaBeta(self, position: Position, depth: int,
+                  alpha: int, beta: int, ply: int) -> int:
+        """
+        Negamax alpha-beta search.
+
+        Parameters
+        ---
+        position: Position
+        depth: int remaining depth
+        alpha: int lower bound on the score
+        beta: int upper bound on the score
+        ply: int distance from the root
+
+        Returns
+        ---
+        int: score for the side to move
+        """
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self.quiesce(position, alpha, beta, ply)
+        self.checkTime()
+        if self.stopped:
+            return 0
+
+        alphaOriginal = alpha
+        tableMove = 0
+        entry = self.table.probe(position.hash)
+        if entry is not None:
+            tableMove, score, entryDepth, flag = entry
+            if entryDepth >= depth:
+                score = scoreFromTable(score, ply)
+                if flag == TranspositionTable.EXACT\
+                        or flag == TranspositionTable.LOWER_BOUND and score >= beta\
+                        or flag == TranspositionTable.UPPER_BOUND and score <= alpha:
+                    return score
+
+        moves = mr.generatePseudoLegalMoves(position)
+        self.orderMoves(position, moves, tableMove, ply)
+        # king safety is worked out once for the node, not for every move
+        destinations = mr.findLegalDestinations(position)
+        bestScore = -INFINITY
+        bestMove = 0
+        for move in moves:
+            if not mr.isLegalMove(position, move, destinations):
+                continue
+            position.makeMove(move)
+            score = -self.alphaBeta(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmakeMove()
+            if self.stopped:
+                return 0
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.recordCutoff(move, depth, ply)
+                        break
+
+        # no legal moves: checkmate or stalemate
+        if bestMove == 0:
+            return -MATE_SCORE + ply if mr.isInCheck(position) else 0
+
+        if bestScore <= alphaOriginal:
+            flag = TranspositionTable.UPPER_BOUND
+        elif bestScore >= beta:
+            flag = TranspositionTable.LOWER_BOUND
+        else:
+            flag = TranspositionTable.EXACT
+        self.table.store(position.hash, bestMove, scoreToTable(bestScore, ply),
+                         depth, flag)
+        return bestScore
+
+    def quiesce(self, position: Position, alpha: int, beta: int, ply: int) -> int:
+        """
+        Search captures and promotions only, until the position is quiet. When
+        the side to move is in check every legal move is searched instead, so
+        that checkmate (and duple-check and mate) at the horizon is scored as
+        mate rather than by evaluate.
+
+        Parameters
+        ---
+        position: Position
+        alpha: int lower bound on the score
+        beta: int upper bound on the score
+        ply: int distance from the root
+
+        Returns
+        ---
+        int: score for the side to move
+        """
+        self.checkTime()
+        if self.stopped:
+            return 0
+        if ply >= MAX_PLY - 1:
+            return evaluate(position)
+
+        # in check there is no standing pat: search every evasion
+        inCheck = mr.isInCheck(position)
+        if inCheck:
+            moves = mr.generateLegalMoves(position)
+            if not moves:
+                return -MATE_SCORE + ply
+        else:
+            standPat = evaluate(position)
+            if standPat >= beta:
+                return standPat
+            if standPat > alpha:
+                alpha = standPat
+            moves = [move for move in mr.generatePseudoLegalMoves(position)
+                     if move >> 12 & 7 in (mr.CAPTURE, mr.PROMOTE, mr.PROMOTE_CAPTURE)]
+        self.orderMoves(position, moves, 0, ply)
+        for move in moves:
+            if not inCheck and not mr.isLegalMove(position, move):
+                continue
+            position.makeMove(move)
+            score = -self.quiesce(position, -beta, -alpha, ply + 1)
+            position.unmakeMove()
+            if self.stopped:
+                return 0
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def orderMoves(self, position: Position, moves: list[int],
+                   tableMove: int, ply: int) -> None:
+        """
+        Sort moves so that the likeliest best ones are searched first: the
+        transposition table move, then captures and promotions (most valuable
+        victim, least valuable attacker), then killer moves, then quiet moves
+        by history.
+
+        Parameters
+        ---
+        position: Position
+        moves: list[int] sorted in place
+        tableMove: int move stored for this position, 0 if none
+        ply: int distance from the root
+
+        Returns
+        ---
+        None
+        """
+        squares = position.squares
+        killers = self.killers[ply]
+        history = self.history
+
+        def orderKey(move: int) -> int:
+            if move == tableMove:
+                return -3000000
+            if move >> 12 & 7 in (mr.CAPTURE, mr.PROMOTE, mr.PROMOTE_CAPTURE):
+                victim = squares[move >> 6 & 63]
+                gain = (PIECE_VALUES[victim] if victim != Piece.EMPTY else 0)\
+                    + PIECE_VALUES[move >> 15]
+                return -2000000 - gain * 16 + PIECE_VALUES[squares[move & 63]] // 100
+            if move == killers[0] or move == killers[1]:
+                return -1000000
+            return -history[move & 4095]
+
+        moves.sort(key=orderKey)
+
+    def recordCutoff(self, move: int, depth: int, ply: int) -> None:
+        """
+        Remember a quiet move that caused a beta cutoff, for move ordering.
+
+        Parameters
+        ---
+        move: int
+        depth: int remaining depth of the cutoff
+        ply: int distance from the root
+
+        Returns
+        ---
+        None
+        """
+        if move >> 12 & 7 not in (mr.MOVE, mr.CASTLE):
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move & 4095] += depth * depth
+
+    def checkTime(self) -> None:
+        """
+        Count a node and stop the search once the deadline has passed.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.nodes += 1
+        # looking at the clock is slow, so only do it every 1024 nodes
+        if self.nodes & 1023 == 0 and (perf_counter() > self.deadline or
+                                       self.stopFlag is not None and self.stopFlag.is_set()):
+            self.stopped = True
+
+
+def evaluate(position: Position) -> int:
+    """
+    Static evaluation: material plus small bonuses for centralized minor
+    pieces and advanced pawns and hoplites.
+
+    Parameters
+    ---
+    position: Position
+
+    Returns
+    ---
+    int: score in centipawns for the side to move
+    """
+    bitboards = position.bitboards
+    score = 0
+    for id in Position.WHITE_IDS:
+        score += PIECE_VALUES[id] * bitboards[id].bit_count()
+    for id in Position.BLACK_IDS:
+        score -= PIECE_VALUES[id] * bitboards[id].bit_count()
+
+    for id in CENTRALIZED_IDS:
+        bits = bitboards[id]
+        sign = 1 if id < 10 else -1
+        while bits:
+            low = bits & -bits
+            score += sign * CENTER_BONUS[low.bit_length() - 1]
+            bits ^= low
+    for id, bonus, sign in ((Piece.PAWN, PAWN_BONUS, 1),
+                            (Piece.HOPLITE, HOPLITE_BONUS, -1)):
+        bits = bitboards[id]
+        while bits:
+            low = bits & -bits
+            score += sign * bonus[low.bit_length() - 1]
+            bits ^= low
+
+    return score if position.whiteToMove else -score
+
+
+def scoreToTable(score: int, ply: int) -> int:
+    """
+    Convert a mate score from distance-to-root to distance-to-this-node for
+    storing in the transposition table. Other scores are unchanged.
+
+    Parameters
+    ---
+    score: int
+    ply: int distance from the root
+
+    Returns
+    ---
+    int
+    """
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def scoreFromTable(score: int, ply: int) -> int:
+    """
+    Inverse of scoreToTable.
+
+    Parameters
+    ---
+    score: int
+    ply: int distance from the root
+
+    Returns
+    ---
+    int
+    """
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def runWorker(connection: "multiprocessing.connection.Connection",
+              stopFlag: "multiprocessing.Event", tableSizeMB: float,
+              bookPath: str = None) -> None:
+    """
+    Serve search requests in a worker process until told to quit. Every
+    request is (search id, position, ticks left on the mover's clock) and
+    is answered with (search id, encoded move or None). None quits.
+
+    Parameters
+    ---
+    connection: multiprocessing.connection.Connection to the UI process
+    stopFlag: multiprocessing.Event set to cut the current search short
+    tableSizeMB: float size of the transposition table
+    bookPath: str = None opening book to play from, if any; opened in the
+    worker, since memory maps can't be sent between processes
+
+    Returns
+    ---
+    None
+    """
+    book = None if bookPath is None else OpeningBook(bookPath)
+    engine = Engine(tableSizeMB, stopFlag, book)
+    while True:
+        request = connection.recv()
+        if request is None:
+            return
+        searchId, position, ticksLeft = request
+        connection.send((searchId, engine.think(position, ticksLeft)))
+
+
+def main() -> None:
+    """
+    Command-line entry point: search one position and print each iteration.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Search a SpartanChess position for the best move.")
+    parser.add_argument("--time", type=float, default=5, help="seconds to search")
+    parser.add_argument("--moves", nargs="*", default=[], metavar="MOVE",
+                        help="moves in coordinate notation played from the "
+                        "--fen position first")
+    parser.add_argument("--fen", default=fen.STARTING_FEN,
+                        help="position to start from (default: the starting position)")
+    parser.add_argument("--hash", type=float, default=16,
+                        help="transposition table size in MB")
+    parser.add_argument("--book", metavar="PATH",
+                        help="opening book; its moves for the position are listed first")
+    args = parser.parse_args()
+
+    try:
+        position = fen.positionFromFen(args.fen)
+    except ValueError as error:
+        parser.error(str(error))
+    for text in args.moves:
+        move = mr.findMove(position, text)
+        if move is None:
+            sys.exit(f"illegal move: {text}")
+        position.makeMove(move)
+
+    if args.book is not None:
+        with OpeningBook(args.book) as book:
+            for (move, games, wins, draws, losses) in book.findMoves(position):
+                print(f"book {mr.moveToCoordinates(move)}  {games} games  "
+                      f"+{wins} ={draws} -{losses}")
+
+    engine = Engine(args.hash)
+    startTime = perf_counter()
+
+    def report(depth: int, score: int, move: int, nodes: int) -> None:
+        elapsed = perf_counter() - startTime
+        print(f"depth {depth:>2}  score {score:>7}  nodes {nodes:>9}  "
+              f"{nodes / max(elapsed, 1e-9):>7.0f} nodes/s  {mr.moveToCoordinates(move)}")
+
+    move, score, depth = engine.search(position, args.time, onIteration=report)
+    if move is None:
+        print("no legal moves")
+    else:
+        print(f"bestmove {mr.moveToCoordinates(move)}")
+        table = engine.table
+        print(f"table: {table.hits} hits, {table.misses} misses, "
+              f"{table.collisions} collisions, {table.fill():.1%} full")
+
+
+if __name__ == "__main__":
+    main()
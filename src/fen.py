@@ -0,0 +1,154 @@
+#!usr/bin/env python3
+"""FEN-style text notation for SpartanChess positions, e.g. the starting
+position:
+
+    lgkcckwl/hhhhhhhh/8/8/8/8/PPPPPPPP/RNBQKBNR w KQ 0 1
+
+Fields are separated by spaces:
+    * piece placement from rank 8 down to rank 1, files a to h; Persian
+      (White) pieces are the upper case PNBRQK, Spartan (Black) pieces the
+      lower case h (hoplite), l, c, g, w and k; digits count empty squares
+    * side to move, w or b
+    * Persian castling rights, any of K (short) and Q (long), or -
+    * halfmove clock: plies since the last capture or pawn/hoplite move
+    * fullmove number, starting at 1 and going up after every Black move
+The two counters may be left out, in which case they are 0 and 1. There is
+no en passant field, since there is no en passant."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# INTERNAL IMPORTS
+from piece import Piece
+from position import Position
+import zobrist
+
+STARTING_FEN: str = "lgkcckwl/hhhhhhhh/8/8/8/8/PPPPPPPP/RNBQKBNR w KQ 0 1"
+
+PIECE_LETTERS: dict[int, str] = {Piece.PAWN: "P", Piece.KNIGHT: "N",
+                                 Piece.BISHOP: "B", Piece.ROOK: "R",
+                                 Piece.QUEEN: "Q", Piece.PKING: "K",
+                                 Piece.HOPLITE: "h", Piece.LIEUTENANT: "l",
+                                 Piece.CAPTAIN: "c", Piece.GENERAL: "g",
+                                 Piece.WARLORD: "w", Piece.SKING: "k"}
+LETTER_IDS: dict[str, int] = {letter: id for (id, letter) in PIECE_LETTERS.items()}
+
+# letter for every id, so that writing a rank is one list lookup per
+# square; Piece.EMPTY (-1) indexes the extra None at the end
+_SQUARE_LETTERS: list[str] = [None] * 17
+for (_id, _letter) in PIECE_LETTERS.items():
+    _SQUARE_LETTERS[_id] = _letter
+
+
+def positionToFen(position: Position) -> str:
+    """
+    Write a position in FEN-style notation.
+
+    Parameters
+    ---
+    position: Position
+
+    Returns
+    ---
+    str
+    """
+    squares = position.squares
+    ranks = []
+    for start in range(56, -8, -8):
+        text = ""
+        empty = 0
+        for id in squares[start:start + 8]:
+            letter = _SQUARE_LETTERS[id]
+            if letter is None:
+                empty += 1
+            else:
+                if empty:
+                    text += "12345678"[empty - 1]
+                    empty = 0
+                text += letter
+        if empty:
+            text += "12345678"[empty - 1]
+        ranks.append(text)
+
+    castling = ("K" if position.castleShortRight else "")\
+        + ("Q" if position.castleLongRight else "")
+    return f"{'/'.join(ranks)} {'w' if position.whiteToMove else 'b'} "\
+        f"{castling or '-'} {position.halfmoveClock} {position.fullmoveNumber}"
+
+
+def positionFromFen(text: str) -> Position:
+    """
+    Read a position written in FEN-style notation.
+
+    Parameters
+    ---
+    text: str
+
+    Returns
+    ---
+    Position
+
+    Raises
+    ---
+    ValueError if the text is not a valid position
+    """
+    fields = text.split()
+    if len(fields) != 3 and len(fields) != 5:
+        raise ValueError(f"expected 3 or 5 fields: {text!r}")
+    ranks = fields[0].split("/")
+    if len(ranks) != 8:
+        raise ValueError(f"expected 8 ranks: {fields[0]!r}")
+
+    position = Position()
+    squares = position.squares
+    bitboards = position.bitboards
+    for (i, rankText) in enumerate(ranks):
+        square = (7 - i) * 8
+        end = square + 8
+        for char in rankText:
+            if "1" <= char <= "8":
+                square += ord(char) - ord("0")
+                continue
+            id = LETTER_IDS.get(char)
+            if id is None:
+                raise ValueError(f"unknown piece letter {char!r}")
+            if square >= end:
+                raise ValueError(f"rank {8 - i} has more than 8 squares: {rankText!r}")
+            squares[square] = id
+            bitboards[id] |= 1 << square
+            square += 1
+        if square != end:
+            raise ValueError(f"rank {8 - i} does not have 8 squares: {rankText!r}")
+    if bitboards[Piece.PKING].bit_count() != 1:
+        raise ValueError(f"expected one Persian king: {fields[0]!r}")
+    if not 1 <= bitboards[Piece.SKING].bit_count() <= 2:
+        raise ValueError(f"expected one or two Spartan kings: {fields[0]!r}")
+    for id in Position.WHITE_IDS:
+        position.whiteOccupancy |= bitboards[id]
+    for id in Position.BLACK_IDS:
+        position.blackOccupancy |= bitboards[id]
+
+    if fields[1] != "w" and fields[1] != "b":
+        raise ValueError(f"side to move must be w or b: {fields[1]!r}")
+    position.whiteToMove = fields[1] == "w"
+
+    castling = fields[2]
+    if castling not in ("-", "K", "Q", "KQ"):
+        raise ValueError(f"castling rights must be K, Q, KQ or -: {castling!r}")
+    position.castleShortRight = "K" in castling
+    position.castleLongRight = "Q" in castling
+    # castling moves the king from e1 and the rook from h1 or a1
+    if castling != "-" and squares[4] != Piece.PKING\
+            or position.castleShortRight and squares[7] != Piece.ROOK\
+            or position.castleLongRight and squares[0] != Piece.ROOK:
+        raise ValueError(f"castling rights {castling} without king and rook in place")
+
+    if len(fields) == 5:
+        if not fields[3].isdigit() or not fields[4].isdigit()\
+                or int(fields[4]) < 1:
+            raise ValueError(f"bad move counters: {fields[3]!r} {fields[4]!r}")
+        position.halfmoveClock = int(fields[3])
+        position.fullmoveNumber = int(fields[4])
+
+    position.hash = zobrist.hashPosition(position)
+    return position
@@ -0,0 +1,202 @@
+#!usr/bin/env python3
+"""The rules of a SpartanChess game without any graphics: position, legal
+moves, making and taking back moves, and game-over detection. Importing this
+module does not need pygame."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# INTERNAL IMPORTS
+from piece import Piece
+from position import Position
+import moverules as mr
+
+
+class Game:
+    #############
+    # CONSTANTS #
+    #############
+    ONGOING: int = 0
+    CHECKMATE: int = 1
+    STALEMATE: int = 2
+
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    position: Position
+    legalMoves: list[int]  # encoded as in moverules
+    sanMoves: list[str]
+    """every move made, in algebraic notation"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, position: Position = None) -> None:
+        """
+        Constructor.
+
+        Parameters
+        ---
+        position: Position = None position to start from; the standard
+        starting position if None
+
+        Returns
+        ---
+        None
+        """
+        if position is None:
+            position = Position.startingPosition()
+        self.position = position
+        self.sanMoves = []
+        self.updateLegalMoves()
+
+    ###########
+    # METHODS #
+    ###########
+    @property
+    def whiteToMove(self) -> bool:
+        """whether White is to move"""
+        return self.position.whiteToMove
+
+    @property
+    def castleShortRight(self) -> bool:
+        """whether White retains short castling rights"""
+        return self.position.castleShortRight
+
+    @property
+    def castleLongRight(self) -> bool:
+        """whether White retains long castling rights"""
+        return self.position.castleLongRight
+
+    @property
+    def blackKingCount(self) -> int:
+        """number of Spartan kings left on the board"""
+        return self.position.blackKingCount
+
+    @property
+    def hash(self) -> int:
+        """Zobrist hash of the current position"""
+        return self.position.hash
+
+    def makeMove(self, move: int) -> None:
+        """
+        Play a legal move (encoded as in moverules), record it and list the
+        replies.
+
+        Parameters
+        ---
+        move: int encoded move
+
+        Returns
+        ---
+        None
+        """
+        self.sanMoves.append(mr.moveToSan(self.position, move, self.legalMoves))
+        self.position.makeMove(move)
+        self.updateLegalMoves()
+
+    def unmakeMove(self) -> None:
+        """
+        Take back the last move made with makeMove.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.position.unmakeMove()
+        self.sanMoves.pop()
+        self.updateLegalMoves()
+
+    def updateLegalMoves(self) -> None:
+        """
+        List the legal moves of the side to move. Must be called whenever the
+        position changes other than through makeMove/unmakeMove.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.legalMoves = mr.generateLegalMoves(self.position)
+
+    def findMove(self, startR: int, startF: int, destR: int, destF: int,
+                 promotionId: int = Piece.EMPTY) -> int:
+        """
+        Find the legal move between the given squares.
+
+        Parameters
+        ---
+        startR: int rank of piece to move
+        startF: int file of piece to move
+        destR: int rank of square to move to
+        destF: int file of square to move to; castling may be given either
+        as the king's destination or the rook's square
+        promotionId: int = Piece.EMPTY piece to promote to, if promoting
+
+        Returns
+        ---
+        int: the encoded move, None if there is no such legal move
+        """
+        start = startR * 8 + startF
+        dest = destR * 8 + destF
+        # castling is stored as the king's move
+        if self.position.squares[start] == Piece.PKING and abs(destF - startF) >= 2:
+            dest = 6 if destF > startF else 2
+        promotion = 0 if promotionId == Piece.EMPTY else promotionId
+        for move in self.legalMoves:
+            if move & 0xFFF == start | dest << 6 and move >> 15 == promotion:
+                return move
+        return None
+
+    def findLegalMoves(self, rank: int, file: int) -> list[list[int]]:
+        """
+        Find all legal moves of the piece at the given rank and file.
+
+        Parameters
+        ---
+        rank: int
+        file: int
+
+        Returns
+        ---
+        list[list[int]]: matrix of move codes; castling is marked on both the
+        king's destination and the rook's square
+        """
+        validMatrix = [[mr.ILLEGAL]*8 for _ in range(8)]
+        start = rank * 8 + file
+        for move in self.legalMoves:
+            if mr.moveStart(move) == start:
+                destR, destF = divmod(mr.moveDest(move), 8)
+                validMatrix[destR][destF] = mr.moveCode(move)
+                if mr.moveCode(move) == mr.CASTLE:
+                    validMatrix[0][7 if destF == 6 else 0] = mr.CASTLE
+        return validMatrix
+
+    def checkGameOver(self) -> int:
+        """
+        Checks for game-ending conditions.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        int: 0 if game not over, 1 if checkmate, 2 if stalemate
+        """
+        if self.legalMoves:
+            return Game.ONGOING
+        # no valid moves, see if checkmate or stalemate; for the Spartans
+        # this is duple-check, or check on the last king
+        if mr.isInCheck(self.position):
+            return Game.CHECKMATE
+
+        # not in check and no valid moves, stalemate
+        return Game.STALEMATE
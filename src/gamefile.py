@@ -0,0 +1,386 @@
+#!usr/bin/env python3
+"""A compact binary format for archives of SpartanChess games, read through
+a memory map so that any game can be reached without reading the ones
+before it.
+
+Every move takes 2 bytes: start square | dest square << 6 | promotion piece
+id << 12, the promotion id being 0 if the move doesn't promote (see
+moverules.encodeMove, which this drops the move code from). A file is, in
+little-endian byte order:
+    * a header: MAGIC, the format version, a reserved 2 bytes, the number
+      of games and the byte offset of the index
+    * the games, one after the other: a 2-byte result code (the index of
+      the result in RESULTS, NO_RESULT if none was recorded) followed by
+      the moves
+    * the index: the byte offset of every game, then of the end of the
+      last game, as 8-byte ints
+
+Usage (from the src directory):
+    python gamefile.py games.scg
+    python gamefile.py games.scg --game 41"""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Iterable, Iterator
+
+# INTERNAL IMPORTS
+from position import Position
+import moverules as mr
+
+MAGIC: bytes = b"SCGF"
+VERSION: int = 1
+HEADER: struct.Struct = struct.Struct("<4sHHQQ")
+"""magic, version, reserved, game count, index offset"""
+
+RESULTS: tuple[str] = ("1-0", "0-1", "1/2-1/2", "*")
+NO_RESULT: int = 0xFFFF
+
+FILES: str = "abcdefgh"
+RANKS: str = "12345678"
+PROMOTION_IDS: dict[str, int] = {letter: id for (id, letter)
+                                 in mr.PROMOTION_LETTERS.items()}
+
+# memoryview casts use the machine's byte order
+_SWAP_BYTES: bool = sys.byteorder != "little"
+
+
+def packMove(move: int) -> int:
+    """
+    Pack an encoded move into 2 bytes.
+
+    Parameters
+    ---
+    move: int encoded move
+
+    Returns
+    ---
+    int: start | dest << 6 | promotion << 12
+    """
+    return move & 0xFFF | move >> 15 << 12
+
+
+def unpackMove(packed: int) -> int:
+    """
+    Turn a packed move back into an encoded move, without its move code
+    (which depends on the position).
+
+    Parameters
+    ---
+    packed: int
+
+    Returns
+    ---
+    int: start | dest << 6 | promotion << 15
+    """
+    return packed & 0xFFF | packed >> 12 << 15
+
+
+def findPackedMove(position: Position, packed: int) -> int:
+    """
+    Find the legal move matching a packed move.
+
+    Parameters
+    ---
+    position: Position
+    packed: int
+
+    Returns
+    ---
+    int: the encoded move, None if no legal move matches
+    """
+    # only the matching move is checked for legality, which is much
+    # faster than listing every legal move
+    for move in mr.generatePseudoLegalMoves(position):
+        if move & 0xFFF | move >> 15 << 12 == packed:
+            return move if mr.isLegalMove(position, move) else None
+    return None
+
+
+def parseCoordinates(text: str) -> int:
+    """
+    Read a move in coordinate notation without looking at any position.
+
+    Parameters
+    ---
+    text: str e.g. "e2e4" or "b2a1g"
+
+    Returns
+    ---
+    int: the packed move, None if the text isn't a move
+    """
+    text = text.lower()
+    if len(text) not in (4, 5) or text[0] not in FILES or text[2] not in FILES\
+            or text[1] not in RANKS or text[3] not in RANKS:
+        return None
+    start = RANKS.index(text[1]) * 8 + FILES.index(text[0])
+    dest = RANKS.index(text[3]) * 8 + FILES.index(text[2])
+    promotion = 0
+    if len(text) == 5:
+        if text[4] not in PROMOTION_IDS:
+            return None
+        promotion = PROMOTION_IDS[text[4]]
+    return start | dest << 6 | promotion << 12
+
+
+class GameWriter:
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    file: BinaryIO
+    offsets: array
+    """byte offset of every game written so far"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, path: str) -> None:
+        """
+        Constructor. Creates (or empties) the file; games are written to it
+        as they are added, and the index when the writer is closed.
+
+        Parameters
+        ---
+        path: str
+
+        Returns
+        ---
+        None
+        """
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        self.offsets = array("Q")
+
+    ###########
+    # METHODS #
+    ###########
+    def addGame(self, packedMoves: Iterable[int], result: str = None) -> None:
+        """
+        Write one game.
+
+        Parameters
+        ---
+        packedMoves: Iterable[int] moves packed with packMove
+        result: str = None one of RESULTS, None if no result was recorded
+
+        Returns
+        ---
+        None
+        """
+        self.offsets.append(self.file.tell())
+        record = array("H", (NO_RESULT if result is None
+                             else RESULTS.index(result),))
+        record.extend(packedMoves)
+        if _SWAP_BYTES:
+            record.byteswap()
+        record.tofile(self.file)
+
+    def close(self) -> None:
+        """
+        Write the index and header, and close the file.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        if self.file.closed:
+            return
+        indexOffset = self.file.tell()
+        index = array("Q", self.offsets)
+        index.append(indexOffset)
+        if _SWAP_BYTES:
+            index.byteswap()
+        index.tofile(self.file)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, len(self.offsets),
+                                    indexOffset))
+        self.file.close()
+
+    def __enter__(self) -> "GameWriter":
+        return self
+
+    def __exit__(self, *excInfo) -> None:
+        self.close()
+
+
+class GameFile:
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    file: BinaryIO
+    map: mmap.mmap
+    gameCount: int
+    index: memoryview
+    """byte offsets of the games, plus the end of the last one"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, path: str) -> None:
+        """
+        Constructor. Maps the file into memory; nothing is read until a
+        game is asked for.
+
+        Parameters
+        ---
+        path: str
+
+        Returns
+        ---
+        None
+
+        Raises
+        ---
+        ValueError if the file is not a game file of this version
+        """
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            self.file.close()
+            raise ValueError(f"{path} is not a game file")
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a game file")
+        magic, version, _, self.gameCount, indexOffset = HEADER.unpack_from(self.map)
+        indexEnd = indexOffset + 8 * (self.gameCount + 1)
+        if magic != MAGIC or version != VERSION or indexEnd > len(self.map):
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} game file")
+        self.index = memoryview(self.map)[indexOffset:indexEnd].cast("Q")
+        if _SWAP_BYTES:
+            index = array("Q", self.index)
+            index.byteswap()
+            self.index.release()
+            self.index = memoryview(index)
+
+    ###########
+    # METHODS #
+    ###########
+    def isGameFile(path: str) -> bool:
+        """
+        Returns whether a file starts like a game file.
+
+        Parameters
+        ---
+        path: str
+
+        Returns
+        ---
+        bool
+        """
+        with open(path, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+
+    def game(self, number: int) -> tuple[str, memoryview]:
+        """
+        Returns one game, without copying its moves out of the file.
+
+        Parameters
+        ---
+        number: int which game, counting from 0
+
+        Returns
+        ---
+        tuple[str, memoryview]: (result, None if none was recorded; packed
+        moves). The view must be released (or dropped) before the file is
+        closed.
+
+        Raises
+        ---
+        IndexError if there is no such game
+        """
+        if not 0 <= number < self.gameCount:
+            raise IndexError(f"game {number} out of range")
+        start = self.index[number]
+        record = memoryview(self.map)[start:self.index[number + 1]].cast("H")
+        if _SWAP_BYTES:
+            record = array("H", record)
+            record.byteswap()
+            record = memoryview(record)
+        code = record[0]
+        return (None if code == NO_RESULT else RESULTS[code], record[1:])
+
+    def __len__(self) -> int:
+        return self.gameCount
+
+    def __getitem__(self, number: int) -> tuple[str, memoryview]:
+        return self.game(number)
+
+    def __iter__(self) -> Iterator[tuple[str, memoryview]]:
+        for number in range(self.gameCount):
+            yield self.game(number)
+
+    def close(self) -> None:
+        """
+        Unmap and close the file.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        if hasattr(self, "index"):
+            self.index.release()
+        if not self.map.closed:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> "GameFile":
+        return self
+
+    def __exit__(self, *excInfo) -> None:
+        self.close()
+
+
+def main() -> None:
+    """
+    Command-line entry point: describe a game file, or print one game.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Show the contents of a SpartanChess game file.")
+    parser.add_argument("path", help="game file")
+    parser.add_argument("--game", type=int,
+                        help="print this game (counting from 0) in coordinate notation")
+    args = parser.parse_args()
+
+    with GameFile(args.path) as games:
+        if args.game is None:
+            plies = sum(len(moves) for (_, moves) in games)
+            print(f"{len(games)} games, {plies} plies")
+            return
+        try:
+            result, moves = games.game(args.game)
+        except IndexError as error:
+            sys.exit(str(error))
+        texts = [mr.moveToCoordinates(unpackMove(packed)) for packed in moves]
+        moves.release()
+        if result is not None:
+            texts.append(result)
+        print(" ".join(texts))
+
+
+if __name__ == "__main__":
+    main()
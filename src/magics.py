@@ -0,0 +1,366 @@
+#!usr/bin/env python3
+"""Magic bitboard lookups for sliding attacks in SpartanChess.
+
+For each square, a slider's attacks only depend on which squares of its
+rays are occupied, leaving out the last square of each ray (a piece there
+can't block anything). Those relevant occupied squares are multiplied by a
+per-square magic number chosen so that the top bits of the product index a
+table holding the attacks for every possible arrangement of blockers, so
+finding a rook's or bishop's attacks takes one multiplication and one list
+lookup. Squares are numbered rank * 8 + file, as in position.py.
+
+Finding the magic numbers takes a few seconds, so the tables are built the
+first time they are needed and saved to CACHE_PATH, from which later runs
+load them. The search gives up on the smallest possible table of a square
+after MAX_TRIES candidates and looks for one twice as big instead, which
+takes far fewer tries; the tables are then about twice as big overall."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import os
+import random
+import struct
+import sys
+from array import array
+
+# INTERNAL IMPORTS
+import movetables as mt
+
+MAGIC: bytes = b"SCMB"
+VERSION: int = 1
+HEADER: struct.Struct = struct.Struct("<4sHH")
+"""magic, version, reserved"""
+
+CACHE_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "__pycache__", "magics.bin")
+SEED: int = 20230415
+"""seed of the magic number search, so that every run finds the same ones"""
+
+MAX_TRIES: int = 1000
+"""magic candidates tried for a table size before trying one twice as big"""
+
+FULL: int = (1 << 64) - 1
+
+
+def _relevantMask(rays: tuple[tuple[tuple[int, int]]]) -> int:
+    """
+    Build the bitboard of the squares whose occupancy matters to a slider.
+
+    Parameters
+    ---
+    rays: tuple[tuple[tuple[int, int]]] rays of the slider's square, from
+    movetables
+
+    Returns
+    ---
+    int: bitboard of every square of the rays but the last of each
+    """
+    return sum(1 << (rank * 8 + file) for ray in rays for (rank, file) in ray[:-1])
+
+
+def _slowAttacks(rays: tuple[tuple[tuple[int, int]]], occupied: int) -> int:
+    """
+    Find a slider's attacks by walking its rays.
+
+    Parameters
+    ---
+    rays: tuple[tuple[tuple[int, int]]] rays of the slider's square
+    occupied: int bitboard of occupied squares
+
+    Returns
+    ---
+    int: bitboard of attacked squares
+    """
+    attacks = 0
+    for ray in rays:
+        for (rank, file) in ray:
+            bit = 1 << (rank * 8 + file)
+            attacks |= bit
+            if occupied & bit:
+                break
+    return attacks
+
+
+def _findMagic(mask: int, rays: tuple[tuple[tuple[int, int]]],
+               chooser: random.Random) -> tuple[int, int, list[int]]:
+    """
+    Search for a magic number for one square.
+
+    Parameters
+    ---
+    mask: int relevant occupancy mask of the square
+    rays: tuple[tuple[tuple[int, int]]] rays of the slider on the square
+    chooser: random.Random source of candidates
+
+    Returns
+    ---
+    tuple[int, int, list[int]]: the magic number, the shift, and the attack
+    table they index
+    """
+    # every subset of the mask, by the carry-rippler trick
+    occupancies = []
+    subset = 0
+    while True:
+        occupancies.append(subset)
+        subset = (subset - mask) & mask
+        if not subset:
+            break
+    attacks = [_slowAttacks(rays, occupied) for occupied in occupancies]
+
+    bits = mask.bit_count()
+    while True:
+        shift = 64 - bits
+        # most candidates fail after a few entries, so rather than clearing
+        # the table for each one, entries are stamped with the attempt that
+        # wrote them
+        table = [0] * (1 << bits)
+        stamps = [0] * (1 << bits)
+        attempt = 0
+        while attempt < MAX_TRIES:
+            # candidates with few set bits work best
+            magic = chooser.getrandbits(64) & chooser.getrandbits(64)\
+                & chooser.getrandbits(64)
+            if ((mask * magic) & FULL >> 56 << 56).bit_count() < 6:
+                continue
+            attempt += 1
+            for (occupied, attack) in zip(occupancies, attacks):
+                index = ((occupied * magic) & FULL) >> shift
+                if stamps[index] != attempt:
+                    stamps[index] = attempt
+                    table[index] = attack
+                elif table[index] != attack:
+                    break
+            else:
+                # entries no arrangement of blockers maps to are never
+                # looked up; clear the ones left over from earlier attempts
+                return magic, shift, [attack if stamp == attempt else 0
+                                      for (attack, stamp) in zip(table, stamps)]
+        bits += 1
+
+
+class SliderTable:
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    masks: list[int]
+    """relevant occupancy mask of each square"""
+    magics: list[int]
+    shifts: list[int]
+    tables: list[list[int]]
+    """attacks of each square, indexed by the magic hash"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, rays: tuple[tuple[tuple[tuple[int, int]]]]) -> None:
+        """
+        Constructor. Works out the masks; the magics, shifts and tables are
+        filled in by build or read.
+
+        Parameters
+        ---
+        rays: tuple[tuple[tuple[tuple[int, int]]]] the slider's ray table
+        from movetables
+
+        Returns
+        ---
+        None
+        """
+        self.masks = [_relevantMask(squareRays) for squareRays in rays]
+        self.magics = []
+        self.shifts = []
+        self.tables = []
+
+    ###########
+    # METHODS #
+    ###########
+    def build(self, rays: tuple[tuple[tuple[tuple[int, int]]]],
+              chooser: random.Random) -> None:
+        """
+        Find the magic numbers and shifts and fill the tables.
+
+        Parameters
+        ---
+        rays: tuple[tuple[tuple[tuple[int, int]]]] the slider's ray table
+        chooser: random.Random source of magic number candidates
+
+        Returns
+        ---
+        None
+        """
+        for (mask, squareRays) in zip(self.masks, rays):
+            magic, shift, table = _findMagic(mask, squareRays, chooser)
+            self.magics.append(magic)
+            self.shifts.append(shift)
+            self.tables.append(table)
+
+    def write(self, file) -> None:
+        """
+        Write the magic numbers and shifts, then every square's table.
+
+        Parameters
+        ---
+        file: binary file to write to
+
+        Returns
+        ---
+        None
+        """
+        values = array("Q", self.magics + self.shifts)
+        for table in self.tables:
+            values.extend(table)
+        if sys.byteorder != "little":
+            values.byteswap()
+        values.tofile(file)
+
+    def read(self, file) -> None:
+        """
+        Read what write wrote.
+
+        Parameters
+        ---
+        file: binary file to read from
+
+        Returns
+        ---
+        None
+
+        Raises
+        ---
+        EOFError if the file is too short or its shifts don't fit the masks
+        """
+        values = array("Q")
+        values.fromfile(file, 128)
+        if sys.byteorder != "little":
+            values.byteswap()
+        self.magics = values[:64].tolist()
+        self.shifts = values[64:].tolist()
+        if not all(mask.bit_count() <= 64 - shift <= 16
+                   for (mask, shift) in zip(self.masks, self.shifts)):
+            raise EOFError("bad shifts")
+        values = array("Q")
+        values.fromfile(file, sum(1 << (64 - shift) for shift in self.shifts))
+        if sys.byteorder != "little":
+            values.byteswap()
+        values = values.tolist()
+        offset = 0
+        for shift in self.shifts:
+            size = 1 << (64 - shift)
+            self.tables.append(values[offset:offset + size])
+            offset += size
+
+
+ROOK_ENTRIES: list[tuple[int, int, int, list[int]]] = None
+"""mask, magic number, shift and table of each square, once loaded"""
+BISHOP_ENTRIES: list[tuple[int, int, int, list[int]]] = None
+
+
+def _loadTables(path: str = CACHE_PATH) -> tuple[SliderTable, SliderTable]:
+    """
+    Read the tables from the cache, or build them and try to cache them if
+    the cache is missing or out of date.
+
+    Parameters
+    ---
+    path: str = CACHE_PATH
+
+    Returns
+    ---
+    tuple[SliderTable, SliderTable]: rook and bishop tables
+    """
+    rookTable = SliderTable(mt.ROOK_RAYS)
+    bishopTable = SliderTable(mt.BISHOP_RAYS)
+    try:
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) == HEADER.size\
+                    and HEADER.unpack(header)[:2] == (MAGIC, VERSION):
+                rookTable.read(file)
+                bishopTable.read(file)
+                return rookTable, bishopTable
+    except (OSError, EOFError):
+        pass
+
+    rookTable = SliderTable(mt.ROOK_RAYS)
+    bishopTable = SliderTable(mt.BISHOP_RAYS)
+    chooser = random.Random(SEED)
+    rookTable.build(mt.ROOK_RAYS, chooser)
+    bishopTable.build(mt.BISHOP_RAYS, chooser)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first so that a run that is stopped
+        # partway never leaves a broken cache
+        temporaryPath = f"{path}.{os.getpid()}.tmp"
+        with open(temporaryPath, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, 0))
+            rookTable.write(file)
+            bishopTable.write(file)
+        os.replace(temporaryPath, path)
+    except OSError:
+        # the tables still work, they just get built again next run
+        pass
+    return rookTable, bishopTable
+
+
+def loadTables() -> None:
+    """
+    Make sure the tables are loaded. The lookups below call this
+    themselves; it is only needed to take the loading time up front.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    global ROOK_ENTRIES, BISHOP_ENTRIES
+    if ROOK_ENTRIES is None:
+        rookTable, bishopTable = _loadTables()
+        ROOK_ENTRIES = list(zip(rookTable.masks, rookTable.magics,
+                                rookTable.shifts, rookTable.tables))
+        BISHOP_ENTRIES = list(zip(bishopTable.masks, bishopTable.magics,
+                                  bishopTable.shifts, bishopTable.tables))
+
+
+def rookAttacks(square: int, occupied: int) -> int:
+    """
+    Find the squares a rook attacks, up to and including the first occupied
+    square in each direction.
+
+    Parameters
+    ---
+    square: int
+    occupied: int bitboard of occupied squares
+
+    Returns
+    ---
+    int: bitboard of attacked squares
+    """
+    if ROOK_ENTRIES is None:
+        loadTables()
+    mask, magic, shift, table = ROOK_ENTRIES[square]
+    return table[((occupied & mask) * magic & FULL) >> shift]
+
+
+def bishopAttacks(square: int, occupied: int) -> int:
+    """
+    Find the squares a bishop attacks, up to and including the first
+    occupied square in each direction.
+
+    Parameters
+    ---
+    square: int
+    occupied: int bitboard of occupied squares
+
+    Returns
+    ---
+    int: bitboard of attacked squares
+    """
+    if BISHOP_ENTRIES is None:
+        loadTables()
+    mask, magic, shift, table = BISHOP_ENTRIES[square]
+    return table[((occupied & mask) * magic & FULL) >> shift]
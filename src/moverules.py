@@ -7,6 +7,16 @@ __version__ = "1.0"
 # IMPORTS
 import numpy as np
 from piece import Piece
+from position import Position
+from movetables import (KNIGHT_TARGETS, KING_TARGETS, LIEUTENANT_TARGETS,
+                        LIEUTENANT_SIDE_TARGETS, CAPTAIN_TARGETS,
+                        PAWN_ATTACK_TARGETS, HOPLITE_ATTACK_TARGETS,
+                        HOPLITE_STEP_TARGETS, HOPLITE_JUMP_TARGETS,
+                        BISHOP_RAYS as BISHOP_RAY_TARGETS,
+                        ROOK_RAYS as ROOK_RAY_TARGETS,
+                        QUEEN_RAYS as QUEEN_RAY_TARGETS)
+import magics
+import movetables
 
 # CONSTANTS
 ILLEGAL: int = 0
@@ -17,14 +27,123 @@ PROMOTE: int = 4
 PROMOTE_CAPTURE: int = 5
 
 
-def findPawnMoves(grid: list[list[Piece]],
+def _addLeaperMoves(grid: list[list[Piece]], validMatrix: list[list[int]],
+                    targets: tuple[tuple[int, int]], enemyColor: int) -> None:
+    """
+    Mark the jumps of a leaper onto empty squares and enemy pieces.
+
+    Parameters
+    ---
+    grid: list[list[Piece]] board state
+    validMatrix: list[list[int]] matrix of possible moves to mark
+    targets: tuple[tuple[int, int]] (rank, file) of each jump, from movetables
+    enemyColor: int color of the pieces that can be captured
+
+    Returns
+    ---
+    None
+    """
+    for (destRank, destFile) in targets:
+        color = grid[destRank][destFile].pieceColor
+        if color == Piece.EMPTY:
+            validMatrix[destRank][destFile] = MOVE
+        elif color == enemyColor:
+            validMatrix[destRank][destFile] = CAPTURE
+
+
+def _addSliderMoves(grid: list[list[Piece]], validMatrix: list[list[int]],
+                    rays: tuple[tuple[tuple[int, int]]], enemyColor: int) -> None:
+    """
+    Mark the moves of a slider along its rays, up to the first piece on each.
+
+    Parameters
+    ---
+    grid: list[list[Piece]] board state
+    validMatrix: list[list[int]] matrix of possible moves to mark
+    rays: tuple[tuple[tuple[int, int]]] rays of the slider's square, from
+    movetables
+    enemyColor: int color of the pieces that can be captured
+
+    Returns
+    ---
+    None
+    """
+    for ray in rays:
+        for (destRank, destFile) in ray:
+            color = grid[destRank][destFile].pieceColor
+            if color == Piece.EMPTY:
+                validMatrix[destRank][destFile] = MOVE
+                continue
+            # piece of opposing color, stop (but mark valid)
+            if color == enemyColor:
+                validMatrix[destRank][destFile] = CAPTURE
+            break
+
+
+def _addSliderAttacks(grid: list[list[Piece]], attackedMatrix: np.ndarray,
+                      rays: tuple[tuple[tuple[int, int]]]) -> None:
+    """
+    Mark the squares a slider attacks along its rays, up to and including
+    the first piece on each.
+
+    Parameters
+    ---
+    grid: list[list[Piece]] board state
+    attackedMatrix: np.ndarray matrix of attacked squares to mark
+    rays: tuple[tuple[tuple[int, int]]] rays of the slider's square, from
+    movetables
+
+    Returns
+    ---
+    None
+    """
+    for ray in rays:
+        for (destRank, destFile) in ray:
+            attackedMatrix[destRank, destFile] = 1
+            # piece blocking sight, stop
+            if grid[destRank][destFile].pieceId != Piece.EMPTY:
+                break
+
+
+def _buildMatrices(table: tuple[tuple[tuple[int, int]]]) -> list[np.ndarray]:
+    """
+    Build the attack matrix of a leaper on each square.
+
+    Parameters
+    ---
+    table: tuple[tuple[tuple[int, int]]] (rank, file) of each jump from each
+    square, from movetables
+
+    Returns
+    ---
+    list[np.ndarray]: matrix of attacked squares for each of the 64 squares;
+    callers copy them before handing them out
+    """
+    matrices = []
+    for targets in table:
+        attackedMatrix = np.zeros((8, 8), dtype=int)
+        for (destRank, destFile) in targets:
+            attackedMatrix[destRank, destFile] = 1
+        matrices.append(attackedMatrix)
+    return matrices
+
+
+PAWN_ATTACK_MATRICES: list[np.ndarray] = _buildMatrices(PAWN_ATTACK_TARGETS)
+HOPLITE_ATTACK_MATRICES: list[np.ndarray] = _buildMatrices(HOPLITE_ATTACK_TARGETS)
+KNIGHT_MATRICES: list[np.ndarray] = _buildMatrices(KNIGHT_TARGETS)
+KING_MATRICES: list[np.ndarray] = _buildMatrices(KING_TARGETS)
+LIEUTENANT_MATRICES: list[np.ndarray] = _buildMatrices(LIEUTENANT_TARGETS)
+CAPTAIN_MATRICES: list[np.ndarray] = _buildMatrices(CAPTAIN_TARGETS)
+
+
+def findPawnMoves(grid: list[list[Piece]] | Position,
                   rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a pawn at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -32,6 +151,8 @@ def findPawnMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.PAWN, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
     # normal single-step move
     if grid[rank+1][file].pieceId == Piece.EMPTY:
@@ -42,29 +163,24 @@ def findPawnMoves(grid: list[list[Piece]],
         # starting double-step move
         if rank == 1 and grid[rank+2][file].pieceId == Piece.EMPTY:
             validMatrix[rank+2][file] = MOVE
-    # diagonal capture northwest
-    if file != 0 and rank != 7 and grid[rank+1][file-1].pieceColor == Piece.BLACK:
-        if rank+1 == 7:
-            validMatrix[rank+1][file-1] = PROMOTE_CAPTURE
-        else:
-            validMatrix[rank+1][file-1] = CAPTURE
-    # diagonal capture northeast
-    if file != 7 and rank != 7 and grid[rank+1][file+1].pieceColor == Piece.BLACK:
-        if rank+1 == 7:
-            validMatrix[rank+1][file+1] = PROMOTE_CAPTURE
-        else:
-            validMatrix[rank+1][file+1] = CAPTURE
+    # diagonal captures
+    for (destRank, destFile) in PAWN_ATTACK_TARGETS[rank * 8 + file]:
+        if grid[destRank][destFile].pieceColor == Piece.BLACK:
+            if destRank == 7:
+                validMatrix[destRank][destFile] = PROMOTE_CAPTURE
+            else:
+                validMatrix[destRank][destFile] = CAPTURE
     return validMatrix
 
 
-def findPawnAttacks(grid: list[list[Piece]],
+def findPawnAttacks(grid: list[list[Piece]] | Position,
                     rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a pawn at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -72,28 +188,20 @@ def findPawnAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
-    # diagonal capture northwest
-    if file != 0 and rank != 7:
-        attackedMatrix[rank+1, file-1] = 1
-    # diagonal capture northeast
-    if file != 7 and rank != 7:
-        attackedMatrix[rank+1][file+1] = 1
-    return attackedMatrix
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.PAWN, rank * 8 + file,
+                                            grid.occupancy))
+    return PAWN_ATTACK_MATRICES[rank * 8 + file].copy()
 
 
-KNIGHT_R_OFFSETS: tuple[int] = (-2, -2, -1, -1, +1, +1, +2, +2)
-KNIGHT_F_OFFSETS: tuple[int] = (-1, +1, -2, +2, -2, +2, -1, +1)
-
-
-def findKnightMoves(grid: list[list[Piece]],
+def findKnightMoves(grid: list[list[Piece]] | Position,
                     rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a knight at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -101,28 +209,21 @@ def findKnightMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.KNIGHT, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
-    for i in range(8):
-        destRank = rank + KNIGHT_R_OFFSETS[i]
-        destFile = file + KNIGHT_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        if grid[destRank][destFile].pieceId == Piece.EMPTY:
-            validMatrix[destRank][destFile] = MOVE
-        elif grid[destRank][destFile].pieceColor == Piece.BLACK:
-            validMatrix[destRank][destFile] = CAPTURE
+    _addLeaperMoves(grid, validMatrix, KNIGHT_TARGETS[rank * 8 + file], Piece.BLACK)
     return validMatrix
 
 
-def findKnightAttacks(grid: list[list[Piece]],
+def findKnightAttacks(grid: list[list[Piece]] | Position,
                       rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a knight at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -130,29 +231,20 @@ def findKnightAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
-    for i in range(8):
-        destRank = rank + KNIGHT_R_OFFSETS[i]
-        destFile = file + KNIGHT_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        attackedMatrix[destRank, destFile] = 1
-    return attackedMatrix
-
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.KNIGHT, rank * 8 + file,
+                                            grid.occupancy))
+    return KNIGHT_MATRICES[rank * 8 + file].copy()
 
-BISHOP_R_OFFSETS: tuple[int] = (-1, -1, +1, +1)
-BISHOP_F_OFFSETS: tuple[int] = (-1, +1, -1, +1)
 
-
-def findBishopMoves(grid: list[list[Piece]],
+def findBishopMoves(grid: list[list[Piece]] | Position,
                     rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a bishop at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -160,34 +252,22 @@ def findBishopMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.BISHOP, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * BISHOP_R_OFFSETS[direction]
-            destFile = file + step * BISHOP_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # piece of same color, stop
-            if grid[destRank][destFile].pieceColor == Piece.WHITE:
-                break
-            validMatrix[destRank][destFile] = MOVE
-            # piece of opposing color, stop (but mark valid)
-            if grid[destRank][destFile].pieceColor == Piece.BLACK:
-                validMatrix[destRank][destFile] = CAPTURE
-                break
+    _addSliderMoves(grid, validMatrix, BISHOP_RAY_TARGETS[rank * 8 + file],
+                    Piece.BLACK)
     return validMatrix
 
 
-def findBishopAttacks(grid: list[list[Piece]],
+def findBishopAttacks(grid: list[list[Piece]] | Position,
                       rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a bishop at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -195,35 +275,22 @@ def findBishopAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.BISHOP, rank * 8 + file,
+                                            grid.occupancy))
     attackedMatrix = np.zeros((8, 8), dtype=int)
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * BISHOP_R_OFFSETS[direction]
-            destFile = file + step * BISHOP_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # mark this square
-            attackedMatrix[destRank, destFile] = 1
-            # piece blocking sight, stop
-            if grid[destRank][destFile].pieceId != Piece.EMPTY:
-                break
+    _addSliderAttacks(grid, attackedMatrix, BISHOP_RAY_TARGETS[rank * 8 + file])
     return attackedMatrix
 
 
-ROOK_R_OFFSETS: tuple[int] = (0, 0, +1, -1)
-ROOK_F_OFFSETS: tuple[int] = (+1, -1, 0, 0)
-
-
-def findRookMoves(grid: list[list[Piece]],
+def findRookMoves(grid: list[list[Piece]] | Position,
                   rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a rook at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -231,35 +298,23 @@ def findRookMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.ROOK, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * ROOK_R_OFFSETS[direction]
-            destFile = file + step * ROOK_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # piece of same color, stop
-            if grid[destRank][destFile].pieceColor == Piece.WHITE:
-                break
-            validMatrix[destRank][destFile] = MOVE
-            # piece of opposing color, stop (but mark valid)
-            if grid[destRank][destFile].pieceColor == Piece.BLACK:
-                validMatrix[destRank][destFile] = CAPTURE
-                break
+    _addSliderMoves(grid, validMatrix, ROOK_RAY_TARGETS[rank * 8 + file],
+                    Piece.BLACK)
 
     return validMatrix
 
 
-def findRookAttacks(grid: list[list[Piece]],
+def findRookAttacks(grid: list[list[Piece]] | Position,
                     rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a rook at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -267,36 +322,22 @@ def findRookAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.ROOK, rank * 8 + file,
+                                            grid.occupancy))
     attackedMatrix = np.zeros((8, 8), dtype=int)
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * ROOK_R_OFFSETS[direction]
-            destFile = file + step * ROOK_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # mark this square
-            attackedMatrix[destRank, destFile] = 1
-            # piece blocking sight, stop
-            if grid[destRank][destFile].pieceId != Piece.EMPTY:
-                break
+    _addSliderAttacks(grid, attackedMatrix, ROOK_RAY_TARGETS[rank * 8 + file])
     return attackedMatrix
 
 
-# note that these are just the union of rook and bishop offset lists
-QUEEN_R_OFFSETS: tuple[int] = (0, 0, +1, -1, -1, -1, +1, +1)
-QUEEN_F_OFFSETS: tuple[int] = (+1, -1, 0, 0, -1, +1, -1, +1)
-
-
-def findQueenMoves(grid: list[list[Piece]],
+def findQueenMoves(grid: list[list[Piece]] | Position,
                    rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a queen at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -304,35 +345,23 @@ def findQueenMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.QUEEN, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
-    for direction in range(8):
-        for step in range(1, 8):
-            destRank = rank + step * QUEEN_R_OFFSETS[direction]
-            destFile = file + step * QUEEN_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # piece of same color, stop
-            if grid[destRank][destFile].pieceColor == Piece.WHITE:
-                break
-            validMatrix[destRank][destFile] = MOVE
-            # piece of opposing color, stop (but mark valid)
-            if grid[destRank][destFile].pieceColor == Piece.BLACK:
-                validMatrix[destRank][destFile] = CAPTURE
-                break
+    _addSliderMoves(grid, validMatrix, QUEEN_RAY_TARGETS[rank * 8 + file],
+                    Piece.BLACK)
 
     return validMatrix
 
 
-def findQueenAttacks(grid: list[list[Piece]],
+def findQueenAttacks(grid: list[list[Piece]] | Position,
                      rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a queen at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -340,55 +369,56 @@ def findQueenAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.QUEEN, rank * 8 + file,
+                                            grid.occupancy))
     attackedMatrix = np.zeros((8, 8), dtype=int)
-    for direction in range(8):
-        for step in range(1, 8):
-            destRank = rank + step * QUEEN_R_OFFSETS[direction]
-            destFile = file + step * QUEEN_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # mark this square
-            attackedMatrix[destRank, destFile] = 1
-            # piece blocking sight, stop
-            if grid[destRank][destFile].pieceId != Piece.EMPTY:
-                break
+    _addSliderAttacks(grid, attackedMatrix, QUEEN_RAY_TARGETS[rank * 8 + file])
     return attackedMatrix
 
 
-# these are the same as the queen offsets
-KING_R_OFFSETS: tuple[int] = (0, 0, +1, -1, -1, -1, +1, +1)
-KING_F_OFFSETS: tuple[int] = (+1, -1, 0, 0, -1, +1, -1, +1)
-
-
-def findPersianKingMoves(grid: list[list[Piece]], rank: int, file: int,
-                         castleShort: bool, castleLong: bool) -> list[list[int]]:
+def findPersianKingMoves(grid: list[list[Piece]] | Position, rank: int, file: int,
+                         castleShort: bool, castleLong: bool,
+                         attacked: int = None) -> list[list[int]]:
     """
     Find all legal moves for a persian king at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
     castleShort: bool whether White retains short castle rights
     castleLong: bool whether White retains long castle rights
+    attacked: int = None bitboard of squares attacked by Black; computed from
+    the board if not given
 
     Returns
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        if attacked is None:
+            attacked = findAttackedBits(grid, False)
+        validMatrix = _findPositionMoves(grid, Piece.PKING, rank, file)
+        castleShort = castleShort and checkCastle(grid, True, attacked)
+        castleLong = castleLong and checkCastle(grid, False, attacked)
+        # would be check, invalid
+        while attacked:
+            low = attacked & -attacked
+            destRank, destFile = divmod(low.bit_length() - 1, 8)
+            validMatrix[destRank][destFile] = ILLEGAL
+            attacked ^= low
+        if castleShort:
+            validMatrix[0][6] = validMatrix[0][7] = CASTLE
+        if castleLong:
+            validMatrix[0][2] = validMatrix[0][0] = CASTLE
+        return validMatrix
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
-    attackedMatrix = findAttackedSquares(grid, False)
+    attackedMatrix = findAttackedSquares(grid, False) if attacked is None\
+        else bitsToMatrix(attacked)
     # normal directional moves
-    for direction in range(8):
-        destRank = rank + KING_R_OFFSETS[direction]
-        destFile = file + KING_F_OFFSETS[direction]
-        # out of bounds
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
+    for (destRank, destFile) in KING_TARGETS[rank * 8 + file]:
         # piece of same color, invalid
         if grid[destRank][destFile].pieceColor == Piece.WHITE:
             continue
@@ -400,15 +430,16 @@ def findPersianKingMoves(grid: list[list[Piece]], rank: int, file: int,
         else:
             validMatrix[destRank][destFile] = CAPTURE
 
-    if castleShort and checkCastle(grid, True):
+    if castleShort and checkCastle(grid, True, attacked):
         validMatrix[0][6] = validMatrix[0][7] = CASTLE
-    if castleLong and checkCastle(grid, False):
+    if castleLong and checkCastle(grid, False, attacked):
         validMatrix[0][2] = validMatrix[0][0] = CASTLE
 
     return validMatrix
 
 
-def checkCastle(grid: list[list[Piece]], castleShort: bool):
+def checkCastle(grid: list[list[Piece]] | Position, castleShort: bool,
+                attacked: int = None) -> bool:
     """
     Check whether it is a legal move to castle in the specified direction.
     Does not check if the king or rook have moved; this method only
@@ -416,14 +447,26 @@ def checkCastle(grid: list[list[Piece]], castleShort: bool):
 
     Parameters
     ---
-    grid: list[list[Piece]] current board state
+    grid: list[list[Piece]] | Position current board state
     castleShort: bool True if castling short, False if castling long
+    attacked: int = None bitboard of squares attacked by Black; computed from
+    the board if not given
 
     Returns
     ---
     bool: whether castling is legal.
     """
-    attacked = findAttackedSquares(grid, False)
+    if isinstance(grid, Position):
+        if attacked is None:
+            attacked = findAttackedBits(grid, False)
+        if castleShort:
+            # f1 and g1 empty; e1, f1 and g1 not attacked
+            return grid.occupancy & 0x60 == 0 and attacked & 0x70 == 0
+        else:  # castle long
+            # b1, c1 and d1 empty; c1, d1 and e1 not attacked
+            return grid.occupancy & 0x0E == 0 and attacked & 0x1C == 0
+    attacked = findAttackedSquares(grid, False) if attacked is None\
+        else bitsToMatrix(attacked)
     if castleShort:
         return grid[0][5].pieceId == Piece.EMPTY and\
             grid[0][6].pieceId == Piece.EMPTY and\
@@ -435,14 +478,14 @@ def checkCastle(grid: list[list[Piece]], castleShort: bool):
             np.sum(attacked[0, 2:5]) == 0
 
 
-def findPersianKingAttacks(grid: list[list[Piece]],
+def findPersianKingAttacks(grid: list[list[Piece]] | Position,
                            rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a persian king at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -450,27 +493,20 @@ def findPersianKingAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
-    for direction in range(8):
-        destRank = rank + KING_R_OFFSETS[direction]
-        destFile = file + KING_F_OFFSETS[direction]
-        # out of bounds, stop
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        # mark this square
-        attackedMatrix[destRank, destFile] = 1
-    return attackedMatrix
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.PKING, rank * 8 + file,
+                                            grid.occupancy))
+    return KING_MATRICES[rank * 8 + file].copy()
 
 
-def findHopliteMoves(grid: list[list[Piece]],
+def findHopliteMoves(grid: list[list[Piece]] | Position,
                      rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a hoplite at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -478,42 +514,40 @@ def findHopliteMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.HOPLITE, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
-    # normal diagonal move southwest
-    if file != 0 and grid[rank-1][file-1].pieceId == Piece.EMPTY:
-        if rank-1 == 0:
-            validMatrix[rank-1][file-1] = PROMOTE
-        else:
-            validMatrix[rank-1][file-1] = MOVE
-    # normal diagonal move northeast
-    if file != 7 and grid[rank-1][file+1].pieceId == Piece.EMPTY:
-        if rank-1 == 0:
-            validMatrix[rank-1][file+1] = PROMOTE
-        else:
-            validMatrix[rank-1][file+1] = MOVE
-    # starting double-step move southwest
-    if rank == 6 and file >= 2 and grid[rank-2][file-2].pieceId == Piece.EMPTY:
-        validMatrix[rank-2][file-2] = MOVE
-    # starting double-step move southeast
-    if rank == 6 and file <= 5 and grid[rank-2][file+2].pieceId == Piece.EMPTY:
-        validMatrix[rank-2][file+2] = MOVE
+    square = rank * 8 + file
+    # normal diagonal moves
+    for (destRank, destFile) in HOPLITE_STEP_TARGETS[square]:
+        if grid[destRank][destFile].pieceId == Piece.EMPTY:
+            if destRank == 0:
+                validMatrix[destRank][destFile] = PROMOTE
+            else:
+                validMatrix[destRank][destFile] = MOVE
+    # starting double-step moves
+    if rank == 6:
+        for (destRank, destFile) in HOPLITE_JUMP_TARGETS[square]:
+            if grid[destRank][destFile].pieceId == Piece.EMPTY:
+                validMatrix[destRank][destFile] = MOVE
     # capture forward
-    if grid[rank-1][file].pieceColor == Piece.WHITE:
-        if rank == 1:
-            validMatrix[rank-1][file] = PROMOTE_CAPTURE
-        else:
-            validMatrix[rank-1][file] = CAPTURE
+    for (destRank, destFile) in HOPLITE_ATTACK_TARGETS[square]:
+        if grid[destRank][destFile].pieceColor == Piece.WHITE:
+            if destRank == 0:
+                validMatrix[destRank][destFile] = PROMOTE_CAPTURE
+            else:
+                validMatrix[destRank][destFile] = CAPTURE
     return validMatrix
 
 
-def findHopliteAttacks(grid: list[list[Piece]],
+def findHopliteAttacks(grid: list[list[Piece]] | Position,
                        rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a hoplite at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -521,23 +555,20 @@ def findHopliteAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
-    attackedMatrix[rank-1, file] = 1
-    return attackedMatrix
-
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.HOPLITE, rank * 8 + file,
+                                            grid.occupancy))
+    return HOPLITE_ATTACK_MATRICES[rank * 8 + file].copy()
 
-LIEUTENANT_R_OFFSETS: tuple[int] = (-2, -2, -1, -1, +1, +1, +2, +2)
-LIEUTENANT_F_OFFSETS: tuple[int] = (-2, +2, -1, +1, -1, +1, -2, +2)
 
-
-def findLieutenantMoves(grid: list[list[Piece]],
+def findLieutenantMoves(grid: list[list[Piece]] | Position,
                         rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a lieutenant at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -545,34 +576,27 @@ def findLieutenantMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.LIEUTENANT, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
+    square = rank * 8 + file
     # jumping diagonal move
-    for i in range(8):
-        destRank = rank + LIEUTENANT_R_OFFSETS[i]
-        destFile = file + LIEUTENANT_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
+    _addLeaperMoves(grid, validMatrix, LIEUTENANT_TARGETS[square], Piece.WHITE)
+    # horizontal moves
+    for (destRank, destFile) in LIEUTENANT_SIDE_TARGETS[square]:
         if grid[destRank][destFile].pieceId == Piece.EMPTY:
             validMatrix[destRank][destFile] = MOVE
-        elif grid[destRank][destFile].pieceColor == Piece.WHITE:
-            validMatrix[destRank][destFile] = CAPTURE
-    # horizontal moves
-    if file > 0 and grid[rank][file-1].pieceId == Piece.EMPTY:
-        validMatrix[rank][file-1] = MOVE
-    if file < 7 and grid[rank][file+1].pieceId == Piece.EMPTY:
-        validMatrix[rank][file+1] = MOVE
     return validMatrix
 
 
-def findLieutenantAttacks(grid: list[list[Piece]],
+def findLieutenantAttacks(grid: list[list[Piece]] | Position,
                           rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a lieutenant at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -580,30 +604,21 @@ def findLieutenantAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.LIEUTENANT, rank * 8 + file,
+                                            grid.occupancy))
     # jumping diagonal move
-    for i in range(8):
-        destRank = rank + LIEUTENANT_R_OFFSETS[i]
-        destFile = file + LIEUTENANT_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        attackedMatrix[destRank, destFile] = 1
-    return attackedMatrix
-
-
-CAPTAIN_R_OFFSETS: tuple[int] = (-2, -1, 0, 0, +1, +2, 0, 0)
-CAPTAIN_F_OFFSETS: tuple[int] = (0, 0, -2, -1, 0, 0, +1, +2)
+    return LIEUTENANT_MATRICES[rank * 8 + file].copy()
 
 
-def findCaptainMoves(grid: list[list[Piece]],
+def findCaptainMoves(grid: list[list[Piece]] | Position,
                      rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a captain at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -611,29 +626,22 @@ def findCaptainMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.CAPTAIN, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
     # jumping cardinal move
-    for i in range(8):
-        destRank = rank + CAPTAIN_R_OFFSETS[i]
-        destFile = file + CAPTAIN_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        if grid[destRank][destFile].pieceId == Piece.EMPTY:
-            validMatrix[destRank][destFile] = MOVE
-        elif grid[destRank][destFile].pieceColor == Piece.WHITE:
-            validMatrix[destRank][destFile] = CAPTURE
+    _addLeaperMoves(grid, validMatrix, CAPTAIN_TARGETS[rank * 8 + file], Piece.WHITE)
     return validMatrix
 
 
-def findCaptainAttacks(grid: list[list[Piece]],
+def findCaptainAttacks(grid: list[list[Piece]] | Position,
                        rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a captain at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -641,26 +649,21 @@ def findCaptainAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.CAPTAIN, rank * 8 + file,
+                                            grid.occupancy))
     # jumping cardinal move
-    for i in range(8):
-        destRank = rank + CAPTAIN_R_OFFSETS[i]
-        destFile = file + CAPTAIN_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        attackedMatrix[destRank, destFile] = 1
-    return attackedMatrix
+    return CAPTAIN_MATRICES[rank * 8 + file].copy()
 
 
-def findGeneralMoves(grid: list[list[Piece]],
+def findGeneralMoves(grid: list[list[Piece]] | Position,
                      rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a general at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -668,50 +671,25 @@ def findGeneralMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.GENERAL, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
     # move like a rook
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * ROOK_R_OFFSETS[direction]
-            destFile = file + step * ROOK_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # piece of same color, stop
-            if grid[destRank][destFile].pieceColor == Piece.BLACK:
-                break
-            validMatrix[destRank][destFile] = MOVE
-            # piece of opposing color, stop (but mark valid)
-            if grid[destRank][destFile].pieceColor == Piece.WHITE:
-                validMatrix[destRank][destFile] = CAPTURE
-                break
+    _addSliderMoves(grid, validMatrix, ROOK_RAY_TARGETS[rank * 8 + file],
+                    Piece.WHITE)
     # move like a king
-    for direction in range(8):
-        destRank = rank + KING_R_OFFSETS[direction]
-        destFile = file + KING_F_OFFSETS[direction]
-        # out of bounds
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        # piece of same color, invalid
-        if grid[destRank][destFile].pieceColor == Piece.BLACK:
-            continue
-        if grid[destRank][destFile].pieceColor == Piece.EMPTY:
-            validMatrix[destRank][destFile] = MOVE
-        else:
-            validMatrix[destRank][destFile] = CAPTURE
+    _addLeaperMoves(grid, validMatrix, KING_TARGETS[rank * 8 + file], Piece.WHITE)
     return validMatrix
 
 
-def findGeneralAttacks(grid: list[list[Piece]],
+def findGeneralAttacks(grid: list[list[Piece]] | Position,
                        rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a general at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -719,40 +697,24 @@ def findGeneralAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
-    # move like a rook
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * ROOK_R_OFFSETS[direction]
-            destFile = file + step * ROOK_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            attackedMatrix[destRank, destFile] = 1
-            # piece blocking sight, stop
-            if grid[destRank][destFile].pieceId != Piece.EMPTY:
-                break
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.GENERAL, rank * 8 + file,
+                                            grid.occupancy))
     # move like a king
-    for direction in range(8):
-        destRank = rank + KING_R_OFFSETS[direction]
-        destFile = file + KING_F_OFFSETS[direction]
-        # out of bounds
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        attackedMatrix[destRank][destFile] = 1
+    attackedMatrix = KING_MATRICES[rank * 8 + file].copy()
+    # move like a rook
+    _addSliderAttacks(grid, attackedMatrix, ROOK_RAY_TARGETS[rank * 8 + file])
     return attackedMatrix
 
 
-def findWarlordMoves(grid: list[list[Piece]],
+def findWarlordMoves(grid: list[list[Piece]] | Position,
                      rank: int, file: int) -> list[list[int]]:
     """
     Find all legal moves for a warlord at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -760,46 +722,25 @@ def findWarlordMoves(grid: list[list[Piece]],
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        return _findPositionMoves(grid, Piece.WARLORD, rank, file)
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
     # move like a bishop
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * BISHOP_R_OFFSETS[direction]
-            destFile = file + step * BISHOP_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            # piece of same color, stop
-            if grid[destRank][destFile].pieceColor == Piece.BLACK:
-                break
-            validMatrix[destRank][destFile] = MOVE
-            # piece of opposing color, stop (but mark valid)
-            if grid[destRank][destFile].pieceColor == Piece.WHITE:
-                validMatrix[destRank][destFile] = CAPTURE
-                break
+    _addSliderMoves(grid, validMatrix, BISHOP_RAY_TARGETS[rank * 8 + file],
+                    Piece.WHITE)
     # move like a knight
-    for i in range(8):
-        destRank = rank + KNIGHT_R_OFFSETS[i]
-        destFile = file + KNIGHT_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        if grid[destRank][destFile].pieceId == Piece.EMPTY:
-            validMatrix[destRank][destFile] = MOVE
-        elif grid[destRank][destFile].pieceColor == Piece.WHITE:
-            validMatrix[destRank][destFile] = CAPTURE
+    _addLeaperMoves(grid, validMatrix, KNIGHT_TARGETS[rank * 8 + file], Piece.WHITE)
     return validMatrix
 
 
-def findWarlordAttacks(grid: list[list[Piece]],
+def findWarlordAttacks(grid: list[list[Piece]] | Position,
                        rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a warlord at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -807,59 +748,59 @@ def findWarlordAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    attackedMatrix = np.zeros((8, 8), dtype=int)
-    # move like a bishop
-    for direction in range(4):
-        for step in range(1, 8):
-            destRank = rank + step * BISHOP_R_OFFSETS[direction]
-            destFile = file + step * BISHOP_F_OFFSETS[direction]
-            # out of bounds, stop
-            if destRank < 0 or destRank > 7\
-                    or destFile < 0 or destFile > 7:
-                break
-            attackedMatrix[destRank, destFile] = 1
-            # piece blocking sight, stop
-            if grid[destRank][destFile].pieceId != Piece.EMPTY:
-                break
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.WARLORD, rank * 8 + file,
+                                            grid.occupancy))
     # move like a knight
-    for i in range(8):
-        destRank = rank + KNIGHT_R_OFFSETS[i]
-        destFile = file + KNIGHT_F_OFFSETS[i]
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        attackedMatrix[destRank, destFile] = 1
+    attackedMatrix = KNIGHT_MATRICES[rank * 8 + file].copy()
+    # move like a bishop
+    _addSliderAttacks(grid, attackedMatrix, BISHOP_RAY_TARGETS[rank * 8 + file])
     return attackedMatrix
 
 
-def findSpartanKingMoves(grid: list[list[Piece]],
+def findSpartanKingMoves(grid: list[list[Piece]] | Position,
                          rank: int, file: int,
-                         numSpartanKings: int) -> list[list[int]]:
+                         numSpartanKings: int,
+                         attacked: int = None) -> list[list[int]]:
     """
     Find all legal moves for a spartan king at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
+    numSpartanKings: int number of Spartan kings left
+    attacked: int = None bitboard of squares attacked by White; computed from
+    the board if not given
 
     Returns
     ---
     list[list[int]]: matrix of possible moves
     """
+    if isinstance(grid, Position):
+        validMatrix = _findPositionMoves(grid, Piece.SKING, rank, file)
+        # if we have 2 kings, we don't care about check
+        if numSpartanKings == 2:
+            attacked = 0
+        elif attacked is None:
+            attacked = findAttackedBits(grid, True)
+        while attacked:
+            low = attacked & -attacked
+            destRank, destFile = divmod(low.bit_length() - 1, 8)
+            validMatrix[destRank][destFile] = ILLEGAL
+            attacked ^= low
+        return validMatrix
     validMatrix = [[ILLEGAL]*8 for _ in range(8)]
     # if we have 2 kings, we don't care about check
-    attackedMatrix = np.zeros((8, 8), dtype=int) if numSpartanKings == 2\
-        else findAttackedSquares(grid, True)
+    if numSpartanKings == 2:
+        attackedMatrix = np.zeros((8, 8), dtype=int)
+    elif attacked is None:
+        attackedMatrix = findAttackedSquares(grid, True)
+    else:
+        attackedMatrix = bitsToMatrix(attacked)
     # normal directional moves
-    for direction in range(8):
-        destRank = rank + KING_R_OFFSETS[direction]
-        destFile = file + KING_F_OFFSETS[direction]
-        # out of bounds
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
+    for (destRank, destFile) in KING_TARGETS[rank * 8 + file]:
         # would be check, invalid
         if attackedMatrix[destRank, destFile]:
             continue
@@ -874,14 +815,14 @@ def findSpartanKingMoves(grid: list[list[Piece]],
     return validMatrix
 
 
-def findSpartanKingAttacks(grid: list[list[Piece]],
+def findSpartanKingAttacks(grid: list[list[Piece]] | Position,
                            rank: int, file: int) -> np.ndarray:
     """
     Find all attacked squares for a spartan king at the given board, rank, and file.
 
     Parameters
     ---
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     rank: int
     file: int
 
@@ -889,25 +830,19 @@ def findSpartanKingAttacks(grid: list[list[Piece]],
     ---
     np.ndarray: matrix of attacked squares
     """
-    # Thie is the exact same code as for a persian king
-    attackedMatrix = np.zeros((8, 8), dtype=int)
-    for direction in range(8):
-        destRank = rank + KING_R_OFFSETS[direction]
-        destFile = file + KING_F_OFFSETS[direction]
-        # out of bounds, stop
-        if destRank < 0 or destRank > 7\
-                or destFile < 0 or destFile > 7:
-            continue
-        # mark this square
-        attackedMatrix[destRank, destFile] = 1
-    return attackedMatrix
+    if isinstance(grid, Position):
+        return bitsToMatrix(pieceAttackBits(Piece.SKING, rank * 8 + file,
+                                            grid.occupancy))
+    # the same as for a persian king
+    return KING_MATRICES[rank * 8 + file].copy()
 
 
-def findAttackedSquares(grid: list[list[Piece]], whiteToMove: bool) -> np.ndarray:
+def findAttackedSquares(grid: list[list[Piece]] | Position,
+                        whiteToMove: bool) -> np.ndarray:
     """
     Finds all squares attacked by the selected player on a given board.
 
-    grid: list[list[Piece]] board state
+    grid: list[list[Piece]] | Position board state
     whiteToMove: bool True if White, False if Black
 
     Returns
@@ -915,6 +850,16 @@ def findAttackedSquares(grid: list[list[Piece]], whiteToMove: bool) -> np.ndarra
     np.ndarray: matrix of attacked squares
     """
     attacked = np.zeros((8, 8), dtype=int)
+    if isinstance(grid, Position):
+        occupied = grid.occupancy
+        for id in (Position.WHITE_IDS if whiteToMove else Position.BLACK_IDS):
+            bits = grid.bitboards[id]
+            while bits:
+                low = bits & -bits
+                attacked += bitsToMatrix(pieceAttackBits(id, low.bit_length() - 1,
+                                                         occupied))
+                bits ^= low
+        return attacked
     # Find squares that White (Persian pieces) are attacking
     if whiteToMove:
         for rank in range(8):
@@ -950,3 +895,730 @@ def findAttackedSquares(grid: list[list[Piece]], whiteToMove: bool) -> np.ndarra
                     case Piece.SKING:
                         attacked += findSpartanKingAttacks(grid, rank, file)
     return attacked
+
+
+# BITBOARDS
+# Squares are numbered rank * 8 + file, as in position.py. Everything below
+# lets the functions above run on a Position as well as on a grid.
+PAWN_ATTACK_BITS: list[int] = movetables.toBits(PAWN_ATTACK_TARGETS)
+HOPLITE_ATTACK_BITS: list[int] = movetables.toBits(HOPLITE_ATTACK_TARGETS)
+HOPLITE_STEP_BITS: list[int] = movetables.toBits(HOPLITE_STEP_TARGETS)
+HOPLITE_JUMP_BITS: list[int] = movetables.toBits(HOPLITE_JUMP_TARGETS)
+KNIGHT_BITS: list[int] = movetables.toBits(KNIGHT_TARGETS)
+KING_BITS: list[int] = movetables.toBits(KING_TARGETS)
+LIEUTENANT_BITS: list[int] = movetables.toBits(LIEUTENANT_TARGETS)
+LIEUTENANT_SIDE_BITS: list[int] = movetables.toBits(LIEUTENANT_SIDE_TARGETS)
+CAPTAIN_BITS: list[int] = movetables.toBits(CAPTAIN_TARGETS)
+# sliders' attacks are looked up in the tables of magics
+SLIDER_IDS: frozenset[int] = frozenset((Piece.BISHOP, Piece.ROOK, Piece.QUEEN,
+                                        Piece.GENERAL, Piece.WARLORD))
+ALL_SQUARES: int = (1 << 64) - 1
+
+
+def _betweenBits() -> list[list[int]]:
+    """
+    Build the table of squares strictly between two squares on a shared
+    rank, file or diagonal.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    list[list[int]]: bitboard for each pair of squares, 0 if they don't
+    share a line or are next to each other
+    """
+    between = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        for ray in QUEEN_RAY_TARGETS[square]:
+            bits = 0
+            for (rank, file) in ray:
+                between[square][rank * 8 + file] = bits
+                bits |= 1 << (rank * 8 + file)
+    return between
+
+
+BETWEEN_BITS: list[list[int]] = _betweenBits()
+
+
+def pieceAttackBits(pieceId: int, square: int, occupied: int) -> int:
+    """
+    Find all squares attacked by the given piece type from the given square.
+
+    Parameters
+    ---
+    pieceId: int piece type id number
+    square: int
+    occupied: int bitboard of occupied squares
+
+    Returns
+    ---
+    int: bitboard of attacked squares
+    """
+    match pieceId:
+        case Piece.PAWN:
+            return PAWN_ATTACK_BITS[square]
+        case Piece.KNIGHT:
+            return KNIGHT_BITS[square]
+        case Piece.BISHOP:
+            return magics.bishopAttacks(square, occupied)
+        case Piece.ROOK:
+            return magics.rookAttacks(square, occupied)
+        case Piece.QUEEN:
+            return magics.rookAttacks(square, occupied)\
+                | magics.bishopAttacks(square, occupied)
+        case Piece.PKING | Piece.SKING:
+            return KING_BITS[square]
+        case Piece.HOPLITE:
+            return HOPLITE_ATTACK_BITS[square]
+        case Piece.LIEUTENANT:
+            return LIEUTENANT_BITS[square]
+        case Piece.CAPTAIN:
+            return CAPTAIN_BITS[square]
+        case Piece.GENERAL:
+            return magics.rookAttacks(square, occupied)\
+                | KING_BITS[square]
+        case Piece.WARLORD:
+            return magics.bishopAttacks(square, occupied)\
+                | KNIGHT_BITS[square]
+    return 0
+
+
+def findAttackedBits(position: Position, whiteToMove: bool) -> int:
+    """
+    Finds all squares attacked by the selected player in a position.
+
+    Parameters
+    ---
+    position: Position
+    whiteToMove: bool True if White, False if Black
+
+    Returns
+    ---
+    int: bitboard of attacked squares
+    """
+    occupied = position.occupancy
+    attacked = 0
+    for id in (Position.WHITE_IDS if whiteToMove else Position.BLACK_IDS):
+        bits = position.bitboards[id]
+        while bits:
+            low = bits & -bits
+            attacked |= pieceAttackBits(id, low.bit_length() - 1, occupied)
+            bits ^= low
+    return attacked
+
+
+def findMoveBits(position: Position, pieceId: int, square: int) -> tuple[int, int]:
+    """
+    Find the pseudo-legal destinations of the given piece type from the given
+    square, not counting castling.
+
+    Parameters
+    ---
+    position: Position
+    pieceId: int piece type id number
+    square: int
+
+    Returns
+    ---
+    tuple[int, int]: bitboards of non-capturing moves and of captures
+    """
+    occupied = position.occupancy
+    empty = ~occupied
+    if pieceId < 10:
+        enemy = position.blackOccupancy
+    else:
+        enemy = position.whiteOccupancy
+
+    match pieceId:
+        case Piece.PAWN:
+            moves = 0
+            if square < 56 and empty >> (square + 8) & 1:
+                moves = 1 << (square + 8)
+                # starting double-step move
+                if 8 <= square < 16 and empty >> (square + 16) & 1:
+                    moves |= 1 << (square + 16)
+            return moves, PAWN_ATTACK_BITS[square] & enemy
+        case Piece.HOPLITE:
+            moves = HOPLITE_STEP_BITS[square]
+            # starting double-step jump
+            if 48 <= square < 56:
+                moves |= HOPLITE_JUMP_BITS[square]
+            return moves & empty, HOPLITE_ATTACK_BITS[square] & enemy
+        case Piece.LIEUTENANT:
+            return (LIEUTENANT_BITS[square] | LIEUTENANT_SIDE_BITS[square]) & empty,\
+                LIEUTENANT_BITS[square] & enemy
+    attacks = pieceAttackBits(pieceId, square, occupied)
+    return attacks & empty, attacks & enemy
+
+
+def bitsToMatrix(bits: int) -> np.ndarray:
+    """
+    Convert a bitboard to an 8x8 matrix indexed by rank and file.
+
+    Parameters
+    ---
+    bits: int bitboard
+
+    Returns
+    ---
+    np.ndarray: matrix with 1 on every square in the bitboard
+    """
+    return np.unpackbits(np.array([bits], dtype="<u8").view(np.uint8),
+                         bitorder="little").reshape(8, 8).astype(int)
+
+
+def _findPositionMoves(position: Position, pieceId: int,
+                       rank: int, file: int) -> list[list[int]]:
+    """
+    Find all moves for a piece type at the given position, rank, and file.
+    Shared by the findXMoves functions when given a Position.
+
+    Parameters
+    ---
+    position: Position
+    pieceId: int piece type id number
+    rank: int
+    file: int
+
+    Returns
+    ---
+    list[list[int]]: matrix of possible moves
+    """
+    moves, captures = findMoveBits(position, pieceId, rank * 8 + file)
+    # pawns and hoplites promote on their last rank
+    if pieceId == Piece.PAWN:
+        promotionRank = 7
+    elif pieceId == Piece.HOPLITE:
+        promotionRank = 0
+    else:
+        promotionRank = -1
+
+    validMatrix = [[ILLEGAL]*8 for _ in range(8)]
+    for bits, code, promotionCode in ((moves, MOVE, PROMOTE),
+                                      (captures, CAPTURE, PROMOTE_CAPTURE)):
+        while bits:
+            low = bits & -bits
+            destRank, destFile = divmod(low.bit_length() - 1, 8)
+            validMatrix[destRank][destFile] = promotionCode\
+                if destRank == promotionRank else code
+            bits ^= low
+    return validMatrix
+
+
+# MOVE LISTS
+# A move is packed into one int: start square | dest square << 6 |
+# move code << 12 | promotion piece id << 15. The promotion id is 0 for
+# moves that don't promote (a pawn is never a promotion choice). Castling
+# is encoded as the king's move, e1 to g1 or e1 to c1.
+WHITE_PROMOTION_IDS: tuple[int] = (Piece.QUEEN, Piece.KNIGHT,
+                                   Piece.ROOK, Piece.BISHOP)
+BLACK_PROMOTION_IDS: tuple[int] = (Piece.GENERAL, Piece.WARLORD,
+                                   Piece.CAPTAIN, Piece.LIEUTENANT)
+
+
+def encodeMove(start: int, dest: int, code: int, promotion: int = 0) -> int:
+    """
+    Pack a move into a single int.
+
+    Parameters
+    ---
+    start: int square the piece moves from
+    dest: int square the piece moves to
+    code: int move code (MOVE, CAPTURE, CASTLE, PROMOTE, PROMOTE_CAPTURE)
+    promotion: int = 0 id of the piece promoted to, 0 if not a promotion
+
+    Returns
+    ---
+    int: the encoded move
+    """
+    return start | dest << 6 | code << 12 | promotion << 15
+
+
+def moveStart(move: int) -> int:
+    """Returns the start square of an encoded move."""
+    return move & 63
+
+
+def moveDest(move: int) -> int:
+    """Returns the destination square of an encoded move."""
+    return move >> 6 & 63
+
+
+def moveCode(move: int) -> int:
+    """Returns the move code of an encoded move."""
+    return move >> 12 & 7
+
+
+def movePromotion(move: int) -> int:
+    """Returns the promotion piece id of an encoded move, 0 if none."""
+    return move >> 15
+
+
+def generatePseudoLegalMoves(position: Position) -> list[int]:
+    """
+    Find all moves for the side to move, ignoring whether they leave
+    the mover's king(s) in check. Castling is only generated when it is
+    fully legal.
+
+    Parameters
+    ---
+    position: Position
+
+    Returns
+    ---
+    list[int]: encoded moves
+    """
+    moves = []
+    white = position.whiteToMove
+    if white:
+        ids = Position.WHITE_IDS
+        promotionRank = 7
+        promotionIds = WHITE_PROMOTION_IDS
+    else:
+        ids = Position.BLACK_IDS
+        promotionRank = 0
+        promotionIds = BLACK_PROMOTION_IDS
+        # hoplites may only promote to a king once one has been taken
+        if position.blackKingCount < 2:
+            promotionIds += (Piece.SKING,)
+
+    for id in ids:
+        pieces = position.bitboards[id]
+        while pieces:
+            low = pieces & -pieces
+            start = low.bit_length() - 1
+            pieces ^= low
+            quiet, captures = findMoveBits(position, id, start)
+            for bits, code, promotionCode in ((quiet, MOVE, PROMOTE),
+                                              (captures, CAPTURE, PROMOTE_CAPTURE)):
+                while bits:
+                    low = bits & -bits
+                    dest = low.bit_length() - 1
+                    bits ^= low
+                    if (id == Piece.PAWN or id == Piece.HOPLITE)\
+                            and dest >> 3 == promotionRank:
+                        for promotion in promotionIds:
+                            moves.append(start | dest << 6 | promotionCode << 12
+                                         | promotion << 15)
+                    else:
+                        moves.append(start | dest << 6 | code << 12)
+
+    # castling; the king must still be on e1 for the rights to count
+    if white and (position.castleShortRight or position.castleLongRight)\
+            and position.squares[4] == Piece.PKING:
+        attacked = findAttackedBits(position, False)
+        if position.castleShortRight and position.squares[7] == Piece.ROOK\
+                and checkCastle(position, True, attacked):
+            moves.append(4 | 6 << 6 | CASTLE << 12)
+        if position.castleLongRight and position.squares[0] == Piece.ROOK\
+                and checkCastle(position, False, attacked):
+            moves.append(4 | 2 << 6 | CASTLE << 12)
+    return moves
+
+
+def findKingSafety(position: Position, king: int) -> tuple[int, int, dict[int, int]]:
+    """
+    Work out which moves of the side to move keep one of its kings out of
+    check, by finding what attacks the king and which pieces are pinned
+    to it.
+
+    Parameters
+    ---
+    position: Position
+    king: int square of a king of the side to move
+
+    Returns
+    ---
+    tuple[int, int, dict[int, int]]: (squares attacked by the opponent if
+    the king were not on the board, which it can't move to; squares any
+    other piece must move to: everywhere if the king is not in check, onto
+    the checker or between it and the king if it is checked once, nowhere
+    if it is checked twice; the squares each pinned piece can move to,
+    along the line between the king and the piece pinning it)
+    """
+    white = position.whiteToMove
+    bitboards = position.bitboards
+    kingBit = 1 << king
+    occupied = position.occupancy
+    if white:
+        enemyIds = Position.BLACK_IDS
+        friendly = position.whiteOccupancy
+        rookLike = bitboards[Piece.GENERAL]
+        bishopLike = bitboards[Piece.WARLORD]
+    else:
+        enemyIds = Position.WHITE_IDS
+        friendly = position.blackOccupancy
+        rookLike = bitboards[Piece.ROOK] | bitboards[Piece.QUEEN]
+        bishopLike = bitboards[Piece.BISHOP] | bitboards[Piece.QUEEN]
+
+    # without the king, sliders also attack the squares behind it
+    withoutKing = occupied & ~kingBit
+    attacked = 0
+    checkers = 0
+    checkMask = 0
+    for id in enemyIds:
+        bits = bitboards[id]
+        while bits:
+            low = bits & -bits
+            square = low.bit_length() - 1
+            attacks = pieceAttackBits(id, square, withoutKing)
+            attacked |= attacks
+            if attacks & kingBit:
+                checkers += 1
+                checkMask |= low
+                # lieutenants and captains jump, so only a slider's check
+                # can be blocked
+                if id in SLIDER_IDS:
+                    checkMask |= BETWEEN_BITS[king][square]
+            bits ^= low
+    if checkers == 0:
+        checkMask = ALL_SQUARES
+    elif checkers > 1:
+        checkMask = 0
+
+    # a piece is pinned if taking it off the board would let a slider see
+    # the king
+    pins = {}
+    for (lookUp, sliders) in ((magics.rookAttacks, rookLike),
+                              (magics.bishopAttacks, bishopLike)):
+        if not sliders:
+            continue
+        seen = lookUp(king, occupied)
+        pinners = lookUp(king, occupied & ~(seen & friendly)) & sliders & ~seen
+        while pinners:
+            low = pinners & -pinners
+            between = BETWEEN_BITS[king][low.bit_length() - 1]
+            pins[(between & friendly).bit_length() - 1] = between | low
+            pinners ^= low
+    return attacked, checkMask, pins
+
+
+def findLegalDestinations(position: Position) -> dict[int, int]:
+    """
+    Find where each piece of the side to move can go without breaking the
+    king safety rules: the Persian king may never be left attacked, and
+    the Spartans may not leave all of their remaining kings attacked. A
+    Spartan move is therefore allowed if it keeps either king safe.
+
+    Parameters
+    ---
+    position: Position
+
+    Returns
+    ---
+    dict[int, int]: bitboard of allowed destinations by start square, for
+    every piece of the side to move. The only legal moves these don't
+    cover are promotions to a second Spartan king, which can also be legal
+    by putting the new king somewhere safe; see isLegalMove.
+    """
+    white = position.whiteToMove
+    kings = position.bitboards[Piece.PKING if white else Piece.SKING]
+    friendly = position.whiteOccupancy if white else position.blackOccupancy
+    destinations = {}
+    while kings:
+        low = kings & -kings
+        king = low.bit_length() - 1
+        kings ^= low
+        attacked, checkMask, pins = findKingSafety(position, king)
+        bits = friendly
+        while bits:
+            piece = bits & -bits
+            start = piece.bit_length() - 1
+            bits ^= piece
+            if start == king:
+                allowed = ALL_SQUARES & ~attacked
+            else:
+                allowed = checkMask & pins.get(start, ALL_SQUARES)
+            destinations[start] = destinations.get(start, 0) | allowed
+    return destinations
+
+
+def isLegalMove(position: Position, move: int,
+                destinations: dict[int, int] = None) -> bool:
+    """
+    Check whether a pseudo-legal move keeps the mover's king safe: the
+    Persian king may never be left attacked, and the Spartans may not leave
+    all of their remaining kings attacked.
+
+    Parameters
+    ---
+    position: Position
+    move: int encoded pseudo-legal move
+    destinations: dict[int, int] = None findLegalDestinations of the
+    position, when checking many of its moves; without it, the move is
+    tried out on the position's bitboards
+
+    Returns
+    ---
+    bool: whether the move is legal
+    """
+    code = move >> 12 & 7
+    # castling is only generated when it is legal
+    if code == CASTLE:
+        return True
+    if destinations is not None:
+        if destinations.get(move & 63, 0) >> (move >> 6 & 63) & 1:
+            return True
+        # a new king may be safe even if the others are all attacked
+        if move >> 15 != Piece.SKING:
+            return False
+    start = move & 63
+    dest = move >> 6 & 63
+    startBit = 1 << start
+    destBit = 1 << dest
+    occupied = (position.occupancy & ~startBit) | destBit
+
+    white = position.whiteToMove
+    movedId = position.squares[start]
+    if white:
+        kings = position.bitboards[Piece.PKING]
+        if movedId == Piece.PKING:
+            kings = destBit
+        enemyIds = Position.BLACK_IDS
+    else:
+        kings = position.bitboards[Piece.SKING]
+        if movedId == Piece.SKING:
+            kings = (kings & ~startBit) | destBit
+        elif move >> 15 == Piece.SKING:
+            kings |= destBit
+        enemyIds = Position.WHITE_IDS
+
+    # squares attacked by the opponent after the move; a captured piece
+    # no longer attacks anything
+    attacked = 0
+    for id in enemyIds:
+        bits = position.bitboards[id] & ~destBit
+        while bits:
+            low = bits & -bits
+            attacked |= pieceAttackBits(id, low.bit_length() - 1, occupied)
+            bits ^= low
+
+    if white:
+        return not attacked & kings
+    return (attacked & kings).bit_count() != kings.bit_count()
+
+
+def isInCheck(position: Position) -> bool:
+    """
+    Check whether the side to move is in check. Spartans are only in check
+    when every remaining king is attacked, since with two kings they may
+    ignore a check on one of them.
+
+    Parameters
+    ---
+    position: Position
+
+    Returns
+    ---
+    bool
+    """
+    white = position.whiteToMove
+    kings = position.bitboards[Piece.PKING if white else Piece.SKING]
+    attacked = findAttackedBits(position, not white) & kings
+    return attacked != 0 and attacked.bit_count() == kings.bit_count()
+
+
+def generateLegalMoves(position: Position) -> list[int]:
+    """
+    Find all legal moves for the side to move.
+
+    Parameters
+    ---
+    position: Position
+
+    Returns
+    ---
+    list[int]: encoded moves; promotions appear once per promotion choice
+    """
+    destinations = findLegalDestinations(position)
+    return [move for move in generatePseudoLegalMoves(position)
+            if isLegalMove(position, move, destinations)]
+
+
+# coordinate notation, e.g. "e2e4" or "b2a1g" for a promotion
+PROMOTION_LETTERS: dict[int, str] = {Piece.QUEEN: "q", Piece.KNIGHT: "n",
+                                     Piece.ROOK: "r", Piece.BISHOP: "b",
+                                     Piece.GENERAL: "g", Piece.WARLORD: "w",
+                                     Piece.CAPTAIN: "c", Piece.LIEUTENANT: "l",
+                                     Piece.SKING: "k"}
+
+
+def moveToCoordinates(move: int) -> str:
+    """
+    Write an encoded move in coordinate notation.
+
+    Parameters
+    ---
+    move: int encoded move
+
+    Returns
+    ---
+    str: start and destination squares, plus the promotion letter if any
+    """
+    start = move & 63
+    dest = move >> 6 & 63
+    text = "abcdefgh"[start & 7] + str((start >> 3) + 1)\
+        + "abcdefgh"[dest & 7] + str((dest >> 3) + 1)
+    if move >> 15:
+        text += PROMOTION_LETTERS[move >> 15]
+    return text
+
+
+def findMove(position: Position, text: str) -> int:
+    """
+    Find the legal move matching the given coordinate notation.
+
+    Parameters
+    ---
+    position: Position
+    text: str move in coordinate notation
+
+    Returns
+    ---
+    int: the encoded move, None if no legal move matches
+    """
+    text = text.strip().lower()
+    for move in generateLegalMoves(position):
+        if moveToCoordinates(move) == text:
+            return move
+    return None
+
+
+# algebraic notation, e.g. "Nf3", "exd5", "Gxe4+", "b1=G" or "O-O"; pawns and
+# hoplites have no letter, and the Spartan pieces use the letters in the readme
+SAN_LETTERS: dict[int, str] = {Piece.KNIGHT: "N", Piece.BISHOP: "B",
+                               Piece.ROOK: "R", Piece.QUEEN: "Q",
+                               Piece.PKING: "K", Piece.LIEUTENANT: "L",
+                               Piece.CAPTAIN: "C", Piece.GENERAL: "G",
+                               Piece.WARLORD: "W", Piece.SKING: "K"}
+WHITE_SAN_IDS: dict[str, int] = {letter: id for (id, letter) in SAN_LETTERS.items()
+                                 if id < 10}
+BLACK_SAN_IDS: dict[str, int] = {letter: id for (id, letter) in SAN_LETTERS.items()
+                                 if id >= 10}
+
+
+def moveToSan(position: Position, move: int, legalMoves: list[int] = None) -> str:
+    """
+    Write a legal move in algebraic notation. Other pieces of the same kind
+    that can reach the same square are told apart by file, then by rank,
+    then by both. A "+" is added if the move checks (for the Spartans,
+    checks every remaining king) and a "#" if it mates.
+
+    Parameters
+    ---
+    position: Position before the move; restored before returning
+    move: int encoded legal move
+    legalMoves: list[int] = None legal moves of the position, if already known
+
+    Returns
+    ---
+    str
+    """
+    start = move & 63
+    dest = move >> 6 & 63
+    code = move >> 12 & 7
+    if code == CASTLE:
+        text = "O-O" if dest == 6 else "O-O-O"
+    else:
+        id = position.squares[start]
+        capture = code == CAPTURE or code == PROMOTE_CAPTURE
+        if legalMoves is None:
+            legalMoves = generateLegalMoves(position)
+        # pieces of the same kind that can also move to dest
+        rivals = [other & 63 for other in legalMoves
+                  if other >> 6 & 63 == dest and other != move
+                  and other >> 15 == move >> 15
+                  and position.squares[other & 63] == id]
+        if (id == Piece.PAWN or id == Piece.HOPLITE) and capture:
+            prefix = "abcdefgh"[start & 7]
+        elif not rivals:
+            prefix = ""
+        elif all(other & 7 != start & 7 for other in rivals):
+            prefix = "abcdefgh"[start & 7]
+        elif all(other >> 3 != start >> 3 for other in rivals):
+            prefix = str((start >> 3) + 1)
+        else:
+            prefix = "abcdefgh"[start & 7] + str((start >> 3) + 1)
+        text = SAN_LETTERS.get(id, "") + prefix + ("x" if capture else "")\
+            + "abcdefgh"[dest & 7] + str((dest >> 3) + 1)
+        if move >> 15:
+            text += "=" + SAN_LETTERS[move >> 15]
+
+    position.makeMove(move)
+    if isInCheck(position):
+        # mate if the opponent has no legal reply
+        mate = not any(isLegalMove(position, reply)
+                       for reply in generatePseudoLegalMoves(position))
+        text += "#" if mate else "+"
+    position.unmakeMove()
+    return text
+
+
+def findSanMove(position: Position, text: str, legalMoves: list[int] = None) -> int:
+    """
+    Find the legal move matching the given algebraic notation. Check marks
+    and annotations ("+", "#", "!", "?") are ignored, "0-0" is accepted for
+    "O-O", and the "=" before a promotion may be left out.
+
+    Parameters
+    ---
+    position: Position
+    text: str move in algebraic notation
+    legalMoves: list[int] = None legal moves of the position, if already known
+
+    Returns
+    ---
+    int: the encoded move, None if no legal move matches or several do
+    """
+    text = text.rstrip("+#!?")
+    # without a legal move list, only the moves matching the text are
+    # checked for legality, which is much faster than listing every one
+    checkLegality = legalMoves is None
+    if checkLegality:
+        legalMoves = generatePseudoLegalMoves(position)
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        dest = 6 if len(text) == 3 else 2
+        # castling is only generated when it is legal
+        for move in legalMoves:
+            if move >> 12 & 7 == CASTLE and move >> 6 & 63 == dest:
+                return move
+        return None
+
+    letterIds = WHITE_SAN_IDS if position.whiteToMove else BLACK_SAN_IDS
+    promotion = 0
+    if len(text) > 2 and text[-1] in letterIds:
+        promotion = letterIds[text[-1]]
+        text = text[:-2] if text[-2] == "=" else text[:-1]
+    if len(text) < 2 or text[-2] not in "abcdefgh" or text[-1] not in "12345678":
+        return None
+    dest = "12345678".index(text[-1]) * 8 + "abcdefgh".index(text[-2])
+
+    rest = text[:-2].replace("x", "")
+    if rest and rest[0] in letterIds:
+        id = letterIds[rest[0]]
+        rest = rest[1:]
+    else:
+        id = Piece.PAWN if position.whiteToMove else Piece.HOPLITE
+    startFile = startRank = None
+    for char in rest:
+        if char in "abcdefgh":
+            startFile = "abcdefgh".index(char)
+        elif char in "12345678":
+            startRank = "12345678".index(char)
+        else:
+            return None
+
+    found = None
+    for move in legalMoves:
+        start = move & 63
+        if move >> 6 & 63 == dest and move >> 15 == promotion\
+                and position.squares[start] == id\
+                and (startFile is None or start & 7 == startFile)\
+                and (startRank is None or start >> 3 == startRank)\
+                and (not checkLegality or isLegalMove(position, move)):
+            if found is not None:
+                return None
+            found = move
+    return found
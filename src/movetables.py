@@ -0,0 +1,124 @@
+#!usr/bin/env python3
+"""Precomputed move tables for SpartanChess, built once at import.
+
+For each of the 64 squares (numbered rank * 8 + file, as in position.py),
+the tables hold the squares a piece there can jump to, and the rays a
+slider there moves along, as (rank, file) pairs that are all on the board.
+Move generators iterate over them instead of adding offsets and checking
+bounds."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# OFFSETS
+# each piece's moves as rank offsets and matching file offsets
+KNIGHT_R_OFFSETS: tuple[int] = (-2, -2, -1, -1, +1, +1, +2, +2)
+KNIGHT_F_OFFSETS: tuple[int] = (-1, +1, -2, +2, -2, +2, -1, +1)
+BISHOP_R_OFFSETS: tuple[int] = (-1, -1, +1, +1)
+BISHOP_F_OFFSETS: tuple[int] = (-1, +1, -1, +1)
+ROOK_R_OFFSETS: tuple[int] = (0, 0, +1, -1)
+ROOK_F_OFFSETS: tuple[int] = (+1, -1, 0, 0)
+# note that these are just the union of rook and bishop offset lists
+QUEEN_R_OFFSETS: tuple[int] = (0, 0, +1, -1, -1, -1, +1, +1)
+QUEEN_F_OFFSETS: tuple[int] = (+1, -1, 0, 0, -1, +1, -1, +1)
+# these are the same as the queen offsets
+KING_R_OFFSETS: tuple[int] = (0, 0, +1, -1, -1, -1, +1, +1)
+KING_F_OFFSETS: tuple[int] = (+1, -1, 0, 0, -1, +1, -1, +1)
+LIEUTENANT_R_OFFSETS: tuple[int] = (-2, -2, -1, -1, +1, +1, +2, +2)
+LIEUTENANT_F_OFFSETS: tuple[int] = (-2, +2, -1, +1, -1, +1, -2, +2)
+CAPTAIN_R_OFFSETS: tuple[int] = (-2, -1, 0, 0, +1, +2, 0, 0)
+CAPTAIN_F_OFFSETS: tuple[int] = (0, 0, -2, -1, 0, 0, +1, +2)
+
+
+def buildLeaperTable(rOffsets: tuple[int],
+                     fOffsets: tuple[int]) -> tuple[tuple[tuple[int, int]]]:
+    """
+    Build the per-square targets of a piece that jumps by fixed offsets.
+
+    Parameters
+    ---
+    rOffsets: tuple[int] rank offsets of each jump
+    fOffsets: tuple[int] file offsets of each jump
+
+    Returns
+    ---
+    tuple[tuple[tuple[int, int]]]: (rank, file) of every jump that stays on
+    the board, for each of the 64 squares
+    """
+    table = []
+    for square in range(64):
+        rank, file = divmod(square, 8)
+        table.append(tuple((rank + rOffset, file + fOffset)
+                           for (rOffset, fOffset) in zip(rOffsets, fOffsets)
+                           if 0 <= rank + rOffset < 8 and 0 <= file + fOffset < 8))
+    return tuple(table)
+
+
+def buildRayTable(rOffsets: tuple[int],
+                  fOffsets: tuple[int]) -> tuple[tuple[tuple[tuple[int, int]]]]:
+    """
+    Build the per-square rays of a slider.
+
+    Parameters
+    ---
+    rOffsets: tuple[int] rank step of each direction
+    fOffsets: tuple[int] file step of each direction
+
+    Returns
+    ---
+    tuple[tuple[tuple[tuple[int, int]]]]: for each of the 64 squares, one ray
+    per direction, in the order of the offsets; each ray lists (rank, file)
+    going outwards and is empty at the edge of the board
+    """
+    table = []
+    for square in range(64):
+        rank, file = divmod(square, 8)
+        rays = []
+        for (rOffset, fOffset) in zip(rOffsets, fOffsets):
+            ray = []
+            destRank = rank + rOffset
+            destFile = file + fOffset
+            while 0 <= destRank < 8 and 0 <= destFile < 8:
+                ray.append((destRank, destFile))
+                destRank += rOffset
+                destFile += fOffset
+            rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return tuple(table)
+
+
+def toBits(table: tuple[tuple[tuple[int, int]]]) -> list[int]:
+    """
+    Convert a per-square table of targets (or one ray direction of a ray
+    table) to bitboards.
+
+    Parameters
+    ---
+    table: tuple[tuple[tuple[int, int]]] (rank, file) targets of each square
+
+    Returns
+    ---
+    list[int]: bitboard of the targets of each square
+    """
+    return [sum(1 << (rank * 8 + file) for (rank, file) in targets)
+            for targets in table]
+
+
+# LEAPERS
+KNIGHT_TARGETS: tuple = buildLeaperTable(KNIGHT_R_OFFSETS, KNIGHT_F_OFFSETS)
+KING_TARGETS: tuple = buildLeaperTable(KING_R_OFFSETS, KING_F_OFFSETS)
+LIEUTENANT_TARGETS: tuple = buildLeaperTable(LIEUTENANT_R_OFFSETS,
+                                             LIEUTENANT_F_OFFSETS)
+LIEUTENANT_SIDE_TARGETS: tuple = buildLeaperTable((0, 0), (-1, +1))
+"""sideways steps, which cannot capture"""
+CAPTAIN_TARGETS: tuple = buildLeaperTable(CAPTAIN_R_OFFSETS, CAPTAIN_F_OFFSETS)
+PAWN_ATTACK_TARGETS: tuple = buildLeaperTable((+1, +1), (-1, +1))
+HOPLITE_ATTACK_TARGETS: tuple = buildLeaperTable((-1,), (0,))
+HOPLITE_STEP_TARGETS: tuple = buildLeaperTable((-1, -1), (-1, +1))
+HOPLITE_JUMP_TARGETS: tuple = buildLeaperTable((-2, -2), (-2, +2))
+"""double-step jumps, only allowed from the hoplites' starting rank"""
+
+# SLIDERS
+BISHOP_RAYS: tuple = buildRayTable(BISHOP_R_OFFSETS, BISHOP_F_OFFSETS)
+ROOK_RAYS: tuple = buildRayTable(ROOK_R_OFFSETS, ROOK_F_OFFSETS)
+QUEEN_RAYS: tuple = buildRayTable(QUEEN_R_OFFSETS, QUEEN_F_OFFSETS)
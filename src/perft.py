@@ -0,0 +1,140 @@
+#!usr/bin/env python3
+"""Perft for SpartanChess: counts every move path to a given depth, split by
+move code. Used to check the move generator against known node counts and
+to measure its speed.
+
+Usage (from the src directory):
+    python perft.py 3
+    python perft.py 4 --divide
+    python perft.py 3 --moves e2e4 d7c6
+
+Reference counts from the starting position are listed in the readme."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import argparse
+import sys
+from time import perf_counter
+
+# INTERNAL IMPORTS
+from position import Position
+import fen
+import moverules as mr
+
+CODE_NAMES: tuple[str] = ("ILLEGAL", "MOVE", "CAPTURE", "CASTLE",
+                          "PROMOTE", "PROMOTE_CAPTURE")
+
+
+def perft(position: Position, depth: int, counts: list[int] = None) -> list[int]:
+    """
+    Count the leaf nodes reached from the given position.
+
+    Parameters
+    ---
+    position: Position to search from; restored before returning
+    depth: int number of plies to play, at least 1
+    counts: list[int] = None running totals to add to
+
+    Returns
+    ---
+    list[int]: number of leaf nodes indexed by the code of the last move
+    """
+    if counts is None:
+        counts = [0] * len(CODE_NAMES)
+    moves = mr.generateLegalMoves(position)
+    # count the last ply straight from the move list
+    if depth == 1:
+        for move in moves:
+            counts[move >> 12 & 7] += 1
+        return counts
+    for move in moves:
+        position.makeMove(move)
+        perft(position, depth - 1, counts)
+        position.unmakeMove()
+    return counts
+
+
+def divide(position: Position, depth: int) -> list[tuple[int, list[int]]]:
+    """
+    Run perft separately below each legal move of the given position.
+
+    Parameters
+    ---
+    position: Position to search from; restored before returning
+    depth: int number of plies to play including the first move, at least 1
+
+    Returns
+    ---
+    list[tuple[int, list[int]]]: (encoded move, counts) for every legal move
+    """
+    results = []
+    for move in mr.generateLegalMoves(position):
+        if depth == 1:
+            counts = [0] * len(CODE_NAMES)
+            counts[move >> 12 & 7] = 1
+        else:
+            position.makeMove(move)
+            counts = perft(position, depth - 1)
+            position.unmakeMove()
+        results.append((move, counts))
+    return results
+
+
+def main() -> None:
+    """
+    Command-line entry point.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Count move paths from a SpartanChess position.")
+    parser.add_argument("depth", type=int, help="number of plies, at least 1")
+    parser.add_argument("--moves", nargs="*", default=[], metavar="MOVE",
+                        help="moves in coordinate notation (e.g. e2e4, b2a1g) "
+                        "played from the --fen position first")
+    parser.add_argument("--fen", default=fen.STARTING_FEN,
+                        help="position to start from (default: the starting position)")
+    parser.add_argument("--divide", action="store_true",
+                        help="list the node count below each move")
+    args = parser.parse_args()
+    if args.depth < 1:
+        parser.error("depth must be at least 1")
+
+    try:
+        position = fen.positionFromFen(args.fen)
+    except ValueError as error:
+        parser.error(str(error))
+    for text in args.moves:
+        move = mr.findMove(position, text)
+        if move is None:
+            sys.exit(f"illegal move: {text}")
+        position.makeMove(move)
+
+    startTime = perf_counter()
+    if args.divide:
+        counts = [0] * len(CODE_NAMES)
+        for move, moveCounts in divide(position, args.depth):
+            print(f"{mr.moveToCoordinates(move)}: {sum(moveCounts)}")
+            counts = [a + b for a, b in zip(counts, moveCounts)]
+        print()
+    else:
+        counts = perft(position, args.depth)
+    elapsed = perf_counter() - startTime
+
+    nodes = sum(counts)
+    for code in range(mr.MOVE, len(CODE_NAMES)):
+        print(f"{CODE_NAMES[code]:<16}{counts[code]:>12}")
+    print(f"{'nodes':<16}{nodes:>12}")
+    print(f"{elapsed:.3f} s, {nodes / max(elapsed, 1e-9):.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!usr/bin/env python3
+"""Reading and writing SpartanChess game records in a PGN-style format:
+tag pairs such as [White "Ann"], then the moves in algebraic notation
+(see moverules.moveToSan) with move numbers, then the result. A game that
+does not start from the starting position has a FEN tag (see fen).
+
+Files are read one game at a time, so game databases of any size can be
+iterated without loading them into memory.
+
+Usage (from the src directory):
+    python pgn.py games.pgn"""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import argparse
+import re
+import sys
+from time import perf_counter
+from typing import Iterator, TextIO
+
+# INTERNAL IMPORTS
+from position import Position
+import fen
+import moverules as mr
+
+RESULTS: tuple[str] = ("1-0", "0-1", "1/2-1/2", "*")
+TAG_ORDER: tuple[str] = ("Event", "Site", "Date", "Round", "White", "Black",
+                         "Result")
+"""tags written first, in this order; any others follow"""
+LINE_LENGTH: int = 79
+
+_TAG_PATTERN: re.Pattern = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_TOKEN_PATTERN: re.Pattern = re.compile(r"[{}();]|[^\s{}();]+")
+_MOVE_NUMBER_PATTERN: re.Pattern = re.compile(r"\d+\.+")
+
+
+def writeGame(file: TextIO, sanMoves: list[str], result: str = "*",
+              tags: dict[str, str] = None) -> None:
+    """
+    Write one game record.
+
+    Parameters
+    ---
+    file: TextIO to write to
+    sanMoves: list[str] moves in algebraic notation
+    result: str = "*" one of RESULTS
+    tags: dict[str, str] = None tag pairs; the FEN tag, if any, sets where
+    the move numbers start
+
+    Returns
+    ---
+    None
+    """
+    tags = dict(tags or {})
+    tags["Result"] = result
+    for name in TAG_ORDER:
+        tags.setdefault(name, "?")
+    for name in TAG_ORDER + tuple(sorted(set(tags) - set(TAG_ORDER))):
+        value = tags[name].replace("\\", "\\\\").replace('"', '\\"')
+        file.write(f'[{name} "{value}"]\n')
+    file.write("\n")
+
+    whiteToMove = True
+    number = 1
+    if "FEN" in tags:
+        start = fen.positionFromFen(tags["FEN"])
+        whiteToMove = start.whiteToMove
+        number = start.fullmoveNumber
+    tokens = []
+    for (i, san) in enumerate(sanMoves):
+        if whiteToMove:
+            tokens.append(f"{number}.")
+        elif i == 0:
+            tokens.append(f"{number}...")
+        tokens.append(san)
+        if not whiteToMove:
+            number += 1
+        whiteToMove = not whiteToMove
+    tokens.append(result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            file.write(line + "\n")
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    file.write(line + "\n\n")
+
+
+def readGames(file: TextIO) -> Iterator[tuple[dict[str, str], list[str], str]]:
+    """
+    Read game records one at a time. Comments, variations, annotation
+    glyphs and move numbers are skipped.
+
+    Parameters
+    ---
+    file: TextIO to read from
+
+    Returns
+    ---
+    Iterator[tuple[dict[str, str], list[str], str]]: (tags, moves in
+    algebraic notation, result) for every game; the result is "*" if the
+    record doesn't give one
+    """
+    tags = {}
+    moves = []
+    inComment = False
+    variationDepth = 0
+    for line in file:
+        if inComment:
+            end = line.find("}")
+            if end == -1:
+                continue
+            inComment = False
+            line = line[end + 1:]
+        elif line.startswith("["):
+            match = _TAG_PATTERN.match(line)
+            if match is not None and variationDepth == 0:
+                # tags after moves start the next game
+                if moves:
+                    yield (tags, moves, "*")
+                    tags = {}
+                    moves = []
+                tags[match.group(1)] = re.sub(r"\\(.)", r"\1", match.group(2))
+                continue
+        elif line.startswith("%"):
+            # escaped line
+            continue
+
+        tokens = _TOKEN_PATTERN.findall(line)
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            i += 1
+            if inComment:
+                inComment = token != "}"
+            elif token == "{":
+                inComment = True
+            elif token == ";":
+                break
+            elif token == "(":
+                variationDepth += 1
+            elif token == ")":
+                variationDepth = max(0, variationDepth - 1)
+            elif variationDepth or token.startswith("$"):
+                continue
+            elif token in RESULTS:
+                yield (tags, moves, token)
+                tags = {}
+                moves = []
+            else:
+                # move numbers may be written against the move, as in "1.e4"
+                token = _MOVE_NUMBER_PATTERN.sub("", token, count=1)
+                if token:
+                    moves.append(token)
+    if tags or moves:
+        yield (tags, moves, "*")
+
+
+def decodeMoves(tags: dict[str, str], sanMoves: list[str]) -> tuple[Position, list[int]]:
+    """
+    Play through a game record, matching every move against the legal moves.
+
+    Parameters
+    ---
+    tags: dict[str, str] the game's tags; it starts from the FEN tag if
+    there is one, from the starting position otherwise
+    sanMoves: list[str] moves in algebraic notation
+
+    Returns
+    ---
+    tuple[Position, list[int]]: final position and the encoded moves
+
+    Raises
+    ---
+    ValueError if the FEN tag is invalid or a move is illegal or ambiguous
+    """
+    position = fen.positionFromFen(tags.get("FEN", fen.STARTING_FEN))
+    moves = []
+    for san in sanMoves:
+        move = mr.findSanMove(position, san)
+        if move is None:
+            raise ValueError(f"illegal or ambiguous move {san} at ply {len(moves) + 1}")
+        position.makeMove(move)
+        moves.append(move)
+    return (position, moves)
+
+
+def main() -> None:
+    """
+    Command-line entry point: check that every game in a file can be played
+    through.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Check the games of a SpartanChess PGN file.")
+    parser.add_argument("path", help="PGN file")
+    args = parser.parse_args()
+
+    startTime = perf_counter()
+    games = invalid = plies = 0
+    with open(args.path, encoding="utf-8") as file:
+        for (tags, sanMoves, result) in readGames(file):
+            games += 1
+            try:
+                plies += len(decodeMoves(tags, sanMoves)[1])
+            except ValueError as error:
+                invalid += 1
+                print(f"game {games}: {error}")
+    elapsed = perf_counter() - startTime
+
+    print(f"{games} games, {invalid} invalid, {plies} plies")
+    print(f"{elapsed:.3f} s, {games / max(elapsed, 1e-9):.1f} games/s")
+    if invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,10 @@
 #!usr/bin/env python3
-"""The pieces for SpartanChess."""
+"""The pieces for SpartanChess. Drawing lives in piecesprite so that the
+rules can be used without pygame."""
 
 __author__ = "Chris Bao"
 __version__ = "1.0"
 
-# IMPORTS
-import pygame
-
 
 class Piece:
     #############
@@ -32,141 +30,58 @@ class Piece:
     WARLORD: int = 14
     SKING: int = 15
 
-    X_OFFSET: int = 440
-    """displacement between board and left side of window"""
-    Y_OFFSET: int = 90
-    """displacement between board and top of window"""
-
-    SIZE: int = 90
-    """size of piece icons and board squares"""
-
-    ICON_FILE_MAP: dict[int, str] = {
-        PAWN: "../img/pawn.png",
-        KNIGHT: "../img/knight.png",
-        BISHOP: "../img/bishop.png",
-        ROOK: "../img/rook.png",
-        QUEEN: "../img/queen.png",
-        PKING: "../img/pking.png",
-
-        HOPLITE: "../img/hoplite.png",
-        LIEUTENANT: "../img/lieutenant.png",
-        CAPTAIN: "../img/captain.png",
-        GENERAL: "../img/general.png",
-        WARLORD: "../img/warlord.png",
-        SKING: "../img/sking.png",
-    }
-
-    SMALL_ICON_FILE_MAP: dict[int, str] = {
-        PAWN: "../icon/pawn.png",
-        KNIGHT: "../icon/knight.png",
-        BISHOP: "../icon/bishop.png",
-        ROOK: "../icon/rook.png",
-        QUEEN: "../icon/queen.png",
-        PKING: "../icon/pking.png",
-
-        HOPLITE: "../icon/hoplite.png",
-        LIEUTENANT: "../icon/lieutenant.png",
-        CAPTAIN: "../icon/captain.png",
-        GENERAL: "../icon/general.png",
-        WARLORD: "../icon/warlord.png",
-        SKING: "../icon/sking.png",
-    }
-
     ######################
     # STATIC VARIABLES #
     ######################
-    icons: dict[int, pygame.Surface] = {}
-    smallIcons: dict[int, pygame.Surface] = {}
+    instances: dict[int, "Piece"] = {}
+    """the shared instance of each piece id"""
 
     ######################
     # INSTANCE VARIABLES #
     ######################
+    # Pieces are immutable and shared: Piece(id) always returns the same
+    # instance for the same id. Where a piece stands is kept by the board
+    # holding it, not by the piece.
+    __slots__ = ("pieceId", "pieceColor")
     pieceId: int
-    pieceColor: bool
-    pieceRank: int
-    pieceFile: int
-    smallIcon: bool
+    pieceColor: int
 
     ###############
     # CONSTRUCTOR #
     ###############
-    def __init__(self, id: int, rank: int = 0, file: int = 0, smallIcon: bool = False) -> None:
+    def __new__(cls, id: int) -> "Piece":
         """
-        Constructor.
+        Constructor. Returns the shared piece with the given id, creating it
+        the first time it is asked for.
 
         Parameters
         ---
         id: int piece type id number
-        rank: int
-        file: int
-        """
-        self.pieceId = id
-        if id == Piece.EMPTY:
-            self.pieceColor = Piece.EMPTY
-        elif id < 10:
-            self.pieceColor = Piece.WHITE
-        else:
-            self.pieceColor = Piece.BLACK
-        self.pieceRank = rank
-        self.pieceFile = file
-        self.smallIcon = smallIcon
-
-    ###########
-    # METHODS #
-    ###########
-    def loadIcons() -> None:
-        """
-        Loads the images for the pieces into memory.
-
-        Parameters
-        ---
-        (no parameters)
 
         Returns
         ---
-        None
+        Piece
         """
-        # Persian (white) pieces
-        for i in range(0, 6):
-            Piece.icons[i] = pygame.image.load(
-                Piece.ICON_FILE_MAP[i]).convert_alpha()
-
-        # Spartan (black) pieces
-        for i in range(10, 16):
-            Piece.icons[i] = pygame.image.load(
-                Piece.ICON_FILE_MAP[i]).convert_alpha()
-
-        # Small icons
-        for i in range(0, 6):
-            Piece.smallIcons[i] = pygame.image.load(
-                Piece.SMALL_ICON_FILE_MAP[i]).convert_alpha()
-        for i in range(10, 16):
-            Piece.smallIcons[i] = pygame.image.load(
-                Piece.SMALL_ICON_FILE_MAP[i]).convert_alpha()
-
-    def draw(self, surface: pygame.Surface,
-             forceX: int = None, forceY: int = None) -> None:
-        """
-        Draw self to given surface.
-
-        Parameters
-        ---
-        surface: pygame.Surface to draw on
-        forceX: int = None force x-position (center of icon)
-        forceY: int = None force y-position (center of icon)
+        piece = cls.instances.get(id)
+        if piece is None:
+            piece = object.__new__(cls)
+            object.__setattr__(piece, "pieceId", id)
+            if id == Piece.EMPTY:
+                color = Piece.EMPTY
+            elif id < 10:
+                color = Piece.WHITE
+            else:
+                color = Piece.BLACK
+            object.__setattr__(piece, "pieceColor", color)
+            cls.instances[id] = piece
+        return piece
 
-        Returns
-        ---
-        None
-        """
-        if self.pieceId == Piece.EMPTY:
-            return
+    ###########
+    # METHODS #
+    ###########
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
-        if forceX is None or forceY is None:
-            surface.blit(Piece.smallIcons[self.pieceId] if self.smallIcon else Piece.icons[self.pieceId],
-                         (Piece.X_OFFSET + Piece.SIZE * self.pieceFile,
-                         Piece.Y_OFFSET + Piece.SIZE * (7-self.pieceRank)))
-        else:
-            surface.blit(Piece.smallIcons[self.pieceId] if self.smallIcon else Piece.icons[self.pieceId],
-                         (forceX - Piece.SIZE/(4 if self.smallIcon else 2),
-                          forceY - Piece.SIZE/(4 if self.smallIcon else 2)))
+    def __reduce__(self) -> tuple:
+        # copies and unpickled pieces are the shared instance too
+        return (type(self), (self.pieceId,))
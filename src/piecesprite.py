@@ -0,0 +1,172 @@
+#!usr/bin/env python3
+"""Drawable pieces for SpartanChess: the pygame layer on top of Piece."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import pygame
+
+# INTERNAL IMPORTS
+from piece import Piece
+
+
+class PieceSprite(Piece):
+    #############
+    # CONSTANTS #
+    #############
+    X_OFFSET: int = 440
+    """displacement between board and left side of window"""
+    Y_OFFSET: int = 90
+    """displacement between board and top of window"""
+
+    SIZE: int = 90
+    """size of piece icons and board squares"""
+
+    ICON_FILE_MAP: dict[int, str] = {
+        Piece.PAWN: "../img/pawn.png",
+        Piece.KNIGHT: "../img/knight.png",
+        Piece.BISHOP: "../img/bishop.png",
+        Piece.ROOK: "../img/rook.png",
+        Piece.QUEEN: "../img/queen.png",
+        Piece.PKING: "../img/pking.png",
+
+        Piece.HOPLITE: "../img/hoplite.png",
+        Piece.LIEUTENANT: "../img/lieutenant.png",
+        Piece.CAPTAIN: "../img/captain.png",
+        Piece.GENERAL: "../img/general.png",
+        Piece.WARLORD: "../img/warlord.png",
+        Piece.SKING: "../img/sking.png",
+    }
+
+    SMALL_ICON_FILE_MAP: dict[int, str] = {
+        Piece.PAWN: "../icon/pawn.png",
+        Piece.KNIGHT: "../icon/knight.png",
+        Piece.BISHOP: "../icon/bishop.png",
+        Piece.ROOK: "../icon/rook.png",
+        Piece.QUEEN: "../icon/queen.png",
+        Piece.PKING: "../icon/pking.png",
+
+        Piece.HOPLITE: "../icon/hoplite.png",
+        Piece.LIEUTENANT: "../icon/lieutenant.png",
+        Piece.CAPTAIN: "../icon/captain.png",
+        Piece.GENERAL: "../icon/general.png",
+        Piece.WARLORD: "../icon/warlord.png",
+        Piece.SKING: "../icon/sking.png",
+    }
+
+    ######################
+    # STATIC VARIABLES #
+    ######################
+    icons: dict[int, pygame.Surface] = {}
+    smallIcons: dict[int, pygame.Surface] = {}
+    instances: dict[tuple[int, bool], "PieceSprite"] = {}
+    """the shared sprite of each piece id and icon size"""
+
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    __slots__ = ("smallIcon",)
+    smallIcon: bool
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __new__(cls, id: int, smallIcon: bool = False) -> "PieceSprite":
+        """
+        Constructor. Like Piece, sprites are shared: this returns the same
+        sprite every time for the same arguments.
+
+        Parameters
+        ---
+        id: int piece type id number
+        smallIcon: bool = False draw with the small (captured piece) icon
+
+        Returns
+        ---
+        PieceSprite
+        """
+        sprite = cls.instances.get((id, smallIcon))
+        if sprite is None:
+            sprite = object.__new__(cls)
+            object.__setattr__(sprite, "pieceId", id)
+            object.__setattr__(sprite, "pieceColor", Piece(id).pieceColor)
+            object.__setattr__(sprite, "smallIcon", smallIcon)
+            cls.instances[(id, smallIcon)] = sprite
+        return sprite
+
+    ###########
+    # METHODS #
+    ###########
+    def loadIcons() -> None:
+        """
+        Loads the images for the pieces into memory.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        # Persian (white) pieces
+        for i in range(0, 6):
+            PieceSprite.icons[i] = pygame.image.load(
+                PieceSprite.ICON_FILE_MAP[i]).convert_alpha()
+
+        # Spartan (black) pieces
+        for i in range(10, 16):
+            PieceSprite.icons[i] = pygame.image.load(
+                PieceSprite.ICON_FILE_MAP[i]).convert_alpha()
+
+        # Small icons
+        for i in range(0, 6):
+            PieceSprite.smallIcons[i] = pygame.image.load(
+                PieceSprite.SMALL_ICON_FILE_MAP[i]).convert_alpha()
+        for i in range(10, 16):
+            PieceSprite.smallIcons[i] = pygame.image.load(
+                PieceSprite.SMALL_ICON_FILE_MAP[i]).convert_alpha()
+
+    def __reduce__(self) -> tuple:
+        return (type(self), (self.pieceId, self.smallIcon))
+
+    def draw(self, surface: pygame.Surface, centerX: int, centerY: int) -> None:
+        """
+        Draw self to given surface.
+
+        Parameters
+        ---
+        surface: pygame.Surface to draw on
+        centerX: int x-position of the center of the icon
+        centerY: int y-position of the center of the icon
+
+        Returns
+        ---
+        None
+        """
+        if self.pieceId == Piece.EMPTY:
+            return
+        surface.blit(PieceSprite.smallIcons[self.pieceId] if self.smallIcon else PieceSprite.icons[self.pieceId],
+                     (centerX - PieceSprite.SIZE/(4 if self.smallIcon else 2),
+                      centerY - PieceSprite.SIZE/(4 if self.smallIcon else 2)))
+
+    def drawOnSquare(self, surface: pygame.Surface, rank: int, file: int) -> None:
+        """
+        Draw self on the given square of the board on the window surface.
+
+        Parameters
+        ---
+        surface: pygame.Surface the window surface
+        rank: int
+        file: int
+
+        Returns
+        ---
+        None
+        """
+        if self.pieceId == Piece.EMPTY:
+            return
+        surface.blit(PieceSprite.smallIcons[self.pieceId] if self.smallIcon else PieceSprite.icons[self.pieceId],
+                     (PieceSprite.X_OFFSET + PieceSprite.SIZE * file,
+                      PieceSprite.Y_OFFSET + PieceSprite.SIZE * (7-rank)))
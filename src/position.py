@@ -0,0 +1,344 @@
+#!usr/bin/env python3
+"""A compact bitboard representation of a SpartanChess position. Squares are
+numbered 0 to 63 as rank * 8 + file, so bit 0 is a1 and bit 63 is h8."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# INTERNAL IMPORTS
+from piece import Piece
+import zobrist
+
+
+class Position:
+    #############
+    # CONSTANTS #
+    #############
+    WHITE_IDS: tuple[int] = (Piece.PAWN, Piece.KNIGHT, Piece.BISHOP,
+                             Piece.ROOK, Piece.QUEEN, Piece.PKING)
+    BLACK_IDS: tuple[int] = (Piece.HOPLITE, Piece.LIEUTENANT, Piece.CAPTAIN,
+                             Piece.GENERAL, Piece.WARLORD, Piece.SKING)
+
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    bitboards: list[int]
+    """one bitboard per piece id; ids 6 to 9 are unused and stay empty"""
+    squares: list[int]
+    """piece id on each square, Piece.EMPTY if there is none"""
+    whiteOccupancy: int
+    blackOccupancy: int
+
+    whiteToMove: bool
+    castleShortRight: bool
+    castleLongRight: bool
+
+    halfmoveClock: int
+    """plies since the last capture or pawn/hoplite move"""
+    fullmoveNumber: int
+    """starts at 1 and goes up after every Black move"""
+
+    hash: int
+    """Zobrist hash, kept up to date by every change to the position"""
+
+    undoStack: list[tuple[int, int, int, bool, bool, int, int]]
+    """(move, moved piece id, captured piece id, castleShortRight,
+    castleLongRight, hash, halfmoveClock) for every move made"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self) -> None:
+        """
+        Constructor. Creates an empty board with White to move and no
+        castling rights.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.bitboards = [0] * 16
+        self.squares = [Piece.EMPTY] * 64
+        self.whiteOccupancy = 0
+        self.blackOccupancy = 0
+        self.whiteToMove = True
+        self.castleShortRight = self.castleLongRight = False
+        self.halfmoveClock = 0
+        self.fullmoveNumber = 1
+        self.hash = 0
+        self.undoStack = []
+
+    ###########
+    # METHODS #
+    ###########
+    def fromGrid(grid: list[list[Piece]], whiteToMove: bool = True,
+                 castleShort: bool = True, castleLong: bool = True) -> "Position":
+        """
+        Build a position from a board grid.
+
+        Parameters
+        ---
+        grid: list[list[Piece]] board state
+        whiteToMove: bool
+        castleShort: bool whether White retains short castling rights
+        castleLong: bool whether White retains long castling rights
+
+        Returns
+        ---
+        Position
+        """
+        position = Position()
+        for rank in range(8):
+            for file in range(8):
+                if grid[rank][file].pieceId != Piece.EMPTY:
+                    position.addPiece(grid[rank][file].pieceId, rank * 8 + file)
+        position.whiteToMove = whiteToMove
+        position.castleShortRight = castleShort
+        position.castleLongRight = castleLong
+        position.hash = zobrist.hashPosition(position)
+        return position
+
+    def startingPosition() -> "Position":
+        """
+        Build the standard starting position: Persians as in orthodox chess,
+        Spartans with two kings.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        Position
+        """
+        position = Position()
+        backRanks = ((Piece.ROOK, Piece.KNIGHT, Piece.BISHOP, Piece.QUEEN,
+                      Piece.PKING, Piece.BISHOP, Piece.KNIGHT, Piece.ROOK),
+                     (Piece.LIEUTENANT, Piece.GENERAL, Piece.SKING, Piece.CAPTAIN,
+                      Piece.CAPTAIN, Piece.SKING, Piece.WARLORD, Piece.LIEUTENANT))
+        for file in range(8):
+            position.addPiece(backRanks[0][file], file)
+            position.addPiece(Piece.PAWN, 8 + file)
+            position.addPiece(Piece.HOPLITE, 48 + file)
+            position.addPiece(backRanks[1][file], 56 + file)
+        position.castleShortRight = position.castleLongRight = True
+        position.hash = zobrist.hashPosition(position)
+        return position
+
+    def copy(self) -> "Position":
+        """
+        Returns a copy of this position.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        Position
+        """
+        position = Position()
+        position.bitboards = self.bitboards.copy()
+        position.squares = self.squares.copy()
+        position.whiteOccupancy = self.whiteOccupancy
+        position.blackOccupancy = self.blackOccupancy
+        position.whiteToMove = self.whiteToMove
+        position.castleShortRight = self.castleShortRight
+        position.castleLongRight = self.castleLongRight
+        position.halfmoveClock = self.halfmoveClock
+        position.fullmoveNumber = self.fullmoveNumber
+        position.hash = self.hash
+        position.undoStack = self.undoStack.copy()
+        return position
+
+    def addPiece(self, id: int, square: int) -> None:
+        """
+        Place a piece on an empty square.
+
+        Parameters
+        ---
+        id: int piece type id number
+        square: int
+
+        Returns
+        ---
+        None
+        """
+        bit = 1 << square
+        self.bitboards[id] |= bit
+        self.squares[square] = id
+        self.hash ^= zobrist.PIECE_KEYS[id][square]
+        if id < 10:
+            self.whiteOccupancy |= bit
+        else:
+            self.blackOccupancy |= bit
+            if id == Piece.SKING:
+                count = self.bitboards[id].bit_count()
+                self.hash ^= zobrist.KING_COUNT_KEYS[count - 1]\
+                    ^ zobrist.KING_COUNT_KEYS[count]
+
+    def removePiece(self, square: int) -> int:
+        """
+        Remove the piece (if any) on the given square.
+
+        Parameters
+        ---
+        square: int
+
+        Returns
+        ---
+        int: id of the removed piece, Piece.EMPTY if the square was empty
+        """
+        id = self.squares[square]
+        if id == Piece.EMPTY:
+            return id
+        mask = ~(1 << square)
+        self.bitboards[id] &= mask
+        self.squares[square] = Piece.EMPTY
+        self.hash ^= zobrist.PIECE_KEYS[id][square]
+        if id < 10:
+            self.whiteOccupancy &= mask
+        else:
+            self.blackOccupancy &= mask
+            if id == Piece.SKING:
+                count = self.bitboards[id].bit_count()
+                self.hash ^= zobrist.KING_COUNT_KEYS[count + 1]\
+                    ^ zobrist.KING_COUNT_KEYS[count]
+        return id
+
+    def pieceAt(self, rank: int, file: int) -> int:
+        """
+        Returns the id of the piece at the given rank and file.
+
+        Parameters
+        ---
+        rank: int
+        file: int
+
+        Returns
+        ---
+        int: piece type id number, Piece.EMPTY if the square is empty
+        """
+        return self.squares[rank * 8 + file]
+
+    def colorAt(self, rank: int, file: int) -> int:
+        """
+        Returns the color of the piece at the given rank and file.
+
+        Parameters
+        ---
+        rank: int
+        file: int
+
+        Returns
+        ---
+        int: Piece.WHITE, Piece.BLACK, or Piece.EMPTY
+        """
+        bit = 1 << (rank * 8 + file)
+        if self.whiteOccupancy & bit:
+            return Piece.WHITE
+        if self.blackOccupancy & bit:
+            return Piece.BLACK
+        return Piece.EMPTY
+
+    @property
+    def occupancy(self) -> int:
+        """bitboard of all occupied squares"""
+        return self.whiteOccupancy | self.blackOccupancy
+
+    @property
+    def blackKingCount(self) -> int:
+        """number of Spartan kings left on the board"""
+        return self.bitboards[Piece.SKING].bit_count()
+
+    def makeMove(self, move: int) -> None:
+        """
+        Play a move (encoded as in moverules) in place. The move is assumed
+        to be legal; it can be taken back with unmakeMove.
+
+        Parameters
+        ---
+        move: int encoded move
+
+        Returns
+        ---
+        None
+        """
+        start = move & 63
+        dest = move >> 6 & 63
+        promotion = move >> 15
+        hash = self.hash
+        movedId = self.removePiece(start)
+        capturedId = self.removePiece(dest)
+        self.undoStack.append((move, movedId, capturedId, self.castleShortRight,
+                               self.castleLongRight, hash, self.halfmoveClock))
+        castleShort = self.castleShortRight
+        castleLong = self.castleLongRight
+        self.addPiece(promotion if promotion else movedId, dest)
+
+        if movedId == Piece.PKING:
+            # castling also moves the rook
+            if dest - start == 2:
+                self.addPiece(self.removePiece(7), 5)
+            elif start - dest == 2:
+                self.addPiece(self.removePiece(0), 3)
+            self.castleShortRight = self.castleLongRight = False
+        # rook has moved or has been captured
+        if start == 0 or dest == 0:
+            self.castleLongRight = False
+        if start == 7 or dest == 7:
+            self.castleShortRight = False
+        if castleShort != self.castleShortRight:
+            self.hash ^= zobrist.CASTLE_SHORT_KEY
+        if castleLong != self.castleLongRight:
+            self.hash ^= zobrist.CASTLE_LONG_KEY
+
+        if capturedId != Piece.EMPTY or movedId == Piece.PAWN\
+                or movedId == Piece.HOPLITE:
+            self.halfmoveClock = 0
+        else:
+            self.halfmoveClock += 1
+        if not self.whiteToMove:
+            self.fullmoveNumber += 1
+        self.whiteToMove = not self.whiteToMove
+        self.hash ^= zobrist.BLACK_TO_MOVE_KEY
+
+    def unmakeMove(self) -> None:
+        """
+        Take back the last move made with makeMove.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        move, movedId, capturedId, castleShort, castleLong, hash, halfmoveClock\
+            = self.undoStack.pop()
+        start = move & 63
+        dest = move >> 6 & 63
+        self.removePiece(dest)
+        self.addPiece(movedId, start)
+        if capturedId != Piece.EMPTY:
+            self.addPiece(capturedId, dest)
+
+        if movedId == Piece.PKING:
+            # put the castled rook back
+            if dest - start == 2:
+                self.addPiece(self.removePiece(5), 7)
+            elif start - dest == 2:
+                self.addPiece(self.removePiece(3), 0)
+
+        self.castleShortRight = castleShort
+        self.castleLongRight = castleLong
+        self.whiteToMove = not self.whiteToMove
+        if not self.whiteToMove:
+            self.fullmoveNumber -= 1
+        self.halfmoveClock = halfmoveClock
+        self.hash = hash
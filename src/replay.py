@@ -0,0 +1,358 @@
+#!usr/bin/env python3
+"""Replays archived SpartanChess games without any graphics, to check that
+every move is legal and that recorded results match the final position.
+
+An archive is a text file with one game per line: moves in coordinate
+notation separated by spaces, optionally followed by the result ("1-0",
+"0-1", "1/2-1/2" or "*"). Blank lines and lines starting with '#' are
+skipped. Games are read one at a time, so archives of any size replay in
+constant memory.
+
+Binary game files (see gamefile) are replayed the same way, straight from
+the memory-mapped file; --pack converts a text archive into one.
+
+Usage (from the src directory):
+    python replay.py games.txt
+    python replay.py games.txt --workers 8 --verbose
+    python replay.py games.txt --pack games.scg
+    python replay.py games.scg"""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import argparse
+import itertools
+import multiprocessing
+import sys
+from collections import deque
+from time import perf_counter
+from typing import Iterator, Sequence
+
+# INTERNAL IMPORTS
+from game import Game
+from gamefile import GameFile, GameWriter
+from position import Position
+import gamefile
+import moverules as mr
+
+RESULTS: tuple[str] = ("1-0", "0-1", "1/2-1/2", "*")
+
+_workerGames: GameFile = None
+"""game file opened by each pool worker (see openWorkerGames)"""
+
+
+def readGames(path: str) -> Iterator[tuple[int, str]]:
+    """
+    Read the games of an archive one at a time.
+
+    Parameters
+    ---
+    path: str archive file
+
+    Returns
+    ---
+    Iterator[tuple[int, str]]: (line number, line) for every game
+    """
+    with open(path, encoding="utf-8") as file:
+        for (number, line) in enumerate(file, start=1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield (number, line)
+
+
+def replayGame(line: str) -> dict:
+    """
+    Play through one game from the starting position.
+
+    Parameters
+    ---
+    line: str moves in coordinate notation, optionally followed by a result
+
+    Returns
+    ---
+    dict: statistics of the game:
+        plies, captures, castles, promotions and checks: int counts of the
+        moves played;
+        result: str result of the final position ("*" if it is not over);
+        error: str what was wrong with the game, None if nothing was
+    """
+    texts = line.split()
+    recorded = None
+    if texts and texts[-1] in RESULTS:
+        recorded = texts.pop()
+    return replayMoves([gamefile.parseCoordinates(text) for text in texts],
+                       recorded, texts)
+
+
+def replayMoves(packedMoves: Sequence[int], recorded: str = None,
+                texts: list[str] = None) -> dict:
+    """
+    Play through a game of packed moves from the starting position.
+
+    Parameters
+    ---
+    packedMoves: Sequence[int] moves packed as in gamefile, None for any
+    that couldn't be read
+    recorded: str = None recorded result, None if there is none
+    texts: list[str] = None the moves as written, for error messages;
+    coordinate notation if None
+
+    Returns
+    ---
+    dict: statistics, as for replayGame
+    """
+    stats = {"plies": 0, "captures": 0, "castles": 0, "promotions": 0,
+             "checks": 0, "result": "*", "error": None}
+    position = Position.startingPosition()
+    for (i, target) in enumerate(packedMoves):
+        move = None if target is None\
+            else gamefile.findPackedMove(position, target)
+        if move is None:
+            if texts is not None:
+                text = texts[i]
+            else:
+                text = mr.moveToCoordinates(gamefile.unpackMove(target))
+            if Game(position).checkGameOver() != Game.ONGOING:
+                stats["error"] = f"move {text} after the game ended"
+            else:
+                stats["error"] = f"illegal move {text} at ply {stats['plies'] + 1}"
+            break
+
+        position.makeMove(move)
+        stats["plies"] += 1
+        code = mr.moveCode(move)
+        if code == mr.CAPTURE or code == mr.PROMOTE_CAPTURE:
+            stats["captures"] += 1
+        if code == mr.PROMOTE or code == mr.PROMOTE_CAPTURE:
+            stats["promotions"] += 1
+        if code == mr.CASTLE:
+            stats["castles"] += 1
+        if mr.isInCheck(position):
+            stats["checks"] += 1
+
+    game = Game(position)
+    match game.checkGameOver():
+        case Game.CHECKMATE:
+            stats["result"] = "0-1" if game.whiteToMove else "1-0"
+        case Game.STALEMATE:
+            stats["result"] = "1/2-1/2"
+    # games can also end on time, so only a finished position can disagree
+    if stats["error"] is None and recorded is not None\
+            and stats["result"] != "*" and recorded != stats["result"]:
+        stats["error"] = f"recorded result {recorded}, position is {stats['result']}"
+    return stats
+
+
+def replayNumbered(numberedLine: tuple[int, str]) -> tuple[int, dict]:
+    """
+    replayGame for a (line number, line) pair, as handed to pool workers.
+
+    Parameters
+    ---
+    numberedLine: tuple[int, str]
+
+    Returns
+    ---
+    tuple[int, dict]: (line number, statistics)
+    """
+    number, line = numberedLine
+    return (number, replayGame(line))
+
+
+def replayBatch(numberedLines: list[tuple[int, str]]) -> list[tuple[int, dict]]:
+    """
+    replayNumbered for every (line number, line) pair of a batch, as handed
+    to pool workers.
+
+    Parameters
+    ---
+    numberedLines: list[tuple[int, str]]
+
+    Returns
+    ---
+    list[tuple[int, dict]]: (line number, statistics) for each game
+    """
+    return [replayNumbered(numberedLine) for numberedLine in numberedLines]
+
+
+def openWorkerGames(path: str) -> None:
+    """
+    Pool worker initializer: map the game file being replayed, so that
+    workers are handed game numbers rather than moves.
+
+    Parameters
+    ---
+    path: str game file
+
+    Returns
+    ---
+    None
+    """
+    global _workerGames
+    _workerGames = GameFile(path)
+
+
+def replayStored(number: int) -> tuple[int, dict]:
+    """
+    replayMoves for a game of the worker's game file.
+
+    Parameters
+    ---
+    number: int which game, counting from 0
+
+    Returns
+    ---
+    tuple[int, dict]: (game number, statistics)
+    """
+    recorded, moves = _workerGames.game(number)
+    stats = replayMoves(moves, recorded)
+    moves.release()
+    return (number, stats)
+
+
+def replayArchive(path: str, workers: int = 1,
+                  chunkSize: int = 64) -> Iterator[tuple[int, dict]]:
+    """
+    Replay every game of an archive, in order.
+
+    Parameters
+    ---
+    path: str archive file, text or binary
+    workers: int = 1 number of processes to replay games in
+    chunkSize: int = 64 games handed to a worker at a time
+
+    Returns
+    ---
+    Iterator[tuple[int, dict]]: (line number, statistics) for every game of
+    a text archive; (game number, counting from 0, statistics) for every
+    game of a game file
+    """
+    if GameFile.isGameFile(path):
+        if workers <= 1:
+            openWorkerGames(path)
+            try:
+                for number in range(len(_workerGames)):
+                    yield replayStored(number)
+            finally:
+                _workerGames.close()
+            return
+        with GameFile(path) as games:
+            gameCount = len(games)
+        with multiprocessing.Pool(workers, openWorkerGames, (path,)) as pool:
+            yield from pool.imap(replayStored, range(gameCount),
+                                 chunksize=chunkSize)
+        return
+
+    games = readGames(path)
+    if workers <= 1:
+        for numberedLine in games:
+            yield replayNumbered(numberedLine)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        # Pool.imap reads its whole input up front, so keep a bounded number
+        # of batches submitted instead, topping up as each one is collected;
+        # memory use stays constant and workers never wait for a whole round
+        # of batches to finish
+        pending = deque()
+        while True:
+            while len(pending) < workers * 4:
+                batch = list(itertools.islice(games, chunkSize))
+                if not batch:
+                    break
+                pending.append(pool.apply_async(replayBatch, (batch,)))
+            if not pending:
+                return
+            yield from pending.popleft().get()
+
+
+def packArchive(path: str, outputPath: str) -> tuple[int, int]:
+    """
+    Convert a text archive into a game file. Moves are not checked.
+
+    Parameters
+    ---
+    path: str text archive
+    outputPath: str game file to write
+
+    Returns
+    ---
+    tuple[int, int]: (games written, line number of the first game with a
+    move that couldn't be read, or None)
+    """
+    games = 0
+    badLine = None
+    with GameWriter(outputPath) as writer:
+        for (number, line) in readGames(path):
+            texts = line.split()
+            recorded = None
+            if texts and texts[-1] in RESULTS:
+                recorded = texts.pop()
+            packedMoves = [gamefile.parseCoordinates(text) for text in texts]
+            if None in packedMoves:
+                badLine = badLine or number
+                continue
+            writer.addGame(packedMoves, recorded)
+            games += 1
+    return (games, badLine)
+
+
+def main() -> None:
+    """
+    Command-line entry point.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Check the games of a SpartanChess archive.")
+    parser.add_argument("path", help="archive file, one game per line, or a game file")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes to use (default %(default)s)")
+    parser.add_argument("--chunk", type=int, default=64,
+                        help="games handed to a process at a time (default %(default)s)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print statistics for every game, not just bad ones")
+    parser.add_argument("--pack", metavar="OUTPUT",
+                        help="write the archive to a game file instead of replaying it")
+    args = parser.parse_args()
+
+    if args.pack is not None:
+        games, badLine = packArchive(args.path, args.pack)
+        print(f"{games} games written to {args.pack}")
+        if badLine is not None:
+            sys.exit(f"games with unreadable moves were skipped, first on line {badLine}")
+        return
+
+    label = "game" if GameFile.isGameFile(args.path) else "line"
+    startTime = perf_counter()
+    games = invalid = plies = 0
+    results = dict.fromkeys(RESULTS, 0)
+    for (number, stats) in replayArchive(args.path, args.workers, args.chunk):
+        games += 1
+        plies += stats["plies"]
+        results[stats["result"]] += 1
+        if stats["error"] is not None:
+            invalid += 1
+            print(f"{label} {number}: {stats['error']}")
+        elif args.verbose:
+            print(f"{label} {number}: {stats['result']}, {stats['plies']} plies, "
+                  f"{stats['captures']} captures, {stats['checks']} checks, "
+                  f"{stats['promotions']} promotions, {stats['castles']} castles")
+    elapsed = perf_counter() - startTime
+
+    print(f"{games} games, {invalid} invalid, {plies} plies")
+    print(", ".join(f"{result}: {count}" for (result, count) in results.items()))
+    print(f"{elapsed:.3f} s, {games / max(elapsed, 1e-9):.1f} games/s")
+    if invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
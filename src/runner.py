@@ -1,19 +1,33 @@
 #!usr/bin/env python3
-"""SpartanChess: a Python GUI to play the Spartan chess variant against a friend."""
+"""SpartanChess: a Python GUI to play the Spartan chess variant against a friend
+or the computer.
+
+Usage (from the src directory):
+    python runner.py
+    python runner.py --computer black
+    python runner.py --dirty-rects --fps 30
+    python runner.py --minutes 3 --increment 2
+    python runner.py --pgn games.pgn
+    python runner.py --computer black --book book.bin --book-hints"""
 
-import time
 __author__ = "Chris Bao"
 __version__ = "1.0"
 
 # EXTERNAL IMPORTS
+import argparse
 import sys
+import time
 import pygame
 from pygame.locals import *
 
 # INTERNAL IMPORTS
 from board import Board
-from piece import Piece
+from book import OpeningBook
+from chessclock import ChessClock
+from computerplayer import ComputerPlayer
+from piecesprite import PieceSprite
 from ui import UI
+import pgn
 
 #############
 # CONSTANTS #
@@ -23,94 +37,212 @@ WIDTH: int = 1600
 HEIGHT: int = 900
 DARK_BG_COLOR: tuple[int, int, int] = (28, 28, 28)
 
-TICK_EVENT: int = USEREVENT + 1
-WHITE_TIME_OUT_EVENT: int = pygame.USEREVENT + 2
-BLACK_TIME_OUT_EVENT: int = pygame.USEREVENT + 3
-
-#########
-# SETUP #
-#########
-pygame.init()
-pygame.display.set_caption("SpartanChess")
-
-displaySurface = pygame.display.set_mode((WIDTH, HEIGHT))
-displayClock = pygame.time.Clock()
-displayClock.tick(FPS)
-
-ui = UI()
-board = Board()
-Piece.loadIcons()
-
-pygame.display.set_icon(Piece.icons[Piece.KNIGHT])
-
-############
-# MAINLOOP #
-############
-# number of moves by white or black
-numPlies = 0
-gameOngoing = True
-
-while True:
-    # handle events
-    for event in pygame.event.get():
-        if event.type == QUIT:
-            pygame.quit()
-            sys.exit()
-        if gameOngoing and event.type == MOUSEBUTTONDOWN and event.button == 1:
-            board.mousePressed()
-        if gameOngoing and event.type == MOUSEBUTTONUP and event.button == 1:
-            board.mouseReleased()
-        if gameOngoing and event.type == Board.MOVED_EVENT:
-            numPlies += 1
-            ui.whiteTimeGoing = not ui.whiteTimeGoing
-            if numPlies == 2:
-                # delay of 10 = 1000 ms/sec / 100 ticks per second
-                pygame.time.set_timer(TICK_EVENT, 10)
-        if gameOngoing and event.type == TICK_EVENT:
-            if ui.whiteTimeGoing:
-                ui.whiteTicksLeft -= 1
-                # 30 seconds left
-                if ui.whiteTicksLeft == 100 * 30:
-                    board.lowTimeSound.play()
-                if ui.whiteTicksLeft == 0:
-                    pygame.event.post(pygame.event.Event(WHITE_TIME_OUT_EVENT))
-            else:
-                ui.blackTicksLeft -= 1
-                # 30 seconds left
-                if ui.blackTicksLeft == 100 * 30:
-                    board.lowTimeSound.play()
-                if ui.blackTicksLeft == 0:
-                    pygame.event.pos(pygame.event.Event(BLACK_TIME_OUT_EVENT))
-        if event.type == Board.CAPTURE_EVENT:
-            # captured piece is white
-            if event.pieceType < 10:
-                ui.whiteCapturedPieces.append(event.pieceType)
-                ui.whiteCapturedPieces = sorted(
-                    ui.whiteCapturedPieces, reverse=True)
-            # captured piece is black
-            else:
-                ui.blackCapturedPieces.append(event.pieceType)
-                ui.blackCapturedPieces = sorted(
-                    ui.blackCapturedPieces, reverse=True)
-        if event.type == WHITE_TIME_OUT_EVENT:
-            gameOngoing = False
-            ui.gameOverMessage = "0–1 • Black wins on time"
-        if event.type == BLACK_TIME_OUT_EVENT:
-            gameOngoing = False
-            ui.gameOverMessage = "1–0 • White wins on time"
-        if event.type == Board.WHITE_CHECKMATE_EVENT:
-            gameOngoing = False
-            ui.gameOverMessage = "0–1 • Black wins by checkmate"
-        if event.type == Board.BLACK_CHECKMATE_EVENT:
-            gameOngoing = False
-            ui.gameOverMessage = "1–0 • White wins by checkmate"
-        if event.type == Board.STALEMATE_EVENT:
-            gameOngoing = False
-            ui.gameOverMessage = "½–½ • Draw by stalemate"
-
-    # draw screen
-    displaySurface.fill(DARK_BG_COLOR)
-    board.draw(displaySurface)
-    ui.draw(displaySurface)
-
-    pygame.display.update()
+IDLE_TIMEOUT: int = 1000
+"""longest wait for an event before looping anyway, in ms"""
+
+
+def main() -> None:
+    """
+    Set up the window and run the game until it is closed.
+
+    Parameters
+    ---
+    (no parameters)
+
+    Returns
+    ---
+    None
+    """
+    parser = argparse.ArgumentParser(description="Play Spartan chess.")
+    parser.add_argument("--computer", choices=("white", "black"),
+                        help="side for the computer to play")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="redraw only the parts of the window that change")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help="most frames to draw per second (default %(default)s)")
+    parser.add_argument("--minutes", type=float, default=10,
+                        help="starting time on each clock (default %(default)s)")
+    parser.add_argument("--increment", type=float, default=0,
+                        help="seconds added after every move")
+    parser.add_argument("--delay", type=float, default=0,
+                        help="seconds at the start of every turn before the clock runs")
+    parser.add_argument("--pgn", metavar="PATH",
+                        help="file to add the game record to when the game ends")
+    parser.add_argument("--book", metavar="PATH",
+                        help="opening book for the computer to play from")
+    parser.add_argument("--book-hints", action="store_true",
+                        help="show the --book moves of every position on the board")
+    args = parser.parse_args()
+    if args.book_hints and args.book is None:
+        parser.error("--book-hints needs --book")
+
+    #########
+    # SETUP #
+    #########
+    pygame.init()
+    pygame.display.set_caption("SpartanChess")
+
+    displaySurface = pygame.display.set_mode((WIDTH, HEIGHT))
+    displayClock = pygame.time.Clock()
+
+    ui = UI()
+    board = Board()
+    if args.book_hints:
+        board.book = OpeningBook(args.book)
+    clock = ChessClock(args.minutes, args.increment, args.delay)
+    PieceSprite.loadIcons()
+
+    pygame.display.set_icon(PieceSprite.icons[PieceSprite.KNIGHT])
+
+    # the engine searches in a worker process and posts its moves back
+    computer = None if args.computer is None\
+        else ComputerPlayer(bookPath=args.book)
+    computerIsWhite = args.computer == "white"
+
+    def computerToMove() -> bool:
+        return computer is not None and board.whiteToMove == computerIsWhite
+
+    if computerToMove():
+        computer.startSearch(board.position, clock.ticksLeft(True))
+
+    def saveGame(result: str) -> None:
+        # add the game to the --pgn file, if there is one
+        if args.pgn is None or not board.sanMoves:
+            return
+        names = ["Player", "Player"]
+        if computer is not None:
+            names[not computerIsWhite] = "Computer"
+        with open(args.pgn, "a", encoding="utf-8") as file:
+            pgn.writeGame(file, board.sanMoves, result,
+                          {"Event": "SpartanChess game", "Site": "SpartanChess",
+                           "Date": time.strftime("%Y.%m.%d"),
+                           "White": names[0], "Black": names[1]})
+
+    ############
+    # MAINLOOP #
+    ############
+    # number of moves by white or black
+    numPlies = 0
+    gameOngoing = True
+    redrawAll = True
+    # events that change what is on screen
+    redrawEvents = {MOUSEBUTTONDOWN, MOUSEBUTTONUP, WINDOWEXPOSED,
+                    WINDOWRESTORED, ChessClock.WHITE_TIME_OUT_EVENT,
+                    ChessClock.BLACK_TIME_OUT_EVENT, Board.MOVED_EVENT, Board.CAPTURE_EVENT,
+                    Board.WHITE_CHECKMATE_EVENT, Board.BLACK_CHECKMATE_EVENT,
+                    Board.STALEMATE_EVENT, ComputerPlayer.ENGINE_MOVE_EVENT}
+    redraw = True
+
+    while True:
+        # a running clock changes on every frame
+        if clock.running:
+            redraw = True
+        # sleep until something happens, unless a frame is already due
+        if redraw:
+            events = pygame.event.get()
+        else:
+            events = [pygame.event.wait(IDLE_TIMEOUT)] + pygame.event.get()
+        for event in events:
+            if event.type in redrawEvents or\
+                    event.type == MOUSEMOTION and board.draggedR != -1:
+                redraw = True
+            if event.type in (WINDOWEXPOSED, WINDOWRESTORED):
+                redrawAll = True
+            if event.type == QUIT:
+                if gameOngoing:
+                    saveGame("*")
+                if computer is not None:
+                    computer.close()
+                pygame.quit()
+                sys.exit()
+            if gameOngoing and not computerToMove() and\
+                    event.type == MOUSEBUTTONDOWN and event.button == 1:
+                board.mousePressed()
+            if gameOngoing and not computerToMove() and\
+                    event.type == MOUSEBUTTONUP and event.button == 1:
+                board.mouseReleased()
+            if gameOngoing and event.type == Board.MOVED_EVENT:
+                numPlies += 1
+                # the clocks start once both sides have moved
+                if numPlies == 2:
+                    clock.start(board.whiteToMove)
+                else:
+                    clock.press()
+                if computerToMove() and board.legalMoves:
+                    computer.startSearch(board.position,
+                                         clock.ticksLeft(board.whiteToMove))
+            if gameOngoing and event.type == ComputerPlayer.ENGINE_MOVE_EVENT:
+                board.playMove(event.move)
+            if gameOngoing and event.type == ChessClock.LOW_TIME_EVENT\
+                    and clock.confirm(event):
+                board.lowTimeSound.play()
+            if event.type == Board.CAPTURE_EVENT:
+                # captured piece is white
+                if event.pieceType < 10:
+                    ui.whiteCapturedPieces.append(event.pieceType)
+                    ui.whiteCapturedPieces = sorted(
+                        ui.whiteCapturedPieces, reverse=True)
+                # captured piece is black
+                else:
+                    ui.blackCapturedPieces.append(event.pieceType)
+                    ui.blackCapturedPieces = sorted(
+                        ui.blackCapturedPieces, reverse=True)
+            if gameOngoing and event.type in (ChessClock.WHITE_TIME_OUT_EVENT,
+                                              ChessClock.BLACK_TIME_OUT_EVENT)\
+                    and clock.confirm(event):
+                if computer is not None:
+                    computer.cancel()
+                gameOngoing = False
+                if event.type == ChessClock.WHITE_TIME_OUT_EVENT:
+                    ui.gameOverMessage = "0–1 • Black wins on time"
+                    saveGame("0-1")
+                else:
+                    ui.gameOverMessage = "1–0 • White wins on time"
+                    saveGame("1-0")
+            if event.type in (Board.WHITE_CHECKMATE_EVENT, Board.BLACK_CHECKMATE_EVENT,
+                              Board.STALEMATE_EVENT):
+                clock.stop()
+            if event.type == Board.WHITE_CHECKMATE_EVENT:
+                gameOngoing = False
+                ui.gameOverMessage = "0–1 • Black wins by checkmate"
+                saveGame("0-1")
+            if event.type == Board.BLACK_CHECKMATE_EVENT:
+                gameOngoing = False
+                ui.gameOverMessage = "1–0 • White wins by checkmate"
+                saveGame("1-0")
+            if event.type == Board.STALEMATE_EVENT:
+                gameOngoing = False
+                ui.gameOverMessage = "½–½ • Draw by stalemate"
+                saveGame("1/2-1/2")
+
+        # draw screen, at most args.fps times per second
+        if not redraw:
+            continue
+        redraw = False
+        ui.whiteTicksLeft = clock.ticksLeft(True)
+        ui.blackTicksLeft = clock.ticksLeft(False)
+        if not args.dirty_rects:
+            displaySurface.fill(DARK_BG_COLOR)
+            board.draw(displaySurface)
+            ui.draw(displaySurface)
+
+            pygame.display.update()
+        else:
+            # redraw everything under each changed area, clipped to it
+            rects = board.takeDirtyRects() + ui.takeDirtyRects()
+            if redrawAll:
+                rects = [displaySurface.get_rect()]
+                redrawAll = False
+            for rect in rects:
+                displaySurface.set_clip(rect)
+                displaySurface.fill(DARK_BG_COLOR)
+                board.draw(displaySurface)
+                ui.draw(displaySurface)
+            displaySurface.set_clip(None)
+
+            pygame.display.update(rects)
+        displayClock.tick(args.fps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!usr/bin/env python3
+"""A fixed-size transposition table for searching SpartanChess positions,
+keyed by Zobrist hash. Entries live in one preallocated NumPy structured
+array, so memory use stays the same however long the search runs."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import numpy as np
+
+
+class TranspositionTable:
+    #############
+    # CONSTANTS #
+    #############
+    # entry flags; an empty slot has flag EMPTY
+    EMPTY: int = 0
+    EXACT: int = 1
+    LOWER_BOUND: int = 2
+    """score is at least the stored one (search failed high)"""
+    UPPER_BOUND: int = 3
+    """score is at most the stored one (search failed low)"""
+
+    ENTRY_TYPE: np.dtype = np.dtype([("key", np.uint64),
+                                     ("move", np.uint32),
+                                     ("score", np.int32),
+                                     ("depth", np.int16),
+                                     ("flag", np.uint8)])
+
+    # every bucket holds two entries: one kept for the deepest search of
+    # any position mapping to it, and one overwritten on every store
+    DEPTH_PREFERRED: int = 0
+    ALWAYS_REPLACE: int = 1
+
+    ######################
+    # INSTANCE VARIABLES #
+    ######################
+    table: np.ndarray
+    """(bucket count, 2) array of ENTRY_TYPE"""
+    bucketCount: int
+
+    # views of the table's fields, for fast scalar access
+    keys: np.ndarray
+    moves: np.ndarray
+    scores: np.ndarray
+    depths: np.ndarray
+    flags: np.ndarray
+
+    hits: int
+    misses: int
+    collisions: int
+    """probes that missed even though the bucket held other positions"""
+
+    ###############
+    # CONSTRUCTOR #
+    ###############
+    def __init__(self, sizeMB: float = 16) -> None:
+        """
+        Constructor.
+
+        Parameters
+        ---
+        sizeMB: float = 16 memory to use for entries, in megabytes
+
+        Returns
+        ---
+        None
+        """
+        self.bucketCount = max(1, int(sizeMB * 2**20)
+                               // (2 * TranspositionTable.ENTRY_TYPE.itemsize))
+        self.table = np.zeros((self.bucketCount, 2),
+                              dtype=TranspositionTable.ENTRY_TYPE)
+        self.keys = self.table["key"]
+        self.moves = self.table["move"]
+        self.scores = self.table["score"]
+        self.depths = self.table["depth"]
+        self.flags = self.table["flag"]
+        self.resetCounters()
+
+    ###########
+    # METHODS #
+    ###########
+    def clear(self) -> None:
+        """
+        Empty the table and reset the counters.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.table.fill(0)
+        self.resetCounters()
+
+    def resetCounters(self) -> None:
+        """
+        Reset the hit, miss and collision counters.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.hits = self.misses = self.collisions = 0
+
+    def probe(self, hash: int) -> tuple[int, int, int, int]:
+        """
+        Look up a position.
+
+        Parameters
+        ---
+        hash: int Zobrist hash of the position
+
+        Returns
+        ---
+        tuple[int, int, int, int]: (move, score, depth, flag) stored for the
+        position, None if it is not in the table
+        """
+        bucket = hash % self.bucketCount
+        occupied = False
+        for slot in (TranspositionTable.DEPTH_PREFERRED,
+                     TranspositionTable.ALWAYS_REPLACE):
+            if self.flags[bucket, slot] == TranspositionTable.EMPTY:
+                continue
+            if self.keys[bucket, slot] == hash:
+                self.hits += 1
+                return (int(self.moves[bucket, slot]), int(self.scores[bucket, slot]),
+                        int(self.depths[bucket, slot]), int(self.flags[bucket, slot]))
+            occupied = True
+        self.misses += 1
+        if occupied:
+            self.collisions += 1
+        return None
+
+    def store(self, hash: int, move: int, score: int, depth: int, flag: int) -> None:
+        """
+        Record a search result. It replaces the depth-preferred entry if that
+        holds the same position or a search no deeper than this one, and the
+        always-replace entry otherwise.
+
+        Parameters
+        ---
+        hash: int Zobrist hash of the position
+        move: int best move found (encoded as in moverules), 0 if none
+        score: int
+        depth: int remaining depth the position was searched to
+        flag: int EXACT, LOWER_BOUND or UPPER_BOUND
+
+        Returns
+        ---
+        None
+        """
+        bucket = hash % self.bucketCount
+        slot = TranspositionTable.DEPTH_PREFERRED
+        if self.flags[bucket, slot] != TranspositionTable.EMPTY\
+                and self.keys[bucket, slot] != hash\
+                and self.depths[bucket, slot] > depth:
+            slot = TranspositionTable.ALWAYS_REPLACE
+        self.table[bucket, slot] = (hash, move, score, depth, flag)
+
+    def fill(self) -> float:
+        """
+        Returns the fraction of entries in use.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        float
+        """
+        return np.count_nonzero(self.flags) / self.flags.size
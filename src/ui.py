@@ -9,16 +9,13 @@ import pygame
 import pygame.freetype
 
 # INTERNAL IMPORTS
-from piece import Piece
+from piecesprite import PieceSprite
 
 
 class UI:
     #############
     # CONSTANTS #
     #############
-    # 10 mins * 60 secs/min * 100 ticks/sec
-    STARTING_TICKS: int = 10 * 60 * 100
-
     CLOCK_XPOS: int = 1230
     UPPER_CLOCK_YPOS: int = 270
     LOWER_CLOCK_YPOS: int = 540
@@ -44,22 +41,47 @@ class UI:
     BLACK_CAPTURED_YPOS: int = LOWER_CLOCK_YPOS + CLOCK_HEIGHT/2
 
     TEXT_COLOR: tuple[int, int, int] = (255, 255, 255)
+    CLOCK_CHARACTERS: str = "0123456789:."
+
+    REGIONS: tuple[pygame.Rect] = (
+        # upper and lower clocks
+        pygame.Rect(CLOCK_XPOS, UPPER_CLOCK_YPOS, CLOCK_WIDTH, CLOCK_HEIGHT),
+        pygame.Rect(CLOCK_XPOS, LOWER_CLOCK_YPOS, CLOCK_WIDTH, CLOCK_HEIGHT),
+        # rows of captured pieces; long rows run over the board
+        pygame.Rect(0, WHITE_CAPTURED_YPOS - PieceSprite.SIZE/4,
+                    CLOCK_XPOS, PieceSprite.SIZE/2),
+        pygame.Rect(0, BLACK_CAPTURED_YPOS - PieceSprite.SIZE/4,
+                    CLOCK_XPOS, PieceSprite.SIZE/2),
+        # game over message, between the clocks
+        pygame.Rect(CLOCK_XPOS - 50, UPPER_CLOCK_YPOS + CLOCK_HEIGHT,
+                    CLOCK_WIDTH + 100, LOWER_CLOCK_YPOS - UPPER_CLOCK_YPOS - CLOCK_HEIGHT))
+    """areas redrawn when the parts of the state in drawnState change"""
 
     ######################
     # INSTANCE VARIABLES #
     ######################
-    # this chess clock is accurate to 10 ms (1/100 s)
-    whiteTimeGoing: bool
+    # time shown on the clocks, in hundredths of a second; read from the
+    # ChessClock before every frame
     whiteTicksLeft: int
     blackTicksLeft: int
 
     clockFont: pygame.freetype.Font
+    clockGlyphs: dict[tuple[int, int, int],
+                      dict[str, tuple[pygame.Surface, pygame.Rect, int]]]
+    """(image, bounding rect relative to the origin, advance) of every
+    clock character, by clock color"""
+    clockGlyphTop: int
+    """height of the tallest digit above the baseline"""
     gameOverMessage: str
 
     # white and black denote piece color, not player
     whiteCapturedPieces: list[int]
     blackCapturedPieces: list[int]
 
+    drawnState: tuple
+    """(black ticks, white ticks, white captured, black captured, message)
+    as of the last takeDirtyRects, None before the first call"""
+
     ###############
     # CONSTRUCTOR #
     ###############
@@ -76,17 +98,18 @@ class UI:
         ---
         None
         """
-        self.whiteTimeGoing = True
-        self.whiteTicksLeft = UI.STARTING_TICKS
-        self.blackTicksLeft = UI.STARTING_TICKS
+        self.whiteTicksLeft = 0
+        self.blackTicksLeft = 0
 
         self.clockFont = pygame.freetype.Font("../font/robotoRegular.ttf", 72)
         self.messageFont = pygame.freetype.Font(
             "../font/robotoRegular.ttf", 20)
+        self.renderClockGlyphs()
         self.gameOverMessage = None
 
         self.whiteCapturedPieces = []
         self.blackCapturedPieces = []
+        self.drawnState = None
 
     ###########
     # METHODS #
@@ -129,8 +152,7 @@ class UI:
         # draw white captured pieces (pieces Black captured)
         xpos = UI.CAPTURED_XPOS
         for (i, id) in enumerate(self.whiteCapturedPieces):
-            Piece(id, smallIcon=True).draw(
-                surface, forceX=xpos, forceY=UI.WHITE_CAPTURED_YPOS)
+            PieceSprite(id, smallIcon=True).draw(surface, xpos, UI.WHITE_CAPTURED_YPOS)
             # if next piece is same, group them together
             if i < len(self.whiteCapturedPieces) - 1 and self.whiteCapturedPieces[i+1] == id:
                 xpos += 15
@@ -140,8 +162,7 @@ class UI:
         # draw black captured pieces (pieces White captured)
         xpos = UI.CAPTURED_XPOS
         for (i, id) in enumerate(self.blackCapturedPieces):
-            Piece(id, smallIcon=True).draw(
-                surface, forceX=xpos, forceY=UI.BLACK_CAPTURED_YPOS)
+            PieceSprite(id, smallIcon=True).draw(surface, xpos, UI.BLACK_CAPTURED_YPOS)
             # if next piece is same, group them together
             if i < len(self.blackCapturedPieces) - 1 and self.blackCapturedPieces[i+1] == id:
                 xpos += 15
@@ -161,81 +182,129 @@ class UI:
         None
         """
         # draw upper clock (Black)
-        upperClock = pygame.Rect(UI.CLOCK_XPOS,
-                                 UI.UPPER_CLOCK_YPOS,
-                                 UI.CLOCK_WIDTH,
-                                 UI.CLOCK_HEIGHT)
-        pygame.draw.rect(surface,
-                         UI.UPPER_CLOCK_COLOR,
-                         upperClock)
-        # 100 ticks per second, 60 seconds per min
-        minutes = str(int(self.blackTicksLeft / 100 / 60))
-        seconds = str(int(self.blackTicksLeft / 100 % 60))
-        ticks = str(int(self.blackTicksLeft % 100))
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_MINUTES,
-                                  UI.UPPER_CLOCK_TEXT_YPOS),
-                                 minutes if len(minutes) == 2 else (
-                                     "0" + minutes),
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_COLON,
-                                  UI.UPPER_CLOCK_TEXT_YPOS + 10),
-                                 ":",
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_SECONDS,
-                                  UI.UPPER_CLOCK_TEXT_YPOS),
-                                 seconds if len(seconds) == 2 else (
-                                     "0" + seconds),
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_DOT,
-                                  UI.UPPER_CLOCK_TEXT_YPOS + 42),
-                                 ".",
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_TICKS,
-                                  UI.UPPER_CLOCK_TEXT_YPOS),
-                                 ticks if len(ticks) == 2 else ("0" + ticks),
-                                 UI.TEXT_COLOR)
-
+        self.drawClock(surface, UI.UPPER_CLOCK_YPOS, UI.UPPER_CLOCK_TEXT_YPOS,
+                       UI.UPPER_CLOCK_COLOR, self.blackTicksLeft)
         # draw lower clock (White)
-        lowerClock = pygame.Rect(UI.CLOCK_XPOS,
-                                 UI.LOWER_CLOCK_YPOS,
-                                 UI.CLOCK_WIDTH,
-                                 UI.CLOCK_HEIGHT)
+        self.drawClock(surface, UI.LOWER_CLOCK_YPOS, UI.LOWER_CLOCK_TEXT_YPOS,
+                       UI.LOWER_CLOCK_COLOR, self.whiteTicksLeft)
+
+    def drawClock(self, surface: pygame.Surface, ypos: int, textYpos: int,
+                  color: tuple[int, int, int], ticksLeft: int):
+        """
+        Draw one chess clock to the given surface, unless it lies outside
+        the surface's clipping area.
+
+        Parameters
+        ---
+        surface: pygame.Surface
+        ypos: int top of the clock
+        textYpos: int top of the clock text
+        color: tuple[int, int, int] background color
+        ticksLeft: int time to show, in hundredths of a second
+
+        Returns
+        ---
+        None
+        """
+        clock = pygame.Rect(UI.CLOCK_XPOS,
+                            ypos,
+                            UI.CLOCK_WIDTH,
+                            UI.CLOCK_HEIGHT)
+        if not surface.get_clip().colliderect(clock):
+            return
         pygame.draw.rect(surface,
-                         UI.LOWER_CLOCK_COLOR,
-                         lowerClock)
+                         color,
+                         clock)
         # 100 ticks per second, 60 seconds per min
-        minutes = str(int(self.whiteTicksLeft / 100 / 60))
-        seconds = str(int(self.whiteTicksLeft / 100 % 60))
-        ticks = str(int(self.whiteTicksLeft % 100))
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_MINUTES,
-                                  UI.LOWER_CLOCK_TEXT_YPOS),
-                                 minutes if len(minutes) == 2 else (
-                                     "0" + minutes),
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_COLON,
-                                  UI.LOWER_CLOCK_TEXT_YPOS + 10),
-                                 ":",
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_SECONDS,
-                                  UI.LOWER_CLOCK_TEXT_YPOS),
-                                 seconds if len(seconds) == 2 else (
-                                     "0" + seconds),
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_DOT,
-                                  UI.LOWER_CLOCK_TEXT_YPOS + 42),
-                                 ".",
-                                 UI.TEXT_COLOR)
-        self.clockFont.render_to(surface,
-                                 (UI.CLOCK_TEXT_XPOS_TICKS,
-                                  UI.LOWER_CLOCK_TEXT_YPOS),
-                                 ticks if len(ticks) == 2 else ("0" + ticks),
-                                 UI.TEXT_COLOR)
+        minutes = int(ticksLeft / 100 / 60)
+        seconds = int(ticksLeft / 100 % 60)
+        ticks = int(ticksLeft % 100)
+        self.drawGlyphs(surface, UI.CLOCK_TEXT_XPOS_MINUTES, textYpos,
+                        "%02d" % minutes, color)
+        self.drawGlyphs(surface, UI.CLOCK_TEXT_XPOS_COLON, textYpos + 10, ":", color)
+        self.drawGlyphs(surface, UI.CLOCK_TEXT_XPOS_SECONDS, textYpos,
+                        "%02d" % seconds, color)
+        self.drawGlyphs(surface, UI.CLOCK_TEXT_XPOS_DOT, textYpos + 42, ".", color)
+        self.drawGlyphs(surface, UI.CLOCK_TEXT_XPOS_TICKS, textYpos,
+                        "%02d" % ticks, color)
+
+    def drawGlyphs(self, surface: pygame.Surface, xpos: int, ypos: int,
+                   text: str, color: tuple[int, int, int]):
+        """
+        Draw clock text to the given surface from the pre-rendered glyphs.
+        Digits sit on a common baseline, one advance apart.
+
+        Parameters
+        ---
+        surface: pygame.Surface
+        xpos: int left of the text
+        ypos: int top of the text
+        text: str digits, ':' or '.'
+        color: tuple[int, int, int] background color of the clock
+
+        Returns
+        ---
+        None
+        """
+        glyphs = self.clockGlyphs[color]
+        for char in text:
+            glyph, rect, advance = glyphs[char]
+            surface.blit(glyph, (xpos + rect.x, ypos + self.clockGlyphTop - rect.y))
+            xpos += advance
+
+    def renderClockGlyphs(self) -> None:
+        """
+        Render every character the clocks show, once for each clock color.
+        The glyphs are opaque, which makes them much faster to draw than
+        blending text onto the clock.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        None
+        """
+        self.clockGlyphs = {}
+        for color in (UI.UPPER_CLOCK_COLOR, UI.LOWER_CLOCK_COLOR):
+            glyphs = {}
+            for char in UI.CLOCK_CHARACTERS:
+                glyph, rect = self.clockFont.render(char, UI.TEXT_COLOR, color)
+                if pygame.display.get_surface() is not None:
+                    glyph = glyph.convert()
+                advance = round(self.clockFont.get_metrics(char)[0][4])
+                glyphs[char] = (glyph, rect, advance)
+            self.clockGlyphs[color] = glyphs
+        # digits are placed by the tallest digit, separators by their own top
+        self.clockGlyphTop = max(glyphs[char][1].y for char in "0123456789")
+        for glyphs in self.clockGlyphs.values():
+            for char in ":.":
+                glyph, rect, advance = glyphs[char]
+                glyphs[char] = (glyph, pygame.Rect(0, self.clockGlyphTop,
+                                                   rect.w, rect.h), advance)
+
+    def takeDirtyRects(self) -> list[pygame.Rect]:
+        """
+        Returns the areas of the window that have changed since the last
+        call: each clock whose time has changed, each row of captured pieces
+        that has grown, and the game over message once it appears.
+
+        Parameters
+        ---
+        (no parameters)
+
+        Returns
+        ---
+        list[pygame.Rect]
+        """
+        state = (self.blackTicksLeft, self.whiteTicksLeft,
+                 tuple(self.whiteCapturedPieces), tuple(self.blackCapturedPieces),
+                 self.gameOverMessage)
+        if self.drawnState is None:
+            rects = list(UI.REGIONS)
+        else:
+            rects = [region for (region, old, new)
+                     in zip(UI.REGIONS, self.drawnState, state) if old != new]
+        self.drawnState = state
+        return rects
@@ -0,0 +1,51 @@
+#!usr/bin/env python3
+"""Zobrist keys for SpartanChess positions. A position's hash is the XOR of
+the key of every piece on its square, plus keys for Black to move, each
+Persian castling right, and the number of Spartan kings."""
+
+__author__ = "Chris Bao"
+__version__ = "1.0"
+
+# EXTERNAL IMPORTS
+import random
+
+# INTERNAL IMPORTS
+from piece import Piece
+
+# fixed seed so that hashes are the same in every process
+_keyGenerator = random.Random(0x5A47A)
+
+PIECE_KEYS: list[list[int]] = [[_keyGenerator.getrandbits(64) for _ in range(64)]
+                               for _ in range(16)]
+"""key of every piece id (ids 6 to 9 are unused) on every square"""
+BLACK_TO_MOVE_KEY: int = _keyGenerator.getrandbits(64)
+CASTLE_SHORT_KEY: int = _keyGenerator.getrandbits(64)
+CASTLE_LONG_KEY: int = _keyGenerator.getrandbits(64)
+KING_COUNT_KEYS: tuple[int] = (0, _keyGenerator.getrandbits(64),
+                               _keyGenerator.getrandbits(64))
+"""key of each Spartan king count; a count of 0 adds nothing"""
+
+
+def hashPosition(position: "Position") -> int:
+    """
+    Compute the hash of a position from scratch.
+
+    Parameters
+    ---
+    position: Position
+
+    Returns
+    ---
+    int: 64-bit hash
+    """
+    hash = 0
+    for square, id in enumerate(position.squares):
+        if id != Piece.EMPTY:
+            hash ^= PIECE_KEYS[id][square]
+    if not position.whiteToMove:
+        hash ^= BLACK_TO_MOVE_KEY
+    if position.castleShortRight:
+        hash ^= CASTLE_SHORT_KEY
+    if position.castleLongRight:
+        hash ^= CASTLE_LONG_KEY
+    return hash ^ KING_COUNT_KEYS[position.blackKingCount]